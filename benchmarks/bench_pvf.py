@@ -0,0 +1,222 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: bench_pvf.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   15:05
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 基于合成pvf的可复现性能基准。
+
+用法：
+    python benchmarks/bench_pvf.py                       # 生成默认规模的合成pvf并运行全部基准
+    python benchmarks/bench_pvf.py --scale 5 --repeat 5  # 放大规模
+    python benchmarks/bench_pvf.py --save-baseline       # 保存为基线
+    python benchmarks/bench_pvf.py --only decrypt build_tree
+结果与 benchmarks/baseline.json 对比，耗时超出 --tolerance 时标记为 REGRESSION 并以非零状态退出。
+导入 PvfParser 的模块与耗时预算由 tests/test_import_time.py 检查。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pkgkits.PvfParser import TinyPVF, PVFApi, save_tojson
+from pkgkits.synthetic import generate
+from pkgkits.scheduler import LOADERS
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+# 与 PVFApi 的缺省路径一致
+SPECS = LOADERS
+
+
+class Context(object):
+    """基准间共享的输入数据"""
+
+    def __init__(self, pvf_path, workdir):
+        self.pvf_path = pvf_path
+        self.workdir = workdir
+        # 不经缓存，测量真实的解析开销
+        self.pvf = TinyPVF(pvf_path, cache_bytes=0)
+        self.scripts = [path for path in self.pvf.headers if path.endswith(('.equ', '.stk'))]
+        self.script_bytes = sum(self.pvf.headers[path]['file_len'] for path in self.scripts)
+        self.units = [self.pvf.decrypt_bin2slist(path) for path in self.scripts]
+        self.blob = os.urandom(8 << 20)
+        self.api = PVFApi(pvf_path, cache_bytes=0)
+        self.api.load_pvf()
+        self.equipments = self.api.get_equipments()
+        self.cached = TinyPVF(pvf_path)
+        self.hot = self.scripts[:200]
+        for path in self.hot:
+            self.cached.load_tree(path)
+
+
+def bench_cold_import(ctx):
+    """在新的解释器中导入 PvfParser 并读取pvf头部，包含解释器自身的启动时间"""
+    code = f"from pkgkits.PvfParser import TinyPVF; TinyPVF({ctx.pvf_path!r}).file_nodes_len"
+    subprocess.run([sys.executable, '-c', code], cwd=BASELINE.parents[1], check=True)
+    return 1, 0
+
+
+def bench_construct(ctx):
+    TinyPVF(ctx.pvf_path).preload()
+    return len(ctx.pvf.headers), os.path.getsize(ctx.pvf_path)
+
+
+def bench_decrypt(ctx):
+    TinyPVF.decrypt(ctx.blob, 0x12345678)
+    return 1, len(ctx.blob)
+
+
+def bench_decrypt_bin2slist(ctx):
+    for path in ctx.scripts:
+        ctx.pvf.decrypt_bin2slist(path)
+    return len(ctx.scripts), ctx.script_bytes
+
+
+def bench_build_tree(ctx):
+    for units in ctx.units:
+        TinyPVF.build_tree(units)
+    return len(ctx.units), 0
+
+
+def bench_cached_tree(ctx):
+    for path in ctx.hot:
+        ctx.cached.load_tree(path)
+    return len(ctx.hot), 0
+
+
+def bench_get_equipments(ctx):
+    return len(ctx.api.get_equipments()), 0
+
+
+def bench_get_supplies(ctx):
+    return len(ctx.api.get_supplies()[1]), 0
+
+
+def bench_load_all(ctx):
+    result = ctx.api.load_all(SPECS)
+    return sum(len(value) for value in result.values()), 0
+
+
+def bench_export(ctx):
+    equips = ctx.api.parse_equipments(ctx.equipments)
+    out = os.path.join(ctx.workdir, 'equipments.json')
+    save_tojson(out, equips)
+    return len(equips), os.path.getsize(out)
+
+
+BENCHMARKS = {
+    'cold_import': bench_cold_import,
+    'construct': bench_construct,
+    'decrypt': bench_decrypt,
+    'decrypt_bin2slist': bench_decrypt_bin2slist,
+    'build_tree': bench_build_tree,
+    'cached_tree': bench_cached_tree,
+    'get_equipments': bench_get_equipments,
+    'get_supplies': bench_get_supplies,
+    'load_all': bench_load_all,
+    'export': bench_export,
+}
+
+
+def run_one(func, ctx, repeat):
+    """取 repeat 次中的最短耗时，再单独运行一次统计峰值内存"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items, nbytes = func(ctx)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func(ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "seconds": round(best, 6),
+        "items": items,
+        "items_per_s": round(items / best, 1) if best else None,
+        "mb_per_s": round(nbytes / best / 2 ** 20, 3) if nbytes and best else None,
+        "peak_mb": round(peak / 2 ** 20, 3),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """与基线比较，返回出现退化的基准名称"""
+    regressions = []
+    for name, item in results.items():
+        base = baseline.get(name)
+        if base is None:
+            item["vs_baseline"] = None
+            continue
+        ratio = item["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        item["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='pvf 性能基准')
+    parser.add_argument('--pvf', help='使用已有的pvf，缺省时生成合成pvf')
+    parser.add_argument('--scale', type=float, default=1.0, help='合成pvf规模倍数，1 约为 4500 个文件')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', choices=list(BENCHMARKS))
+    parser.add_argument('--baseline', default=str(BASELINE))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的耗时增长比例')
+    parser.add_argument('--json', help='结果另存为 json')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pvf_path = args.pvf
+        if pvf_path is None:
+            pvf_path = os.path.join(workdir, 'synthetic.pvf')
+            n = lambda x: max(int(x * args.scale), 1)
+            info = generate(pvf_path, equipments=n(2000), stackables=n(2000), quests=n(200), dungeons=n(50),
+                            skills_per_job=n(30), seed=args.seed)
+            print(f"synthetic pvf: {info['files']} files, {info['bytes'] / 2 ** 20:.2f} MB, {info['strings']} strings")
+        ctx = Context(pvf_path, workdir)
+        results = {}
+        for name in args.only or BENCHMARKS:
+            results[name] = run_one(BENCHMARKS[name], ctx, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf8') as f:
+            saved = json.load(f)
+        if (saved.get("scale"), saved.get("seed")) != (args.scale, args.seed):
+            print(f"warning: baseline was recorded with scale={saved.get('scale')} seed={saved.get('seed')}")
+        baseline = saved["results"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    print(f"{'benchmark':<20}{'seconds':>10}{'items/s':>12}{'MB/s':>10}{'peak MB':>10}{'vs base':>10}")
+    fmt = lambda x, width, digits: f"{'-':>{width}}" if x is None else f"{x:>{width}.{digits}f}"
+    for name, item in results.items():
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:<20}{item['seconds']:>10.4f}{fmt(item['items_per_s'], 12, 1)}{fmt(item['mb_per_s'], 10, 2)}"
+              f"{item['peak_mb']:>10.2f}{fmt(item['vs_baseline'], 10, 3)}{flag}")
+
+    report = {"scale": args.scale, "seed": args.seed, "python": sys.version.split()[0], "results": results}
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"baseline saved: {args.baseline}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,11 +10,19 @@
 --------------------------------------------------------
 # @Brief:用于读取和加载PVF的类
 """
+import os
 import json
 import struct
+import threading
 from copy import deepcopy
-from zhconv import convert
-from pkgkits.utils import rarity_map, trade_map, equip_map, job_map, equipment_map, supply_map
+from time import perf_counter
+from functools import cached_property
+from pkgkits.utils import rarity_map, trade_map, job_map, supply_map
+from pkgkits.scheduler import BulkScheduler, READAHEAD_BYTES, READ_GAP_BYTES
+from pkgkits.pathindex import PathIndex
+from pkgkits.profiler import pvf_stats
+from pkgkits.cache import SizedLRU, DEFAULT_CACHE_BYTES
+from pkgkits.interning import InternPool
 
 """
 # 参考：
@@ -35,13 +43,26 @@ n_string.lst 存储有一些str文件的路径
 """
 
 
+def convert(text, locale):
+    """繁简转换。zhconv 导入时会加载很大的转换字典，推迟到第一次转换时再导入"""
+    global convert
+    from zhconv import convert
+    return convert(text, locale)
+
+
 class TinyPVF(object):
 
-    def __init__(self, pvf_path, encoding='big5'):
-        """读取pvf文件，初步缓存和解析需要的内容。"""
+    def __init__(self, pvf_path, encoding='big5', cache_bytes=DEFAULT_CACHE_BYTES):
+        """读取pvf文件，初步缓存和解析需要的内容。cache_bytes 为解码结果缓存的内存上限，0 表示不缓存。"""
         self.pvf_path = pvf_path
         self.encoding = encoding
         self.fp = open(self.pvf_path, 'rb')
+        self._read_lock = threading.Lock()
+        self._local = threading.local()
+        self._handles = []
+        self._stt_cache = {}
+        self.cache = SizedLRU(cache_bytes, 'decode_cache')
+        self.stats = pvf_stats
         uuid_len = struct.unpack('i', self.fp.read(4))[0]
         self.uuid = self.fp.read(uuid_len)
         self.version = struct.unpack('i', self.fp.read(4))[0]
@@ -51,23 +72,135 @@ class TinyPVF(object):
 
         self.pack_offset = self.fp.tell() + self.dir_nodes_len
         self.header_len = self.fp.tell()
-        self.headers = self.init_headers()
-        self.bst = self.load_bst()
-        self.lst = self.load_lst()
+        # headers、bst、lst 均在首次访问时才加载，只读取头部信息的调用无需付出解析开销
+        self._path_index = None
+        # 写时复制层，由 overlay.Overlay 挂载
+        self.overlay = None
+
+    @cached_property
+    def headers(self) -> dict:
+        """文件树 {路径: 节点}"""
+        return self.init_headers()
+
+    @cached_property
+    def bst(self) -> list:
+        """字符串表"""
+        return self.load_bst()
+
+    @cached_property
+    def raw_bst(self) -> list:
+        """未经繁简转换的字符串表，用于无损的文本导出与重新打包"""
+        return self.load_bst(raw=True)
+
+    @cached_property
+    def interned(self) -> InternPool:
+        """与字符串表索引绑定的驻留池，所有解码结果共享其中的字符串"""
+        return InternPool(self.bst, self.trad2sim)
+
+    def trad2sim(self, text):
+        """繁简转换，失败时保留原文"""
+        if not isinstance(text, str):
+            return text
+        try:
+            if not self.stats.enabled:
+                return convert(text, 'zh-cn')
+            with self.stats.stage('convert'):
+                return convert(text, 'zh-cn')
+        except Exception as e:
+            print(f"Trans Error :{e}, {text}")
+            return text
+
+    @cached_property
+    def lst(self) -> dict:
+        """n_string.lst，*.str 文件列表"""
+        return self.load_lst()
+
+    def preload(self):
+        """立即加载全部延迟属性，用于需要在后台提前准备好实例的场景"""
+        return self.headers, self.bst, self.lst
 
     def read_bytes(self, start, length):
-        """截取指定位置指定长度读取"""
-        if self.fp is None:
-            self.fp = open(self.pvf_path, 'rb')
-        self.fp.seek(start)
-        return self.fp.read(length)
+        """
+        截取指定位置指定长度读取，可被多个线程同时调用。
+        有 os.pread 的平台按偏移读取，不移动共享的文件指针；否则（Windows）每个线程使用自己的句柄。
+        """
+        if hasattr(os, 'pread'):
+            chunks = []
+            while length > 0:
+                chunk = os.pread(self.fp.fileno(), length, start)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                start += len(chunk)
+                length -= len(chunk)
+            return b''.join(chunks)
+        fp = getattr(self._local, 'fp', None)
+        if fp is None:
+            fp = self._local.fp = open(self.pvf_path, 'rb')
+            with self._read_lock:
+                self._handles.append(fp)
+        fp.seek(start)
+        return fp.read(length)
+
+    @staticmethod
+    def plan_reads(leaves, window=READAHEAD_BYTES, gap=READ_GAP_BYTES) -> list:
+        """
+        leaves 为 [(键, 叶子)]，按偏移排序后把相邻的文件合并为若干次连续读取，返回 [(起始偏移, 长度, [(键, 叶子)])]。
+        文件之间相隔不超过 gap 字节时连同空隙一起读取；合并后的长度不超过 window，超过 window 的单个文件单独读取。
+        """
+        ranges = []
+        for key, leaf in sorted(leaves, key=lambda x: x[1]['offset']):
+            start, end = leaf['offset'], leaf['offset'] + leaf['file_len']
+            if ranges:
+                first, length, members = ranges[-1]
+                if start - (first + length) <= gap and end - first <= window:
+                    ranges[-1] = (first, max(length, end - first), members)
+                    members.append((key, leaf))
+                    continue
+            ranges.append((start, end - start, [(key, leaf)]))
+        return ranges
+
+    def read_many(self, paths, window=READAHEAD_BYTES, gap=READ_GAP_BYTES):
+        """
+        批量读取并解密，按文件在 pvf 中的偏移顺序合并为大块顺序读取，逐个产出 (键, 明文)。
+        paths 为路径的可迭代对象时键为路径；为 {调用方id: 路径} 时键为 id，多个 id 指向同一文件只读取一次。
+        产出顺序为偏移顺序而非传入顺序；overlay 中的文件最先产出，不存在（或已在 overlay 中删除）的文件打印错误后跳过。
+        """
+        if not isinstance(paths, dict):
+            paths = {path: path for path in paths}
+        owners = {}
+        for key, path in paths.items():
+            owners.setdefault(path.lower().replace('\\', '/').lstrip("/"), []).append(key)
+        leaves = []
+        for filepath, keys in owners.items():
+            if not self.exists(filepath):
+                print(f"Error :file not found, {filepath}")
+                continue
+            data = self.overlay.get(filepath) if self.overlay is not None else None
+            _leaf = self.headers.get(filepath)
+            if data is not None:
+                for key in keys:
+                    yield key, data
+                continue
+            leaves.append((filepath, _leaf))
+        for start, length, members in self.plan_reads(leaves, window, gap):
+            with self.stats.stage('read', length):
+                chunk = self.read_bytes(self.pack_offset + start, length)
+            self.stats.count('read_many.ranges')
+            for filepath, _leaf in members:
+                offset = _leaf['offset'] - start
+                with self.stats.stage('decrypt', _leaf['file_len']):
+                    cont = self.decrypt(chunk[offset:offset + _leaf['file_len']], _leaf['crc32'])
+                for key in owners[filepath]:
+                    yield key, cont
 
     def init_headers(self):
         """
         结构化 header 为字典对象。
         """
-        header_bytes = self.fp.read(self.dir_nodes_len)
-        unpacked_header_nodes = self.decrypt(header_bytes, self.dir_nodes_crc32)
+        header_bytes = self.read_bytes(self.header_len, self.dir_nodes_len)
+        with self.stats.stage('header_decrypt', len(header_bytes)):
+            unpacked_header_nodes = self.decrypt(header_bytes, self.dir_nodes_crc32)
         treemap = dict()
 
         def get_header_bytes(offset=4):
@@ -97,6 +230,8 @@ class TinyPVF(object):
                 'fp': fp_bytes.decode(errors='replace').lower(),  # 全部转换为小写
                 # 'file_len_bytes': file_len_bytes,
                 'file_len': (struct.unpack('I', file_len_bytes)[0] + 3) & 0xFFFFFFFC,
+                # 未补齐的实际长度，重新打包时需要原样写回
+                'real_len': struct.unpack('I', file_len_bytes)[0],
                 # 'crc32_bytes': crc32_bytes,
                 'crc32': struct.unpack('I', crc32_bytes)[0],
                 'offset': struct.unpack('I', offset_bytes)[0],
@@ -105,20 +240,45 @@ class TinyPVF(object):
             treemap[_leaf['fp']] = _leaf  # 存到路径：文件字典
         return treemap
 
+    @property
+    def path_index(self) -> PathIndex:
+        """目录索引，首次使用时由 headers 构建"""
+        if self._path_index is None:
+            self._path_index = PathIndex(self.headers)
+        return self._path_index
+
+    def listdir(self, directory: str = '') -> dict:
+        """列出目录的直接子目录（含文件数、大小）与文件"""
+        return self.path_index.listdir(directory)
+
+    def glob(self, pattern: str) -> list:
+        """按通配符匹配文件路径，如 *.stk"""
+        return self.path_index.glob(pattern)
+
     def parse_bytestream(self, filepath):
         """根据传入路径初步解析字节流"""
         filepath = filepath.lower().replace('\\', '/').lstrip("/")
+        if self.overlay is not None:
+            data = self.overlay.get(filepath)
+            if data is not None:
+                return data
         _leaf = self.headers.get(filepath)
         try:
-            bytestream = self.read_bytes(self.pack_offset + _leaf['offset'], _leaf['file_len'])
-            cont = self.decrypt(bytestream, _leaf['crc32'])
+            with self.stats.stage('read', _leaf['file_len']):
+                bytestream = self.read_bytes(self.pack_offset + _leaf['offset'], _leaf['file_len'])
+            with self.stats.stage('decrypt', _leaf['file_len']):
+                cont = self.decrypt(bytestream, _leaf['crc32'])
         except Exception as e:
             print(f"Error :{e}, {filepath}, {_leaf}")
             return b""
         return cont
 
-    def load_bst(self, bst_path: str = 'stringtable.bin', encoding=None) -> list:
-        """解析stringtable.bin文件类，将其解析为 list[str]"""
+    @pvf_stats.timed('load_bst')
+    def load_bst(self, bst_path: str = 'stringtable.bin', encoding=None, raw=False) -> list:
+        """
+        解析stringtable.bin文件类，将其解析为 list[str]。
+        raw 为真时不做繁简转换，无法解码的字节以 surrogateescape 保留，可原样编码回去。
+        """
         encoding = self.encoding if encoding is None else encoding
         bytestream = self.parse_bytestream(bst_path)
         # 前4位是 该组数据包含的字符串数/2
@@ -127,6 +287,9 @@ class TinyPVF(object):
         _bsts = []
         for _i in range(bsts_len):
             _shape = struct.unpack('<II', bytestream[_i * 4: _i * 4 + 8])
+            if raw:
+                _bsts.append(bytestream[_shape[0]: _shape[1]].decode(encoding, 'surrogateescape'))
+                continue
             _chunk = bytestream[_shape[0]: _shape[1]].decode(encoding, 'ignore')
             _bsts.append(convert(_chunk, 'zh-cn'))
         return _bsts
@@ -140,9 +303,19 @@ class TinyPVF(object):
         tmap = dict()
         for line in lines:
             _key, _value = line.split('>', 1)
+            _value = _value.rstrip('\r')
             tmap[_key] = _value if _value else "None"
         return tmap
 
+    def load_stt_cached(self, stt_path: str) -> dict:
+        """带缓存的 load_stt，*.str 被大量脚本文件通过 0x09 字段重复引用"""
+        tmap = self._stt_cache.get(stt_path)
+        self.stats.count('stt_cache.hit' if tmap is not None else 'stt_cache.miss')
+        if tmap is None:
+            # 多线程同时未命中时以先写入的为准
+            tmap = self._stt_cache.setdefault(stt_path, self.load_stt(stt_path) if stt_path else {})
+        return tmap
+
     def load_lst(self, lst_path: str = 'n_string.lst', encoding=None) -> dict:
         """"用于解析处理*.lst文件对象 {}"""
         encoding = self.encoding if encoding is None else encoding
@@ -157,13 +330,62 @@ class TinyPVF(object):
             i += 10
         return tablemap
 
-    def decrypt_bin2slist(self, _lst_path: str, quote=None):
-        """用于解析非lst二进制文本（如stk文件）解密入口，解密结果为 字段类型和关键字 组成的List"""
+    def exists(self, filepath: str) -> bool:
+        """文件是否存在（计入 overlay 中的新增与删除）"""
+        return self.cache_key('', filepath)[2] not in (None, -1)
+
+    def cache_key(self, kind: str, filepath: str, *extra):
+        """缓存键带上文件 crc，文件内容变化后旧条目不会被命中"""
+        filepath = filepath.lower().replace('\\', '/').lstrip("/")
+        crc = self.overlay.crc(filepath) if self.overlay is not None else None
+        if crc is None:
+            leaf = self.headers.get(filepath)
+            crc = None if leaf is None else leaf['crc32']
+        return (kind, filepath, crc) + extra
+
+    def decrypt_bin2slist(self, _lst_path: str, quote=None, lazy=False):
+        """
+        用于解析非lst二进制文本（如stk文件）解密入口，解密结果为 字段类型和关键字 组成的List，结果经过缓存。
+        lazy 为真时类型6、7、8的值为 StrRef，见 interning.py
+        """
         quote = '' if quote is None else quote
-        bytestream = self.parse_bytestream(_lst_path)
+        if not self.exists(_lst_path):
+            # 不存在的文件不写入缓存
+            return self.decode_units(_lst_path, quote, lazy)
+        units = self.cache.get(self.cache_key('units', _lst_path, quote, lazy),
+                               lambda key: tuple(self.decode_units(_lst_path, quote, lazy)))
+        return list(units)
+
+    def load_tree(self, filepath: str, lazy=False, shared=False) -> dict:
+        """
+        读取并构建文件树，结果经过缓存。缺省返回副本，调用方可以随意修改；
+        shared 为真时返回缓存中的树本身，省去复制，仅供只读的调用方使用（如 server、viewer），不得修改。
+        不存在的文件返回空树，不写入缓存。
+        """
+        if not self.exists(filepath):
+            return self.build_tree(self.decode_units(filepath, '', lazy))
+        tree = self.cache.get(self.cache_key('tree', filepath, lazy),
+                              lambda key: self.build_tree(self.decode_units(filepath, '', lazy)))
+        return tree if shared else self.copy_tree(tree)
+
+    def load_tree_bytes(self, filepath: str, bytestream: bytes, lazy=False) -> dict:
+        """明文已由调用方（如 read_many）读取，结果写入 load_tree 的同一缓存，返回缓存中的共享树，调用方不得修改"""
+        return self.cache.get(self.cache_key('tree', filepath, lazy),
+                              lambda key: self.build_tree(self.decode_bytes(bytestream, '', lazy)))
+
+    def decode_units(self, _lst_path: str, quote='', lazy=False):
+        """不经缓存的单元解析"""
+        return self.decode_bytes(self.parse_bytestream(_lst_path), quote, lazy)
+
+    def decode_bytes(self, bytestream: bytes, quote='', lazy=False):
+        """
+        解析已解密的脚本字节流，供已自行读取文件内容的调用方使用。
+        字符串经 self.interned 驻留，同一索引在所有文件中共享一个对象；lazy 为真时类型6、7、8保存为 StrRef
+        """
         if bytestream is None:
             return [[], []]
         # 文件解析
+        _start = perf_counter() if self.stats.enabled else None
         unit_len = (len(bytestream) - 2) // 5
         _shift = 2
         _spats = '<'
@@ -179,35 +401,31 @@ class TinyPVF(object):
         unit_values = units[1::2]
         units = []
 
-        def trad2sim(x):
-            if not isinstance(x, str):
-                return x
-            try:
-                x = convert(x, 'zh-cn')
-            except Exception as e:
-                print(f"Trans Error :{e}, {x}")
-            return x
-
+        pool = self.interned
         # 不用字典的原因：unit_type可能重复
         for i in range(unit_len):
             unit_type = unit_types[i]
             if unit_type in (2, 3, 4):
-                unit_value = trad2sim(unit_values[i])
-                units.append((unit_type, unit_value))
-            elif unit_type in (5, 6, 8):
-                unit_value = trad2sim(self.bst[unit_values[i]])
+                units.append((unit_type, unit_values[i]))
+            elif unit_type == 5:
+                units.append((unit_type, pool.get(unit_values[i])))
+            elif unit_type in (6, 7, 8):
+                _quote = quote if unit_type == 7 else ''
+                unit_value = pool.ref(unit_values[i], _quote) if lazy else pool.get(unit_values[i], _quote)
                 units.append((unit_type, unit_value))
-            elif unit_type in (7,):
-                unit_value = quote + self.bst[unit_values[i]] + quote
-                units.append((unit_type, trad2sim(unit_value)))
             elif unit_type in (9,):
-                unit_value = self.lst.get(unit_values[i])[self.bst[unit_values[i + 1]]]
-                units.append((unit_type, trad2sim(unit_value)))
+                lst_id, key_index = unit_values[i], unit_values[i + 1]
+                unit_value = pool.lookup((9, lst_id, key_index), lambda: self.trad2sim(
+                    self.load_stt_cached(self.lst.get(lst_id)).get(self.bst[key_index], "None")))
+                units.append((unit_type, unit_value))
             else:
                 continue
+        if _start is not None:
+            self.stats.record('unit_decode', perf_counter() - _start, len(bytestream))
         return units
 
     @staticmethod
+    @pvf_stats.timed('build_tree')
     def build_tree(struct_list: list):
         _tree = {}  # 用于存储最终的树结构
         _stack = []  # 用于存储当前节点的层级路径
@@ -248,6 +466,13 @@ class TinyPVF(object):
                 _stack.append(child_node)
         return _tree
 
+    @staticmethod
+    def copy_tree(tree: dict) -> dict:
+        """复制 build_tree 的结果，节点只有 key、value、children，值均不可变，比 copy.deepcopy 快得多"""
+        def copy_node(node):
+            return {"key": node["key"], "value": node["value"], "children": [copy_node(child) for child in node["children"]]}
+        return {key: copy_node(node) for key, node in tree.items()}
+
     @staticmethod
     def slist2dict5(units: list, parent_key=None):
         """
@@ -280,20 +505,12 @@ class TinyPVF(object):
     @staticmethod
     def decrypt(stream: bytes, crc):
         """
-        对原始字节流进行 预处理
+        对原始字节流进行 预处理：每个32位字与密钥异或后循环右移6位。
+        使用 numpy 按 uint32 数组计算，运算期间释放 GIL，多线程读取时解密与 I/O 可以重叠。
         """
-        xor = crc ^ 0x81A79011
-        int_num = len(stream) // 4
-        key_all = xor.to_bytes(4, 'little') * int_num
-        value_xor = int.from_bytes(key_all, 'little') ^ int.from_bytes(stream, 'little')
-        _a = 0b00000000_00000000_00000000_00111111
-        _b = 0b11111111_11111111_11111111_11000000
-        tma = int.from_bytes(_a.to_bytes(4, 'little') * int_num, 'little')
-        tmb = int.from_bytes(_b.to_bytes(4, 'little') * int_num, 'little')
-        v1 = value_xor & tma
-        v2 = value_xor & tmb
-        tv = v1 << 26 | v2 >> 6
-        return tv.to_bytes(4 * int_num, 'little')
+        import numpy as np
+        words = np.frombuffer(stream, dtype='<u4', count=len(stream) // 4) ^ np.uint32(crc ^ 0x81A79011)
+        return ((words << np.uint32(26)) | (words >> np.uint32(6))).tobytes()
 
     def __repr__(self):
         return "PVF [{0}]\nVer:{1}\nTreeLength:{2}\n{3} files".format(
@@ -302,6 +519,8 @@ class TinyPVF(object):
 
     def __del__(self):
         self.fp.close()
+        for fp in getattr(self, '_handles', []):
+            fp.close()
 
     __str__ = __repr__
 
@@ -309,15 +528,28 @@ class TinyPVF(object):
 class PVFApi(object):
     """基于pvf封装的一系列接口，一旦成功实例化，会创建一系列缓存，可用于快速读取需要的数据。"""
 
-    def __init__(self, pvf_path, encoding="big5"):
+    def __init__(self, pvf_path, encoding="big5", workers=None, cache_bytes=DEFAULT_CACHE_BYTES):
         self.path = pvf_path
+        self.encoding = encoding
+        self.workers = workers
+        self.cache_bytes = cache_bytes
+        self.stats = pvf_stats
         self.pvf = None
         self.headers =None
+        self.equipment_classifier = None
+        self.progression = None
 
     def load_pvf(self):
-        self.pvf = TinyPVF(pvf_path=pfv_file)
-        self.pvf.headers = self.pvf.init_headers()
-        self.headers = None
+        self.pvf = TinyPVF(pvf_path=self.path, encoding=self.encoding, cache_bytes=self.cache_bytes)
+        self.headers = self.pvf.headers
+
+    def load_all(self, specs=None, workers=None):
+        """
+        一次性并行加载任务、副本、技能（见 scheduler.LOADERS），
+        返回 {"tasks": ..., "instances": ..., "skills": ...}，结构与各 get_* 接口一致。
+        """
+        workers = self.workers if workers is None else workers
+        return BulkScheduler(self.pvf, workers).run(specs)
 
     def get_magic_steal(self, file_path):
         # ='etc/randomoption/randomizedoptionoverall2.etc'
@@ -360,12 +592,18 @@ class PVFApi(object):
         exps = [unit[1] for unit in units if isinstance(unit[1], int)]
         return exps
 
+    def get_progression(self, cache=None):
+        """经验表与职业、成长类型的数组形式，见 progression.py，首次调用后保留在实例上"""
+        if self.progression is None:
+            from pkgkits.progression import Progression
+            self.progression = Progression.open(self, cache)
+        return self.progression
+
     def get_equipments(self, file_path='equipment/equipment.lst'):
-        equipment_detail_map = {}
         equipments = self.pvf.load_lst(file_path)
-        for _id, path in equipments.items():
-            units = self.pvf.decrypt_bin2slist(path)
-            equipment_detail_map[_id] = self.pvf.build_tree(units)
+        trees = BulkScheduler(self.pvf, self.workers).load_trees(equipments.values())
+        # 缓存中的树被共享，每个 id 返回独立的副本
+        equipment_detail_map = {_id: self.pvf.copy_tree(trees[path]) for _id, path in equipments.items()}
         return equipment_detail_map
 
 
@@ -374,9 +612,9 @@ class PVFApi(object):
         supply_map = {}
         supply_detail_map = {}
         supplies = self.pvf.load_lst(file_path)
+        trees = BulkScheduler(self.pvf, self.workers).load_trees(supplies.values())
         for _id, _path in supplies.items():
-            units = self.pvf.decrypt_bin2slist(_path)
-            supply_detail_map[_id] = self.pvf.build_tree(units)
+            supply_detail_map[_id] = self.pvf.copy_tree(trees[_path])
             names = [str(name["value"]) for name in supply_detail_map[_id].get('[name]')["children"]]
             if names is not None:
                 supply_map[_id] = ''.join(names)
@@ -386,12 +624,7 @@ class PVFApi(object):
 
     def get_instances(self, file_path='dungeon/dungeon.lst'):
         """解析副本介绍等信息"""
-        instance_map = {}
-        instances = self.pvf.load_lst(file_path)
-        for _id, _path in instances.items():
-            units = self.pvf.decrypt_bin2slist(_path)
-            instance_map[_id] = self.pvf.build_tree(units)
-        return instance_map
+        return self.load_all({'instances': (file_path, 1)})['instances']
 
     def get_avatar_roulette(self, file_path='etc/avatar_roulette/avatarfixedhiddenoptionlist.etc'):
         """解析时装潜力"""
@@ -421,25 +654,10 @@ class PVFApi(object):
         return uppers, rares
 
     def get_tasks(self, file_path = 'n_quest/quest.lst'):
-        task_map = {}
-        tasks = self.pvf.load_lst(file_path)
-        for _id, _path in tasks.items():
-            units = self.pvf.decrypt_bin2slist(_path)
-            task_map[_id] = self.pvf.build_tree(units)
-        return task_map
+        return self.load_all({'tasks': (file_path, 1)})['tasks']
 
     def get_skills(self, file_path = 'n_quest/skills.lst'):
-        skill_map = {}
-        skills = self.pvf.load_lst(file_path)
-        for _id, lsp_path in skills.items():
-            job_name = lsp_path.replace('skill', '').strip('/').split('.')[0]
-            temp_skill_map = {}
-            temp_skills = self.pvf.load_lst(lsp_path)
-            for skid, skpath in temp_skills.items():
-                units = self.pvf.decrypt_bin2slist(skpath)
-                temp_skill_map[skid] = {"detail": self.pvf.build_tree(units), "path": skpath}
-            skill_map[_id] = {"job_name": job_name, "path": lsp_path, "skills": temp_skill_map}
-        return skill_map
+        return self.load_all({'skills': (file_path, 2)})['skills']
 
     def get_skill_shop_tree(self, file_path='clientonly/skillshoptreespindex.co'):
         skill_map = {}
@@ -454,67 +672,14 @@ class PVFApi(object):
                 skill_map[name] = f"clientonly/{unit[1]}".lower()
         return skill_map
 
+    @pvf_stats.timed('parse')
     def parse_equipments(self, equipment_detail_map):
-        clean = lambda x: ''.join([i.strip() for i in x.split('\n')]).replace("%%", "%")
-        cget = lambda x, y, d=-1: y.get(x, {"children": [{"value": d}]})["children"][0]["value"]
-        equips = []
-        for key, value in equipment_detail_map.items():
-            eid = key
-            name = cget("[name]", value)
-            grade = cget("[grade]", value, 0)
-            rarity = rarity_map[cget("[rarity]", value, -1)]
-            trade = trade_map[cget("[attach type]", value, '[trade]')]
-            job_usable = [child["value"] for child in value.get("[usable job]", {"children": []})["children"]]
-            job_usable = ['[all]'] if len(job_usable) == 0 else job_usable
-            require_job = ','.join([job_map[job] for job in job_usable])
-            equip_type = cget("[equipment type]", value, '[artifact]').strip('[').strip(']').strip()
-            equipment_type = equip_map[equip_type]
-            if equipment_type in ['武器', "头肩", "腰带", "上衣", '下装', "鞋"]:
-                subtype = cget("[sub type]", value, -1)
-                # 计算-细分类别【type1, type2, type3】
-                if equipment_type == "武器":
-                    equipment_type_map = equipment_map["武器"]
-                    if "鬼剑士" in require_job:
-                        _equipment_type = "鬼剑士"
-                    elif "魔法师" in require_job:
-                        _equipment_type = "魔法师"
-                    elif "格斗家" in require_job:
-                        _equipment_type = "格斗家"
-                    elif "神枪手" in require_job:
-                        _equipment_type = "神枪手"
-                    else:
-                        _equipment_type = require_job
-                    type2 = equipment_type_map[_equipment_type].get(subtype, "全部")
-                else:
-                    equipment_type_map = equipment_map["防具"]
-                    type2 = equipment_type_map.get(subtype, "全部")
-            elif equipment_type in ['项链', '手镯', '戒指']:
-                type2 = equipment_type
-                equipment_type = "首饰"
-            elif equipment_type in ['辅助装备', '魔法石', '称号']:
-                type2 = equipment_type
-                equipment_type = "特殊装备"
-            elif equipment_type in ["未知", "绿色", "蓝色", "红色"]:
-                type2 = equipment_type
-                equipment_type = "宠物装备"
-            else:
-                type2 = equipment_type
-                equipment_type = "时装"
-            desc = clean(cget("[explain]", value, ''))
-            equips.append(dict(
-                eid=eid,
-                name=name,
-                grade=grade,
-                rarity=rarity,
-                trade=trade,
-                require_job=require_job,
-                type1=equipment_type,
-                type2=type2,
-                desc=desc
-            ))
-        return equips
-
+        """装备分类见 classify.py，未能映射的标签见 self.equipment_classifier.report()"""
+        from pkgkits.classify import EquipmentClassifier
+        self.equipment_classifier = EquipmentClassifier()
+        return self.equipment_classifier.records(equipment_detail_map)
 
+    @pvf_stats.timed('parse')
     def parse_supplies(self, supply_detail_map):
 
         clean = lambda x: ''.join([i.strip() for i in x.split('\n')]).replace("%%", "%")
@@ -543,6 +708,7 @@ class PVFApi(object):
                 attach_type=attach_type,
                 explain=explain
             ))
+        return stackables
 
 
 def save_tojson(path, obj):
@@ -0,0 +1,16 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: __main__.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   18:52
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: python -m pkgkits 入口，见 cli.py。
+"""
+import sys
+from pkgkits.cli import main
+
+sys.exit(main())
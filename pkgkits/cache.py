@@ -0,0 +1,114 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: cache.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   17:48
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 按内存字节数限制的线程安全 LRU，用于缓存解码后的单元列表与文件树。
+"""
+import sys
+import threading
+from collections import OrderedDict
+from pkgkits.profiler import pvf_stats
+
+# TinyPVF 默认的缓存上限
+DEFAULT_CACHE_BYTES = 64 << 20
+
+
+def sizeof(obj) -> int:
+    """估算对象及其包含的 list/tuple/dict/str 等占用的字节数，共享对象会被重复计入，结果偏大"""
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+    return size
+
+
+class SizedLRU(object):
+    """
+    按估算字节数淘汰的 LRU。
+    加载函数在锁外执行，并发访问同一个未命中的键时可能重复加载，但结果一致，不影响正确性。
+    命中情况同时计入 pvf_stats 的 "<name>.hit" / "<name>.miss" 计数。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, name='cache'):
+        self.max_bytes = max_bytes
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, loader=None):
+        """命中时返回缓存值；未命中时调用 loader(key) 加载并写入，loader 为空则返回 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            pvf_stats.count(f'{self.name}.hit')
+            return entry[0]
+        with self._lock:
+            self.misses += 1
+        pvf_stats.count(f'{self.name}.miss')
+        if loader is None:
+            return None
+        value = loader(key)
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """写入缓存，单个值超过总上限时不缓存"""
+        if self.max_bytes <= 0:
+            return
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def invalidate(self, match=None):
+        """删除 match(key) 为真的条目，match 为空时清空"""
+        with self._lock:
+            if match is None:
+                self._data.clear()
+                self.bytes = 0
+                return
+            for key in [key for key in self._data if match(key)]:
+                self.bytes -= self._data.pop(key)[1]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,213 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: classify.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   01:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 查表式装备分类，取代 main.py 与 PVFApi 中重复的 parse_equipments。
+"""
+from collections import Counter
+import numpy as np
+from pkgkits.utils import rarity_map, trade_map, equip_map, job_map, equipment_map
+
+"""
+原先每件装备走一遍 if/elif，把职业名拼成字符串后用 "鬼剑士" in require_job 之类的子串判断武器所属职业，
+遇到 utils 中没有的标签直接 KeyError。这里把 utils 中的映射在构造时编译为查找表：
+type    装备类型标签 -> 类型编号，类型编号 -> (大类, 小类, 细分方式)，细分方式为 武器 / 防具 / 无
+job     职业标签 -> 位，一件装备的可用职业为位掩码；武器所属职业由掩码决定，规则与原先的子串判断一致：
+        依次检查 鬼剑士、魔法师、格斗家、神枪手（名称包含该词的职业都算，如 女鬼剑士、男魔法师），
+        都不是时只有单一职业才能对应到武器表
+sub     [sub type] 整数 -> 查找表的列，武器表按 (职业, 列)，防具表按列，表外的值为 "全部"
+一批装备先抽取为列（类型编号、职业掩码、子类型），分类只是几次数组下标运算，按唯一掩码计算武器职业。
+没有对应的标签归入 FALLBACK，并计入 unmapped，供补充 utils 中的映射。
+"""
+
+FALLBACK = '其它'
+# 武器所属职业的判断顺序，与原先的子串判断一致
+WEAPON_JOB_ORDER = ('鬼剑士', '魔法师', '格斗家', '神枪手')
+# 大类 -> 归入该大类的装备类型（小类即类型本身）
+GROUPS = {
+    '首饰': ('项链', '手镯', '戒指'),
+    '特殊装备': ('辅助装备', '魔法石', '称号'),
+    '宠物装备': ('未知', '绿色', '蓝色', '红色'),
+}
+ARMORS = ('头肩', '腰带', '上衣', '下装', '鞋')
+AVATAR = '时装'
+KIND_NONE, KIND_WEAPON, KIND_ARMOR = 0, 1, 2
+
+
+def cget(key, tree, default=-1):
+    node = tree.get(key)
+    return default if node is None else node["children"][0]["value"]
+
+
+def clean(text):
+    return ''.join([i.strip() for i in str(text).split('\n')]).replace("%%", "%")
+
+
+class EquipmentClassifier(object):
+    """由 utils 中的映射构建查找表，实例可以重复用于多批装备，unmapped 跨批累计"""
+
+    def __init__(self):
+        self.labels = [FALLBACK]
+        self._label_codes = {FALLBACK: 0}
+        self.unmapped = {name: Counter() for name in
+                         ('equipment type', 'usable job', 'weapon job', 'sub type', 'rarity', 'attach type')}
+
+        # 类型标签 -> 编号，编号 len(types) 为未知类型
+        self.types = {tag: i for i, tag in enumerate(equip_map)}
+        count = len(self.types) + 1
+        self.type1 = np.zeros(count, dtype=np.int16)
+        self.type2 = np.zeros(count, dtype=np.int16)
+        self.kind = np.zeros(count, dtype=np.int8)
+        groups = {name: group for group, names in GROUPS.items() for name in names}
+        for tag, i in self.types.items():
+            name = equip_map[tag]
+            if name == '武器' or name in ARMORS:
+                self.type1[i] = self.label(name)
+                self.kind[i] = KIND_WEAPON if name == '武器' else KIND_ARMOR
+            else:
+                self.type1[i] = self.label(groups.get(name, AVATAR))
+                self.type2[i] = self.label(name)
+
+        # 职业标签 -> 位，以及每个武器职业对应的位
+        self.jobs = {tag: 1 << i for i, tag in enumerate(job_map)}
+        weapons = equipment_map['武器']
+        self.weapon_jobs = list(weapons)
+        self.order_bits = [sum(bit for tag, bit in self.jobs.items() if name in job_map[tag])
+                           for name in WEAPON_JOB_ORDER]
+        self.single_jobs = {bit: self.weapon_jobs.index(job_map[tag])
+                            for tag, bit in self.jobs.items() if job_map[tag] in weapons}
+
+        # 子类型表，列 = 子类型 - sub_min，最后一列为表外的值
+        subtypes = [sub for table in list(weapons.values()) + [equipment_map['防具']] for sub in table]
+        self.sub_min = min(subtypes + [-1])
+        width = max(subtypes + [-1]) - self.sub_min + 2
+        self.everything = self.label('全部')
+        self.weapon = np.full((len(self.weapon_jobs) + 1, width), self.everything, dtype=np.int16)
+        for row, name in enumerate(self.weapon_jobs):
+            for sub, value in weapons[name].items():
+                self.weapon[row, sub - self.sub_min] = self.label(value)
+        self.armor = np.full(width, self.everything, dtype=np.int16)
+        for sub, value in equipment_map['防具'].items():
+            self.armor[sub - self.sub_min] = self.label(value)
+        self._require_jobs = {}
+
+    def label(self, text) -> int:
+        code = self._label_codes.get(text)
+        if code is None:
+            code = self._label_codes[text] = len(self.labels)
+            self.labels.append(text)
+        return code
+
+    def require_job(self, tags: tuple):
+        """(职业名拼接, 掩码)，按标签组合缓存"""
+        cached = self._require_jobs.get(tags)
+        if cached is None:
+            names, mask = [], 0
+            for tag in tags:
+                if tag in self.jobs:
+                    names.append(job_map[tag])
+                    mask |= self.jobs[tag]
+                else:
+                    names.append(tag)
+                    self.unmapped['usable job'][tag] += 1
+            cached = self._require_jobs[tags] = (','.join(names), mask)
+        return cached
+
+    def columns(self, equipment_detail_map) -> dict:
+        """抽取分类需要的列，数值列（eid、type、mask、subtype）为 numpy 数组，文本列为 list"""
+        cols = {name: [] for name in ('eid', 'type', 'mask', 'subtype', 'name', 'grade', 'rarity', 'trade',
+                                      'require_job', 'desc')}
+        unknown_type = len(self.types)
+        for key, value in equipment_detail_map.items():
+            cols['eid'].append(key)
+            tag = str(cget("[equipment type]", value, '[artifact]')).strip('[').strip(']').strip()
+            type_code = self.types.get(tag, unknown_type)
+            if type_code == unknown_type:
+                self.unmapped['equipment type'][tag] += 1
+            cols['type'].append(type_code)
+            jobs = value.get("[usable job]")
+            tags = tuple(str(child["value"]) for child in jobs["children"]) if jobs is not None else ()
+            require_job, mask = self.require_job(tags or ('[all]',))
+            cols['mask'].append(mask)
+            subtype = cget("[sub type]", value, -1)
+            cols['subtype'].append(subtype if isinstance(subtype, int) else -1)
+
+            rarity = cget("[rarity]", value, -1)
+            if rarity not in rarity_map:
+                self.unmapped['rarity'][rarity] += 1
+            trade = cget("[attach type]", value, '[trade]')
+            if trade not in trade_map:
+                self.unmapped['attach type'][str(trade)] += 1
+            cols['name'].append(cget("[name]", value))
+            cols['grade'].append(cget("[grade]", value, 0))
+            cols['rarity'].append(rarity_map.get(rarity, rarity_map[-1]))
+            cols['trade'].append(trade_map.get(trade, FALLBACK))
+            cols['require_job'].append(require_job)
+            cols['desc'].append(clean(cget("[explain]", value, '')))
+        for name, dtype in (('eid', np.int64), ('type', np.int16), ('mask', np.int64), ('subtype', np.int64)):
+            cols[name] = np.array(cols[name], dtype=dtype)
+        return cols
+
+    def weapon_rows(self, masks: np.ndarray) -> np.ndarray:
+        """职业掩码 -> 武器表的行，无法确定职业的为最后一行（全部 "全部"）"""
+        unique, inverse = np.unique(masks, return_inverse=True)
+        rows = np.full(len(unique), len(self.weapon_jobs), dtype=np.int64)
+        single = np.array([self.single_jobs.get(mask, len(self.weapon_jobs)) for mask in unique.tolist()], dtype=np.int64)
+        rows = np.where((unique & (unique - 1)) == 0, single, rows)
+        # 逆序覆盖，排在前面的职业优先
+        for name, bits in reversed(list(zip(WEAPON_JOB_ORDER, self.order_bits))):
+            rows = np.where(unique & bits, self.weapon_jobs.index(name), rows)
+        return rows[inverse]
+
+    def classify(self, types, masks, subtypes):
+        """返回 (大类编号, 小类编号)，编号对应 self.labels"""
+        types = np.asarray(types)
+        subs = np.asarray(subtypes) - self.sub_min
+        width = self.armor.shape[0]
+        subs = np.where((subs >= 0) & (subs < width - 1), subs, width - 1)
+        kind = self.kind[types]
+        type2 = self.type2[types].copy()
+        weapons = np.flatnonzero(kind == KIND_WEAPON)
+        if len(weapons):
+            rows = self.weapon_rows(np.asarray(masks)[weapons])
+            type2[weapons] = self.weapon[rows, subs[weapons]]
+            self.report_weapons(rows, np.asarray(masks)[weapons])
+        armors = kind == KIND_ARMOR
+        type2[armors] = self.armor[subs[armors]]
+        self.report_subtypes(kind, types, np.asarray(subtypes), type2 == self.everything)
+        return self.type1[types], type2
+
+    def report_weapons(self, rows, masks):
+        for mask in np.unique(masks[rows == len(self.weapon_jobs)]).tolist():
+            names = ','.join(job_map[tag] for tag, bit in self.jobs.items() if mask & bit)
+            self.unmapped['weapon job'][names] += int(np.count_nonzero(masks == mask))
+
+    def report_subtypes(self, kind, types, subtypes, everything):
+        """查表落到 "全部" 的子类型（-1 表示未填写，不计入）"""
+        missing = everything & (kind != KIND_NONE) & (subtypes != -1)
+        tags = list(self.types)
+        for type_code, sub in zip(types[missing].tolist(), subtypes[missing].tolist()):
+            self.unmapped['sub type'][(tags[type_code], sub)] += 1
+
+    def records(self, equipment_detail_map) -> list:
+        """与原 parse_equipments 相同的 [dict]"""
+        cols = self.columns(equipment_detail_map)
+        type1, type2 = self.classify(cols['type'], cols['mask'], cols['subtype'])
+        labels = np.array(self.labels, dtype=object)
+        cols.update(eid=cols['eid'].tolist(), type1=labels[type1].tolist(), type2=labels[type2].tolist())
+        fields = ('eid', 'name', 'grade', 'rarity', 'trade', 'require_job', 'type1', 'type2', 'desc')
+        return [dict(zip(fields, row)) for row in zip(*(cols[field] for field in fields))]
+
+    def report(self) -> dict:
+        """未能映射的值及出现次数"""
+        return {name: dict(counter.most_common()) for name, counter in self.unmapped.items() if counter}
+
+
+def parse_equipments(equipment_detail_map) -> list:
+    return EquipmentClassifier().records(equipment_detail_map)
@@ -0,0 +1,393 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: cli.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   18:52
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: pvf 命令行工具。
+
+用法：
+    python -m pkgkits [--encoding big5] [--workers N] [--cache-dir DIR] <命令> ...
+
+    info    PVF                               头部信息与文件统计
+    ls      PVF [目录]                         列出目录
+    glob    PVF 通配符                          按通配符匹配文件
+    cat     PVF 路径 [--units | --raw]          输出文件的树结构（json）、原始单元或解密后的字节
+    extract PVF [通配符 ...] -o 目录 [--format raw|text|json] [--force]  多进程批量导出，按清单跳过未变化的文件
+    pack    目录 -o PVF [--source PVF] [--partial]  将 extract 导出的目录重新打包，只编码改动过的文件
+    export  PVF 目录名 [-o 文件] [--format json|csv|xlsx]   导出装备、道具等目录
+    diff    旧PVF 新PVF                         列出新增、删除与变化的文件
+    verify  PVF [--crc]                        检查文件区间、lst 引用与脚本解码
+    refs    PVF (--item ID | --string 索引 | --key 编号:键 | --file 路径)   反查引用方，索引随 --cache-dir 持久化
+    strings PVF 文本 [--exact] [--limit N] [--files]   在字符串表中按子串或全文查找索引
+    snapshot PVF -o 文件 [--lst LST ...]      将 lst 引用的全部脚本解码为可按id随机读取的二进制快照
+    view    PVF [--page-size N]                图形界面浏览（需要 tkinter），节点展开时才加载
+    rolls   PVF [--seals N] [--avatars N] [--slots K] [--rare-rate P] [--seed S] [--prices JSON]   模拟魔法封印与时装潜力抽取
+"""
+import os
+import sys
+import csv
+import json
+import zlib
+import argparse
+from pkgkits.PvfParser import TinyPVF, PVFApi, save_tojson
+from pkgkits.scheduler import BulkScheduler, LOADERS
+from pkgkits.diskcache import DiskCache
+from pkgkits.reload import diff_headers
+from pkgkits.writer import SCRIPT_HEAD
+from pkgkits.extract import extract, FORMATS
+from pkgkits.packer import pack
+
+# 可以导出为表格的目录
+TABLE_CATALOGS = ('equipments', 'supplies', 'exp')
+CATALOGS = TABLE_CATALOGS + ('jobs', 'tasks', 'instances', 'skills')
+
+
+def open_pvf(args, path=None) -> TinyPVF:
+    pvf = TinyPVF(path or args.pvf, args.encoding)
+    if args.cache_dir:
+        DiskCache(args.cache_dir).attach(pvf)
+    return pvf
+
+
+def make_api(args, pvf) -> PVFApi:
+    api = PVFApi(pvf.pvf_path, pvf.encoding, args.workers)
+    api.pvf, api.headers = pvf, pvf.headers
+    return api
+
+
+def dump(obj):
+    json.dump(obj, sys.stdout, indent=4, ensure_ascii=False)
+    sys.stdout.write('\n')
+
+
+def decode_file(pvf, path):
+    """按文件类型解码，返回 (后缀, 内容)：lst/str/字符串表/脚本转为 json，无法识别的保留原始字节"""
+    if path.endswith('.lst'):
+        return '.json', pvf.load_lst(path)
+    if path.endswith('.str'):
+        return '.json', pvf.load_stt(path)
+    if path == 'stringtable.bin':
+        return '.json', pvf.bst
+    raw = pvf.parse_bytestream(path)
+    if raw[:2] == SCRIPT_HEAD:
+        return '.json', pvf.load_tree(path, shared=True)
+    return '', raw
+
+
+def cmd_info(args):
+    pvf = open_pvf(args)
+    dump({
+        "path": pvf.pvf_path, "uuid": pvf.uuid.decode(errors='replace'), "version": pvf.version,
+        "files": pvf.file_nodes_len, "crc32": f"{pvf.dir_nodes_crc32:08x}",
+        "bytes": sum(leaf['file_len'] for leaf in pvf.headers.values()),
+        "size": os.path.getsize(pvf.pvf_path),
+    })
+
+
+def cmd_ls(args):
+    dump(open_pvf(args).listdir(args.dir))
+
+
+def cmd_glob(args):
+    for path in open_pvf(args).glob(args.pattern):
+        print(path)
+
+
+def cmd_cat(args):
+    pvf = open_pvf(args)
+    path = args.path.lower().replace('\\', '/').lstrip('/')
+    if path not in pvf.headers:
+        print(f"Error :file not found, {args.path}", file=sys.stderr)
+        return 1
+    if args.raw:
+        sys.stdout.buffer.write(pvf.parse_bytestream(path)[:pvf.headers[path]['real_len']])
+    elif args.units:
+        dump(pvf.decrypt_bin2slist(path))
+    else:
+        dump(decode_file(pvf, path)[1])
+
+
+def cmd_extract(args):
+    stats = extract(args.pvf, args.output, args.patterns, args.format, args.workers, args.encoding, args.force)
+    print(f"extracted {stats['extracted']} files ({stats['bytes'] / 2 ** 20:.1f} MB), "
+          f"skipped {stats['skipped']} unchanged, removed {stats['removed']} to {args.output}")
+
+
+def cmd_pack(args):
+    try:
+        stats = pack(args.dir, args.output, args.source, args.workers, partial=args.partial)
+    except ValueError as e:
+        print(f"Error :{e}", file=sys.stderr)
+        return 1
+    print(f"packed {stats['files']} files to {args.output}: {stats['encoded']} re-encoded, {stats['reused']} reused, "
+          f"{stats['removed']} removed, {stats['bytes'] / 2 ** 20:.1f} MB")
+
+
+def load_catalog(api, name):
+    if name == 'equipments':
+        return api.parse_equipments(api.get_equipments())
+    if name == 'supplies':
+        return api.parse_supplies(api.get_supplies()[1])
+    if name == 'exp':
+        return [{"level": level, "exp": exp} for level, exp in enumerate(api.get_exp(), 1)]
+    if name == 'jobs':
+        job_map, job_type_map = api.get_jobs()
+        return {"jobs": job_map, "growtypes": job_type_map}
+    return api.load_all({name: LOADERS[name]})[name]
+
+
+def cmd_export(args):
+    if args.format != 'json' and args.catalog not in TABLE_CATALOGS:
+        print(f"Error :{args.catalog} can only be exported as json", file=sys.stderr)
+        return 1
+    data = load_catalog(make_api(args, open_pvf(args)), args.catalog)
+    output = args.output or f"{args.catalog}.{args.format}"
+    if args.format == 'json':
+        save_tojson(output, data)
+    elif args.format == 'csv':
+        with open(output, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(data[0]) if data else [])
+            writer.writeheader()
+            writer.writerows(data)
+    else:
+        try:
+            import pandas as pd
+        except ImportError as e:
+            print(f"Error :{e}, xlsx export requires pandas and openpyxl", file=sys.stderr)
+            return 1
+        pd.DataFrame(data).to_excel(output, index=False)
+    print(f"exported {len(data)} records to {output}")
+
+
+def cmd_diff(args):
+    old, new = open_pvf(args, args.old), open_pvf(args, args.new)
+    changed = diff_headers(old.headers, new.headers)
+    result = {"added": [], "removed": [], "changed": []}
+    for path in sorted(changed):
+        key = 'added' if path not in old.headers else 'removed' if path not in new.headers else 'changed'
+        result[key].append(path)
+    dump(result)
+    return 1 if changed else 0
+
+
+def check_crc(pvf, path):
+    """文件树中记录的是明文（未补齐部分）的 crc32"""
+    leaf = pvf.headers[path]
+    return zlib.crc32(pvf.parse_bytestream(path)[:leaf['real_len']]) == leaf['crc32']
+
+
+def cmd_verify(args):
+    pvf = open_pvf(args)
+    problems = []
+    pack_len = os.path.getsize(pvf.pvf_path) - pvf.pack_offset
+    end = 0
+    for leaf in sorted(pvf.headers.values(), key=lambda x: x['offset']):
+        if leaf['offset'] + leaf['file_len'] > pack_len:
+            problems.append(f"out of range: {leaf['fp']}")
+        elif leaf['offset'] < end and leaf['file_len']:
+            problems.append(f"overlapping: {leaf['fp']}")
+        end = max(end, leaf['offset'] + leaf['file_len'])
+    scheduler = BulkScheduler(pvf, args.workers)
+    scripts = set()
+    for lst_path, table in scheduler.map(pvf.load_lst, pvf.glob('*.lst')).items():
+        for path in table.values():
+            # 根目录下的 lst（如 n_string.lst）解析出的路径带有前导 /
+            path = path.lstrip('/')
+            if path not in pvf.headers:
+                problems.append(f"missing: {path} (referenced by {lst_path})")
+            elif lst_path != 'n_string.lst':
+                scripts.add(path)
+
+    def decode(path):
+        try:
+            pvf.decode_units(path)
+        except Exception as e:
+            return f"undecodable: {path} ({e})"
+        if args.crc and not check_crc(pvf, path):
+            return f"crc mismatch: {path}"
+
+    problems.extend(problem for problem in scheduler.map(decode, scripts).values() if problem)
+    for problem in sorted(problems):
+        print(problem)
+    print(f"checked {len(pvf.headers)} files, {len(scripts)} scripts: {len(problems)} problems")
+    return 1 if problems else 0
+
+
+def cmd_refs(args):
+    from pkgkits.refindex import RefIndex
+    pvf = open_pvf(args)
+    index = RefIndex.open(pvf, DiskCache(args.cache_dir) if args.cache_dir else None, args.workers)
+    if args.item is not None:
+        dump(index.item(args.item))
+    elif args.string is not None:
+        dump(index.string(args.string))
+    elif args.key is not None:
+        lst_id, key = args.key.split(':', 1)
+        dump(index.key(lst_id, key))
+    elif args.file is not None:
+        dump(index.file(args.file))
+    else:
+        dump(index.stats())
+
+
+def cmd_strings(args):
+    from pkgkits.refindex import RefIndex
+    from pkgkits.strindex import StringIndex
+    pvf = open_pvf(args)
+    cache = DiskCache(args.cache_dir) if args.cache_dir else None
+    refs = RefIndex.open(pvf, cache, args.workers) if args.files else None
+    index = StringIndex.open(pvf, cache, refs)
+    hits = index.find(args.text) if args.exact else index.search(args.text, args.limit)
+    result = []
+    for i in hits:
+        entry = {"index": i, "text": index.strings[i], "raw": index.raw[i]}
+        if refs is not None:
+            entry["files"] = index.files(i)
+        result.append(entry)
+    dump(result)
+
+
+def cmd_snapshot(args):
+    from pkgkits.snapshot import snapshot_lst
+    stats = snapshot_lst(open_pvf(args), args.lst, args.output, args.workers)
+    print(f"wrote {stats['records']} records ({stats['units']} units, {stats['strings']} strings) to {args.output}")
+
+
+def cmd_view(args):
+    try:
+        from tkinter import TclError
+        from pkgkits.viewer import show_pvf
+    except ImportError as e:
+        print(f"Error :{e}, the viewer requires tkinter", file=sys.stderr)
+        return 1
+    try:
+        show_pvf(open_pvf(args), args.page_size)
+    except TclError as e:
+        print(f"Error :{e}", file=sys.stderr)
+        return 1
+
+
+def cmd_rolls(args):
+    from pkgkits.rolls import simulate_pvf
+    prices = None
+    if args.prices:
+        with open(args.prices, 'r', encoding='utf8') as f:
+            prices = json.load(f)
+    dump(simulate_pvf(make_api(args, open_pvf(args)), args.seals, args.avatars, args.slots, args.rare_rate,
+                      args.seed, prices))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m pkgkits', description='pvf 命令行工具')
+    parser.add_argument('--encoding', default='big5')
+    parser.add_argument('--workers', type=int, default=None, help='线程数（extract 为进程数），缺省按 cpu 数')
+    parser.add_argument('--cache-dir', default=None, help='持久化缓存目录（字符串表等），按pvf版本区分')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sub = commands.add_parser('info', help='头部信息')
+    sub.add_argument('pvf')
+    sub.set_defaults(func=cmd_info)
+
+    sub = commands.add_parser('ls', help='列出目录')
+    sub.add_argument('pvf')
+    sub.add_argument('dir', nargs='?', default='')
+    sub.set_defaults(func=cmd_ls)
+
+    sub = commands.add_parser('glob', help='按通配符匹配文件')
+    sub.add_argument('pvf')
+    sub.add_argument('pattern')
+    sub.set_defaults(func=cmd_glob)
+
+    sub = commands.add_parser('cat', help='输出单个文件')
+    sub.add_argument('pvf')
+    sub.add_argument('path')
+    group = sub.add_mutually_exclusive_group()
+    group.add_argument('--units', action='store_true', help='输出原始单元列表')
+    group.add_argument('--raw', action='store_true', help='输出解密后的字节')
+    sub.set_defaults(func=cmd_cat)
+
+    sub = commands.add_parser('extract', help='批量导出文件')
+    sub.add_argument('pvf')
+    sub.add_argument('patterns', nargs='*', help='通配符，缺省导出全部')
+    sub.add_argument('-o', '--output', required=True)
+    sub.add_argument('--format', choices=FORMATS, default='raw', help='raw 解密原文 | text 脚本渲染为文本 | json 脚本导出为树')
+    sub.add_argument('--force', action='store_true', help='忽略清单，全部重新导出')
+    sub.set_defaults(func=cmd_extract)
+
+    sub = commands.add_parser('pack', help='将 extract 导出的目录重新打包')
+    sub.add_argument('dir')
+    sub.add_argument('-o', '--output', required=True)
+    sub.add_argument('--source', default=None, help='复用加密数据的源pvf，缺省使用清单中记录的路径')
+    sub.add_argument('--partial', action='store_true', help='没有源pvf时也打包部分导出的目录，输出只含目录中的文件')
+    sub.set_defaults(func=cmd_pack)
+
+    sub = commands.add_parser('export', help='导出目录')
+    sub.add_argument('pvf')
+    sub.add_argument('catalog', choices=CATALOGS)
+    sub.add_argument('-o', '--output')
+    sub.add_argument('--format', choices=('json', 'csv', 'xlsx'), default='json')
+    sub.set_defaults(func=cmd_export)
+
+    sub = commands.add_parser('diff', help='比较两个pvf')
+    sub.add_argument('old')
+    sub.add_argument('new')
+    sub.set_defaults(func=cmd_diff)
+
+    sub = commands.add_parser('verify', help='完整性检查')
+    sub.add_argument('pvf')
+    sub.add_argument('--crc', action='store_true', help='同时校验每个脚本文件的 crc32')
+    sub.set_defaults(func=cmd_verify)
+
+    sub = commands.add_parser('refs', help='反查引用')
+    sub.add_argument('pvf')
+    group = sub.add_mutually_exclusive_group()
+    group.add_argument('--item', type=int, help='物品id')
+    group.add_argument('--string', type=int, help='字符串表索引')
+    group.add_argument('--key', help='n_string.lst 编号:键，例如 3:growtype_name_0')
+    group.add_argument('--file', help='文件路径')
+    sub.set_defaults(func=cmd_refs)
+
+    sub = commands.add_parser('strings', help='查找字符串表')
+    sub.add_argument('pvf')
+    sub.add_argument('text')
+    sub.add_argument('--exact', action='store_true', help='完全匹配（原始或简体字符串）')
+    sub.add_argument('--limit', type=int, default=100, help='子串匹配最多返回的条数')
+    sub.add_argument('--files', action='store_true', help='同时列出引用每个索引的文件（需要构建引用索引）')
+    sub.set_defaults(func=cmd_strings)
+
+    sub = commands.add_parser('snapshot', help='写出二进制快照')
+    sub.add_argument('pvf')
+    sub.add_argument('-o', '--output', required=True)
+    sub.add_argument('--lst', nargs='+', default=['equipment/equipment.lst', 'stackable/stackable.lst'])
+    sub.set_defaults(func=cmd_snapshot)
+
+    sub = commands.add_parser('view', help='图形界面浏览')
+    sub.add_argument('pvf')
+    sub.add_argument('--page-size', type=int, default=500, help='每次展开或点击"更多"时插入的子节点数')
+    sub.set_defaults(func=cmd_view)
+
+    sub = commands.add_parser('rolls', help='模拟魔法封印与时装潜力抽取')
+    sub.add_argument('pvf')
+    sub.add_argument('--seals', type=int, default=1000000, help='魔法封印抽取次数，0 表示跳过')
+    sub.add_argument('--avatars', type=int, default=1000000, help='时装潜力抽取次数，0 表示跳过')
+    sub.add_argument('--slots', type=int, default=1, help='每次封印的词条数')
+    sub.add_argument('--rare-rate', type=float, default=0.1, help='时装潜力抽中 rare 池的概率')
+    sub.add_argument('--seed', type=int, default=None)
+    sub.add_argument('--prices', default=None, help='{选项名: 单位价值} 的 json 文件，用于计算期望价值')
+    sub.set_defaults(func=cmd_rolls)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args) or 0
+    except BrokenPipeError:
+        # 输出被 head 等提前关闭，避免退出时再次写入 stdout 报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
@@ -0,0 +1,63 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: diskcache.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   18:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 跨进程持久化的解析结果缓存，以pvf文件树CRC区分版本。
+"""
+import os
+import json
+
+"""
+目录结构：<cache_dir>/<pvf文件名>-<文件树CRC>-<编码>/<名称>
+pvf 被替换后文件树 CRC 随之变化，自动落到新的目录，旧目录可以直接删除。
+写入先落到临时文件再 os.replace，多个进程同时写同一项时不会读到半个文件。
+"""
+
+
+class DiskCache(object):
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def folder(self, pvf) -> str:
+        name = os.path.splitext(os.path.basename(pvf.pvf_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{pvf.dir_nodes_crc32:08x}-{pvf.encoding}")
+
+    def path(self, pvf, name) -> str:
+        return os.path.join(self.folder(pvf), name)
+
+    def exists(self, pvf, name) -> bool:
+        return os.path.exists(self.path(pvf, name))
+
+    def write_bytes(self, pvf, name, data: bytes):
+        path = self.path(pvf, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+        return path
+
+    def load(self, pvf, name, loader):
+        """读取 json 缓存，不存在或损坏时调用 loader() 计算并写入"""
+        path = self.path(pvf, name)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error :{e}, {path}")
+        value = loader()
+        self.write_bytes(pvf, name, json.dumps(value, ensure_ascii=False).encode('utf8'))
+        return value
+
+    def attach(self, pvf):
+        """为 TinyPVF 挂载缓存的字符串表，省去逐条解码与繁简转换"""
+        pvf.bst = self.load(pvf, 'bst.json', lambda: pvf.load_bst())
+        return pvf
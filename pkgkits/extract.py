@@ -0,0 +1,207 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: extract.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   19:30
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 多进程将pvf整包解到目录，带清单的增量导出。
+"""
+import os
+import json
+import zlib
+import mmap
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.writer import SCRIPT_HEAD
+from pkgkits import script
+
+"""
+流程：
+1. 主进程解析文件树，对照输出目录中的清单，跳过源文件 crc 与导出格式都未变化且输出文件仍存在的条目；
+2. 剩余文件按字节数贪心分成若干份大小相近的分片，提交到进程池；
+3. 每个子进程用 mmap 映射pvf，按偏移切片、解密并写出，返回输出内容的 crc32；
+4. 主进程删除pvf中已不存在的旧输出，写回清单。
+
+导出格式：
+raw   解密后的原始内容（按实际长度截断），可被 packer 原样打包
+text  脚本、lst、stringtable.bin、*.str 按 script.py 的文本格式无损渲染为 utf-8 文本，
+      便于 grep 与版本管理，修改后可由 packer 重新打包；其余文件同 raw
+json  脚本导出为树结构 json（繁简转换后），lst 为 {id: 路径}，仅供阅读，不能重新打包
+
+pvf 内的路径来自文件树，不可信：含 .. 或绝对路径、解析后（含符号链接）不在输出目录下的文件不会写出，
+打印错误后跳过，也不会计入清单。
+
+清单 .pvf-manifest.json：
+{"source": {"path", "crc32", "uuid", "version", "encoding", "format", "strings", "patterns"},
+ "files": {路径: [源文件crc32, 实际长度, 输出内容crc32]}}
+"""
+
+MANIFEST = '.pvf-manifest.json'
+FORMATS = ('raw', 'text', 'json')
+
+# 子进程内的状态，由 _init_worker 设置
+_worker = {}
+
+
+def strings_crc(pvf) -> int:
+    """字符串表、n_string.lst 与全部 .str 的组合校验值，text/json 输出依赖它们"""
+    crcs = [leaf['crc32'] for path, leaf in sorted(pvf.headers.items())
+            if path in ('stringtable.bin', 'n_string.lst') or path.endswith('.str')]
+    return zlib.crc32(b''.join(crc.to_bytes(4, 'little') for crc in crcs))
+
+
+def safe_target(output, path):
+    """pvf 内路径 -> output 下的目标文件（realpath），不在 output 之下的返回 None"""
+    root = os.path.realpath(output)
+    target = os.path.realpath(os.path.join(root, *path.split('/')))
+    if target == root or os.path.commonpath([root, target]) != root:
+        return None
+    return target
+
+
+def render_file(pvf, path, body: bytes, fmt):
+    """按格式渲染单个文件，返回写出的字节"""
+    if fmt == 'json':
+        if path.endswith('.lst'):
+            return json.dumps(pvf.load_lst(path), indent=4, ensure_ascii=False).encode('utf8')
+        if path == 'stringtable.bin':
+            return script.render_bst(pvf.bst).encode('utf8')
+        if path.endswith('.str'):
+            return body.decode(pvf.encoding, 'ignore').encode('utf8')
+        if body[:2] == SCRIPT_HEAD:
+            return json.dumps(pvf.build_tree(pvf.decode_bytes(body)), indent=4, ensure_ascii=False).encode('utf8')
+        return body
+    if path.endswith('.lst'):
+        text = script.render_lst(body, pvf.bst)
+    elif path == 'stringtable.bin':
+        text = script.render_bst(pvf.bst)
+    elif path.endswith('.str'):
+        text = body.decode(pvf.encoding, 'surrogateescape')
+    elif body[:2] == SCRIPT_HEAD:
+        resolve = lambda lst_id, key: pvf.load_stt_cached(pvf.lst.get(lst_id)).get(key)
+        text = script.render(script.read_units(body), pvf.bst, resolve)
+    else:
+        return body
+    return text.encode('utf8', 'surrogateescape')
+
+
+def _init_worker(pvf_path, encoding, pack_offset, output, fmt, bst):
+    f = open(pvf_path, 'rb')
+    _worker.update(file=f, mm=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), pack_offset=pack_offset,
+                   output=output, fmt=fmt, pvf=None, dirs=set())
+    if fmt != 'raw':
+        # 文件树与 n_string.lst 由子进程各自延迟加载，字符串表使用主进程传入的结果，避免重复解码；
+        # text 格式传入的是未经繁简转换的原始字符串表
+        pvf = _worker['pvf'] = TinyPVF(pvf_path, encoding, cache_bytes=0)
+        pvf.bst = bst
+
+
+def _extract_shard(shard):
+    """导出一个分片，shard 为 [(路径, 偏移, 补齐长度, 实际长度, crc32)]，返回 {路径: 输出crc32}"""
+    mm, base, output, fmt = _worker['mm'], _worker['pack_offset'], _worker['output'], _worker['fmt']
+    result = {}
+    for path, offset, file_len, real_len, crc in shard:
+        target = safe_target(output, path)
+        if target is None:
+            print(f"Error :path escapes the output directory, {path}")
+            continue
+        start = base + offset
+        body = TinyPVF.decrypt(mm[start:start + file_len], crc)[:real_len]
+        if fmt != 'raw':
+            try:
+                body = render_file(_worker['pvf'], path, body, fmt)
+            except Exception as e:
+                print(f"Error :{e}, {path}")
+        folder = os.path.dirname(target)
+        if folder not in _worker['dirs']:
+            os.makedirs(folder, exist_ok=True)
+            _worker['dirs'].add(folder)
+        with open(target, 'wb', buffering=1 << 16) as f:
+            f.write(body)
+        result[path] = zlib.crc32(body)
+    return result
+
+
+def make_shards(items, count, size):
+    """按字节数贪心分片：从大到小依次放入当前总量最小的分片，size(item) 返回条目的字节数"""
+    shards = [[] for _ in range(count)]
+    heap = [(0, i) for i in range(count)]
+    for item in sorted(items, key=size, reverse=True):
+        total, i = heapq.heappop(heap)
+        shards[i].append(item)
+        heapq.heappush(heap, (total + size(item), i))
+    return [shard for shard in shards if shard]
+
+
+def load_manifest(output) -> dict:
+    path = os.path.join(output, MANIFEST)
+    if not os.path.exists(path):
+        return {"source": {}, "files": {}}
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+def extract(pvf_path, output, patterns=None, fmt='raw', workers=None, encoding='big5', force=False) -> dict:
+    """
+    导出pvf到 output 目录，patterns 为通配符列表（缺省全部文件），返回统计信息。
+    workers 为进程数，缺省为 cpu 数；force 为真时忽略清单全部重新导出。
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+    pvf = TinyPVF(pvf_path, encoding, cache_bytes=0)
+    if patterns:
+        paths = sorted({path for pattern in patterns for path in pvf.glob(pattern)})
+    else:
+        paths = list(pvf.headers)
+    source = {
+        "path": os.path.abspath(pvf_path), "crc32": pvf.dir_nodes_crc32, "uuid": pvf.uuid.hex(),
+        "version": pvf.version, "encoding": encoding, "format": fmt,
+        "strings": strings_crc(pvf) if fmt != 'raw' else None, "patterns": list(patterns or []),
+    }
+    manifest = load_manifest(output)
+    files = manifest["files"]
+    if force or {key: manifest["source"].get(key) for key in ('format', 'strings')} != \
+            {key: source[key] for key in ('format', 'strings')}:
+        files = {}
+    todo = []
+    for path in paths:
+        leaf = pvf.headers[path]
+        entry = files.get(path)
+        target = safe_target(output, path)
+        if entry is None or entry[0] != leaf['crc32'] or entry[1] != leaf['real_len'] \
+                or target is None or not os.path.exists(target):
+            todo.append(leaf)
+
+    removed = 0
+    for path in list(files):
+        if path not in pvf.headers:
+            target = safe_target(output, path)
+            if target is not None and os.path.exists(target):
+                os.remove(target)
+            del files[path]
+            removed += 1
+
+    workers = workers or os.cpu_count() or 1
+    nbytes = sum(leaf['file_len'] for leaf in todo)
+    if todo:
+        bst = None if fmt == 'raw' else pvf.raw_bst if fmt == 'text' else pvf.bst
+        # 分片数多于进程数，大小相近的分片由进程池动态领取，减少尾部等待
+        items = [(leaf['fp'], leaf['offset'], leaf['file_len'], leaf['real_len'], leaf['crc32']) for leaf in todo]
+        shards = make_shards(items, workers * 4, lambda x: x[2])
+        init_args = (pvf.pvf_path, encoding, pvf.pack_offset, output, fmt, bst)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            for result in pool.map(_extract_shard, shards):
+                for path, out_crc in result.items():
+                    leaf = pvf.headers[path]
+                    files[path] = [leaf['crc32'], leaf['real_len'], out_crc]
+
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, MANIFEST), 'w', encoding='utf8') as f:
+        json.dump({"source": source, "files": files}, f, ensure_ascii=False)
+    return {"files": len(paths), "extracted": len(todo), "skipped": len(paths) - len(todo),
+            "removed": removed, "bytes": nbytes}
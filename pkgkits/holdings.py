@@ -0,0 +1,275 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: holdings.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   10:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 全服物品持有量索引与复制异常扫描。
+"""
+import sqlite3
+import numpy as np
+from pkgkits.inventory import INVENTORY_SOURCES, decode_rows
+
+"""
+扫描方式：
+每个来源按主键做 keyset 分页（where key > 上次位置 order by key limit n），
+每页通过服务端游标流式读取，在内存中聚合为 (item_id, owner, source) -> 数量 后写入磁盘上的 sqlite 索引，
+聚合结果与该来源的检查点在同一事务中提交，中断后从检查点继续，不会重复计数。
+每页只持有 batch_size 行，内存占用与总行数无关，也不会长时间锁表。
+"""
+
+# 行来源: (表, 分页主键, 持有者列, 物品id列, 数量表达式)
+ROW_SOURCES = {
+    'postal': ('taiwan_cain_2nd.postal', 'postal_id', 'receive_charac_no', 'item_id',
+               'if(avata_flag = 0 and creature_flag = 0, add_info, 1)'),
+    'user_items': ('taiwan_cain_2nd.user_items', 'ui_id', 'charac_no', 'it_id', '1'),
+    'creature_items': ('taiwan_cain_2nd.creature_items', 'ui_id', 'charac_no', 'it_id', '1'),
+}
+# 背包类 blob 来源，复用 inventory 的解码
+BLOB_SOURCES = ('inventory', 'equipslot', 'creature', 'cargo')
+ACCOUNT_SOURCE = ('taiwan_cain_2nd.charac_info', 'charac_no', 'm_id')
+
+SCHEMA = """
+create table if not exists holdings (
+    item_id integer not null,
+    owner integer not null,
+    source text not null,
+    total integer not null,
+    entries integer not null,
+    primary key (item_id, owner, source)
+) without rowid;
+create table if not exists accounts (
+    charac_no integer primary key,
+    m_id integer not null
+);
+create table if not exists checkpoints (
+    source text primary key,
+    last_key integer not null,
+    done integer not null default 0
+);
+create table if not exists anomalies (
+    item_id integer not null,
+    owner integer not null,
+    total integer not null,
+    reason text not null
+);
+"""
+
+
+def server_cursor(connection):
+    """优先使用 pymysql 的服务端游标，其它连接退化为普通游标"""
+    try:
+        from pymysql.cursors import SSCursor
+        return connection.cursor(SSCursor)
+    except (ImportError, TypeError):
+        return connection.cursor()
+
+
+def iter_keyset(connection, table, key, columns, batch_size=10000, start=0):
+    """按主键 keyset 分页流式读取，每次产出一页行数据，行首列为分页主键"""
+    last = start
+    sql = f"select {key}, {columns} from {table} where {key} > %s order by {key} limit %s"
+    while True:
+        cursor = server_cursor(connection)
+        try:
+            cursor.execute(sql, (last, batch_size))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if not rows:
+            break
+        yield rows
+        last = rows[-1][0]
+        if len(rows) < batch_size:
+            break
+
+
+def aggregate(item_ids, owners, counts):
+    """在内存中按 (item_id, owner) 聚合一页数据，返回 (item_ids, owners, totals, entries)"""
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    owners = np.asarray(owners, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    if not len(item_ids):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    pairs = np.stack([item_ids, owners], axis=1)
+    uniques, inverse = np.unique(pairs, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    totals = np.bincount(inverse, weights=counts, minlength=len(uniques)).astype(np.int64)
+    entries = np.bincount(inverse, minlength=len(uniques)).astype(np.int64)
+    return uniques[:, 0], uniques[:, 1], totals, entries
+
+
+class HoldingsIndex(object):
+    """磁盘上的物品持有量索引，可中断后续扫"""
+
+    def __init__(self, path='holdings.db'):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def checkpoint(self, source):
+        """返回 (上次位置, 是否完成)"""
+        row = self.db.execute("select last_key, done from checkpoints where source = ?", (source,)).fetchone()
+        return (0, False) if row is None else (row[0], bool(row[1]))
+
+    def commit_batch(self, source, last_key, item_ids, owners, counts, done=False):
+        """将一页聚合结果与检查点写入同一事务"""
+        item_ids, owners, totals, entries = aggregate(item_ids, owners, counts)
+        with self.db:
+            self.db.executemany(
+                "insert into holdings (item_id, owner, source, total, entries) values (?, ?, ?, ?, ?) "
+                "on conflict(item_id, owner, source) do update set "
+                "total = total + excluded.total, entries = entries + excluded.entries",
+                zip(item_ids.tolist(), owners.tolist(), [source] * len(item_ids), totals.tolist(), entries.tolist())
+            )
+            self.db.execute(
+                "insert into checkpoints (source, last_key, done) values (?, ?, ?) "
+                "on conflict(source) do update set last_key = excluded.last_key, done = excluded.done",
+                (source, last_key, int(done))
+            )
+
+    def reset(self, source=None):
+        """清除某个来源（或全部）的索引与检查点，用于重新扫描"""
+        with self.db:
+            if source is None:
+                self.db.execute("delete from holdings")
+                self.db.execute("delete from checkpoints")
+            else:
+                self.db.execute("delete from holdings where source = ?", (source,))
+                self.db.execute("delete from checkpoints where source = ?", (source,))
+
+    def scan_rows(self, connection, source, batch_size=10000):
+        """扫描行式来源（邮件附件、时装、宠物）"""
+        table, key, owner, item, count = ROW_SOURCES[source]
+        last, done = self.checkpoint(source)
+        if done:
+            return
+        for rows in iter_keyset(connection, table, key, f"{owner}, {item}, {count}", batch_size, last):
+            _, owners, item_ids, counts = zip(*rows)
+            self.commit_batch(source, rows[-1][0], item_ids, owners, counts)
+        self.commit_batch(source, self.checkpoint(source)[0], [], [], [], done=True)
+
+    def scan_blobs(self, connection, source, batch_size=1000):
+        """扫描背包类 blob 来源"""
+        _, table, key, column = INVENTORY_SOURCES[source]
+        last, done = self.checkpoint(source)
+        if done:
+            return
+        for rows in iter_keyset(connection, table, key, column, batch_size, last):
+            items = decode_rows(((row[0], row[1]) for row in rows), source)
+            self.commit_batch(source, rows[-1][0], items['item_id'], items['owner'], items['count'])
+        self.commit_batch(source, self.checkpoint(source)[0], [], [], [], done=True)
+
+    def scan_accounts(self, connection, batch_size=50000):
+        """同步角色与账号的对应关系，用于按账号汇总"""
+        table, key, account = ACCOUNT_SOURCE
+        last, done = self.checkpoint('accounts')
+        if done:
+            return
+        for rows in iter_keyset(connection, table, key, account, batch_size, last):
+            with self.db:
+                self.db.executemany("insert or replace into accounts (charac_no, m_id) values (?, ?)", rows)
+                self.db.execute("insert or replace into checkpoints (source, last_key, done) values ('accounts', ?, 0)",
+                                (rows[-1][0],))
+        with self.db:
+            self.db.execute("insert into checkpoints (source, last_key, done) values ('accounts', ?, 1) "
+                            "on conflict(source) do update set done = 1", (last,))
+
+    def scan(self, connection, row_sources=tuple(ROW_SOURCES), blob_sources=BLOB_SOURCES, batch_size=10000):
+        """完整扫描，已完成的来源会被跳过"""
+        self.scan_accounts(connection, batch_size * 5)
+        for source in row_sources:
+            self.scan_rows(connection, source, batch_size)
+        for source in blob_sources:
+            self.scan_blobs(connection, source, max(batch_size // 10, 1))
+
+    def owner_totals(self, item_id):
+        """某个物品按角色汇总的持有量 [(charac_no, total), ...]"""
+        return self.db.execute(
+            "select owner, sum(total) from holdings where item_id = ? group by owner order by 2 desc", (item_id,)
+        ).fetchall()
+
+    def account_totals(self, item_id):
+        """某个物品按账号汇总的持有量 [(m_id, total), ...]，未同步账号的角色记为 -1"""
+        return self.db.execute(
+            "select coalesce(a.m_id, -1), sum(h.total) from holdings h left join accounts a on a.charac_no = h.owner "
+            "where h.item_id = ? group by 1 order by 2 desc", (item_id,)
+        ).fetchall()
+
+    def iter_items(self):
+        """按 item_id 顺序逐个产出 (item_id, owners, totals)，一次只持有一个物品的数据"""
+        cursor = self.db.execute("select item_id, owner, sum(total) from holdings group by item_id, owner "
+                                 "order by item_id")
+        current, owners, totals = None, [], []
+        for item_id, owner, total in cursor:
+            if item_id != current and current is not None:
+                yield current, np.asarray(owners, dtype=np.int64), np.asarray(totals, dtype=np.int64)
+                owners, totals = [], []
+            current = item_id
+            owners.append(owner)
+            totals.append(total)
+        if current is not None:
+            yield current, np.asarray(owners, dtype=np.int64), np.asarray(totals, dtype=np.int64)
+
+    def flag_anomalies(self, traits=None, mad_factor=10.0, min_total=10, rare_limit=3, rare_grade=4):
+        """
+        标记可疑持有量，写入 anomalies 表并返回标记数量。
+        1. 持有量远超该物品所有持有者中位数（中位数 + mad_factor * MAD）；
+        2. 稀有度 >= rare_grade 的物品单个角色持有超过 rare_limit 件；
+        3. 不可交易物品出现在邮件附件中。
+        traits 为 item_traits 的返回值，缺省时只做第1条检查。
+        """
+        traits = {} if traits is None else traits
+        flagged = []
+        for item_id, owners, totals in self.iter_items():
+            median = np.median(totals)
+            mad = np.median(np.abs(totals - median)) or 1.0
+            mask = (totals >= min_total) & (totals > median + mad_factor * mad)
+            flagged.extend((item_id, owner, total, 'outlier') for owner, total in
+                           zip(owners[mask].tolist(), totals[mask].tolist()))
+            trait = traits.get(item_id)
+            if trait is None:
+                continue
+            if trait['rarity'] >= rare_grade:
+                mask = totals > rare_limit
+                flagged.extend((item_id, owner, total, 'rare') for owner, total in
+                               zip(owners[mask].tolist(), totals[mask].tolist()))
+        untradeable = [item_id for item_id, trait in traits.items() if not trait['tradeable']]
+        for start in range(0, len(untradeable), 500):
+            chunk = untradeable[start:start + 500]
+            flagged.extend(
+                (item_id, owner, total, 'untradeable postal') for item_id, owner, total in self.db.execute(
+                    f"select item_id, owner, total from holdings where source = 'postal' "
+                    f"and item_id in ({','.join('?' * len(chunk))})", chunk)
+            )
+        with self.db:
+            self.db.execute("delete from anomalies")
+            self.db.executemany("insert into anomalies (item_id, owner, total, reason) values (?, ?, ?, ?)", flagged)
+        return len(flagged)
+
+    def anomalies(self):
+        return self.db.execute("select item_id, owner, total, reason from anomalies order by total desc").fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+def item_traits(pvf, lst_paths=('equipment/equipment.lst', 'stackable/stackable.lst')) -> dict:
+    """从pvf读取物品的稀有度、交易属性与堆叠上限 {item_id: {"rarity", "tradeable", "stack_limit"}}"""
+    cget = lambda x, y, d=-1: y.get(x, {"children": [{"value": d}]})["children"][0]["value"]
+    traits = {}
+    for lst_path in lst_paths:
+        for _id, path in pvf.load_lst(lst_path).items():
+            tree = pvf.build_tree(pvf.decrypt_bin2slist(path))
+            rarity = cget("[rarity]", tree, -1)
+            traits[_id] = {
+                "rarity": rarity if isinstance(rarity, int) else -1,
+                "tradeable": cget("[attach type]", tree, '[trade]') in ('[free]', '[sealing]'),
+                "stack_limit": cget("[stack limit]", tree, 1),
+            }
+    return traits
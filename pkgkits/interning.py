@@ -0,0 +1,109 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: interning.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   23:55
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 与字符串表索引绑定的字符串驻留池，以及按需解析的字符串引用。
+"""
+
+"""
+解码后的树中 [name]、[explain]、职业与类型标签等字符串大量重复，原先每个单元都重新转换一次、各自持有一份拷贝。
+InternPool 以字符串表索引（类型7另带引号）为键，每个索引只转换一次，所有树共享同一个字符串对象；
+类型9引用的 .str 文本按 (编号, 键索引) 缓存。
+lazy 模式下类型6、7、8的值为 StrRef，只记录索引，第一次 str() 时才转换，同一索引共享一个 StrRef；
+段落标签（类型5）仍为字符串，以便作为树的键。
+"""
+
+
+class StrRef(object):
+    """字符串表索引的延迟引用，str() 时经 InternPool 转换，比较与哈希按解析后的文本进行"""
+    __slots__ = ('pool', 'index', 'quote')
+
+    def __init__(self, pool, index, quote=''):
+        self.pool = pool
+        self.index = index
+        self.quote = quote
+
+    def __str__(self):
+        return self.pool.get(self.index, self.quote)
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, StrRef):
+            return (self.pool, self.index, self.quote) == (other.pool, other.index, other.quote) or str(self) == str(other)
+        return str(self) == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __len__(self):
+        return len(str(self))
+
+    def __contains__(self, item):
+        return item in str(self)
+
+    def __getattr__(self, name):
+        # 其余 str 方法（startswith、split 等）转发给解析后的文本；未初始化的槽位与特殊属性不转发，避免 copy/pickle 时递归
+        if name in StrRef.__slots__ or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(str(self), name)
+
+
+class InternPool(object):
+    """strings 为字符串表，convert 为单个字符串的转换函数（繁简转换），每个索引只调用一次"""
+
+    def __init__(self, strings, convert=None):
+        self.strings = strings
+        self.convert = convert if convert is not None else (lambda text: text)
+        self.values = {}   # 索引 或 (索引, 引号) 或 (9, 编号, 键索引) -> 字符串
+        self.texts = {}    # 文本 -> 同一个字符串对象
+        self.refs = {}     # (索引, 引号) -> StrRef
+
+    def intern(self, text):
+        return self.texts.setdefault(text, text) if isinstance(text, str) else text
+
+    def get(self, index, quote='') -> str:
+        key = (index, quote) if quote else index
+        value = self.values.get(key)
+        if value is None:
+            # 多线程同时未命中时以先写入的为准
+            value = self.values.setdefault(key, self.intern(self.convert(f"{quote}{self.strings[index]}{quote}")))
+        return value
+
+    def ref(self, index, quote='') -> StrRef:
+        key = (index, quote)
+        ref = self.refs.get(key)
+        if ref is None:
+            self.strings[index]  # 与立即解码一致，索引越界时在解码阶段报错
+            ref = self.refs.setdefault(key, StrRef(self, index, quote))
+        return ref
+
+    def lookup(self, key, loader) -> str:
+        """其他来源（如类型9的 .str 文本）的值，按 key 缓存 loader() 的驻留结果"""
+        value = self.values.get(key)
+        if value is None:
+            value = self.values.setdefault(key, self.intern(loader()))
+        return value
+
+    def __len__(self):
+        return len(self.values)
+
+
+def materialize(obj):
+    """将树或单元列表中的 StrRef 全部解析为 str，用于 json 导出等需要普通对象的场景"""
+    if isinstance(obj, StrRef):
+        return str(obj)
+    if isinstance(obj, dict):
+        return {key: materialize(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [materialize(value) for value in obj]
+    if isinstance(obj, tuple):
+        return tuple(materialize(value) for value in obj)
+    return obj
@@ -0,0 +1,202 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: inventory.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   09:12
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 数据库背包字段（背包、装备栏、宠物栏、仓库）的批量读取与解码。
+"""
+import zlib
+import struct
+import numpy as np
+
+"""
+背包类 blob 字段结构：
+前4位 为解压后的长度（小端），之后为 zlib 压缩数据；
+解压后按 61 字节定长切分为物品槽，空槽的 item_id 为 0。
+
+槽位结构（偏移: 含义）：
+0 封装标记 | 1 物品类型 | 2-5 物品id | 6 强化等级 | 7-10 数量（装备为大端存储的品级）
+11-12 耐久 | 13-16 宝珠 | 17 增幅类型 | 18-19 增幅数值 | 37-50 魔法封印 | 51 锻造等级
+"""
+
+SLOT_SIZE = 61
+
+# 原始槽位的结构化视图，直接 frombuffer 于解压后的字节流上
+SLOT_DTYPE = np.dtype({
+    'names': ['seal', 'type', 'item_id', 'upgrade', 'count', 'durability', 'amplify_type', 'amplify_value', 'forge'],
+    'formats': ['u1', 'u1', '<u4', 'u1', '<u4', '<u2', 'u1', '<u2', 'u1'],
+    'offsets': [0, 1, 2, 6, 7, 11, 17, 18, 51],
+    'itemsize': SLOT_SIZE,
+})
+
+# 解码后的紧凑物品记录
+ITEM_DTYPE = np.dtype([
+    ('owner', '<i8'),  # charac_no 或 m_id，取决于来源
+    ('source', 'u1'),  # 来源，见 INVENTORY_SOURCES
+    ('slot', '<u2'),
+    ('item_id', '<u4'),
+    ('type', 'u1'),
+    ('count', '<u4'),
+    ('grade', '<u4'),
+    ('upgrade', 'u1'),
+    ('amplify_type', 'u1'),
+    ('amplify_value', '<u2'),
+    ('forge', 'u1'),
+    ('seal', 'u1'),
+    ('durability', '<u2'),
+])
+
+# 来源名: (编码, 库.表, 主键列, blob列)
+INVENTORY_SOURCES = {
+    'inventory': (0, 'taiwan_cain_2nd.inventory', 'charac_no', 'inventory'),
+    'equipslot': (1, 'taiwan_cain_2nd.inventory', 'charac_no', 'equipslot'),
+    'creature': (2, 'taiwan_cain_2nd.inventory', 'charac_no', 'creature'),
+    'cargo': (3, 'taiwan_cain_2nd.charac_inven_expand', 'charac_no', 'cargo'),
+    'account_cargo': (4, 'taiwan_cain_2nd.account_cargo', 'm_id', 'cargo'),
+}
+source_map = {value[0]: key for key, value in INVENTORY_SOURCES.items()}
+slot_type_map = {0: '空槽位', 1: '装备', 2: '消耗品', 3: '材料', 4: '任务材料', 5: '宠物', 6: '宠物装备', 7: '宠物消耗品',
+                 10: '副职业'}
+
+
+def unpack_blob(blob) -> bytes:
+    """解压单个背包 blob，空字段返回 b''"""
+    if not blob or len(blob) <= 4:
+        return b''
+    try:
+        return zlib.decompress(bytes(blob[4:]))
+    except zlib.error as e:
+        print(f"Blob Error :{e}, length={struct.unpack('<I', bytes(blob[:4]))[0]}")
+        return b''
+
+
+def pack_blob(slots: bytes) -> bytes:
+    """unpack_blob 的逆过程，用于构造测试数据或回写背包"""
+    return struct.pack('<I', len(slots)) + zlib.compress(slots)
+
+
+def decode_slots(raw: bytes) -> np.ndarray:
+    """将解压后的字节流按定长切分为 SLOT_DTYPE 数组（零拷贝视图）"""
+    return np.frombuffer(raw, dtype=SLOT_DTYPE, count=len(raw) // SLOT_SIZE)
+
+
+def decode_rows(rows, source='inventory', skip_empty=True) -> np.ndarray:
+    """
+    批量解码 (owner, blob) 行为 ITEM_DTYPE 数组。
+    每行只做一次解压，槽位解析在拼接后的整块字节流上一次完成，不逐槽循环。
+    """
+    code = INVENTORY_SOURCES[source][0]
+    owners, chunks = [], []
+    for owner, blob in rows:
+        raw = unpack_blob(blob)
+        usable = len(raw) - len(raw) % SLOT_SIZE
+        if usable:
+            owners.append(owner)
+            chunks.append(raw[:usable])
+    if not chunks:
+        return np.zeros(0, dtype=ITEM_DTYPE)
+    counts = np.fromiter((len(chunk) // SLOT_SIZE for chunk in chunks), dtype=np.int64, count=len(chunks))
+    slots = decode_slots(b''.join(chunks))
+    # 每行内的槽位序号 = 全局序号 - 该行起始位置
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    items = np.zeros(len(slots), dtype=ITEM_DTYPE)
+    items['owner'] = np.repeat(np.asarray(owners, dtype=np.int64), counts)
+    items['source'] = code
+    items['slot'] = np.arange(len(slots)) - starts
+    for name in ('item_id', 'type', 'upgrade', 'amplify_type', 'amplify_value', 'forge', 'seal', 'durability'):
+        items[name] = slots[name]
+    # 装备的数量位存放的是大端品级，数量恒为1
+    is_equip = slots['type'] == 1
+    items['count'] = np.where(is_equip, 1, slots['count'])
+    items['grade'] = np.where(is_equip, slots['count'].byteswap(), 0)
+    if skip_empty:
+        items = items[items['item_id'] != 0]
+    return items
+
+
+def fetch_blobs(connection, source='inventory', owners=None, batch_size=1000):
+    """
+    从数据库批量读取 blob 字段，逐批产出 [(owner, blob), ...]。
+    connection 为任意 DB-API 连接（如 pymysql），owners 为空时读取全表。
+    """
+    _, table, key, column = INVENTORY_SOURCES[source]
+    sql = f"select {key}, {column} from {table}"
+    params = None
+    if owners is not None:
+        owners = list(owners)
+        if not owners:
+            return
+        sql += f" where {key} in ({','.join(['%s'] * len(owners))})"
+        params = owners
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def load_items(connection, sources=('inventory', 'equipslot', 'creature', 'cargo'), owners=None, batch_size=1000):
+    """读取并解码多个来源的物品，合并为一个 ITEM_DTYPE 数组"""
+    parts = []
+    for source in sources:
+        for rows in fetch_blobs(connection, source, owners, batch_size):
+            parts.append(decode_rows(rows, source))
+    if not parts:
+        return np.zeros(0, dtype=ITEM_DTYPE)
+    return np.concatenate(parts)
+
+
+def holders_of(items: np.ndarray, item_ids) -> np.ndarray:
+    """筛选持有指定物品（单个id或id集合）的记录"""
+    if isinstance(item_ids, (set, frozenset, dict)):
+        item_ids = list(item_ids)
+    return items[np.isin(items['item_id'], np.atleast_1d(np.asarray(item_ids, dtype=np.uint32)))]
+
+
+def count_by_owner(items: np.ndarray, item_id=None):
+    """按持有者汇总数量，返回 (owners, totals)"""
+    if item_id is not None:
+        items = holders_of(items, item_id)
+    owners, inverse = np.unique(items['owner'], return_inverse=True)
+    totals = np.bincount(inverse, weights=items['count'], minlength=len(owners)).astype(np.int64)
+    return owners, totals
+
+
+def item_catalog(pvf, lst_paths=('equipment/equipment.lst', 'stackable/stackable.lst'), with_names=False) -> dict:
+    """
+    由pvf的物品列表构造目录 {item_id: {"path", "name"}}。
+    with_names 为 False 时只读取 lst，不解码物品文件。
+    """
+    catalog = {}
+    for lst_path in lst_paths:
+        for _id, path in pvf.load_lst(lst_path).items():
+            name = None
+            if with_names:
+                tree = pvf.build_tree(pvf.decrypt_bin2slist(path))
+                names = tree.get('[name]', {"children": []})["children"]
+                name = ''.join(str(child["value"]) for child in names) if names else None
+            catalog[_id] = {"path": path, "name": name}
+    return catalog
+
+
+def join_catalog(items: np.ndarray, catalog: dict, field='name', default=None) -> np.ndarray:
+    """
+    将物品记录与pvf目录关联，返回与 items 等长的 object 数组。
+    只对去重后的 item_id 查表一次，再由逆索引展开。
+    """
+    uniques, inverse = np.unique(items['item_id'], return_inverse=True)
+    looked = np.empty(len(uniques), dtype=object)
+    for i, item_id in enumerate(uniques.tolist()):
+        entry = catalog.get(item_id)
+        looked[i] = default if entry is None else entry.get(field, default)
+    return looked[inverse]
@@ -0,0 +1,207 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: overlay.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   00:30
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: TinyPVF 之上的写时复制层：改动与新增的文件先放在内存或旁路目录中，随时可见，最后一次性写出。
+"""
+import os
+import json
+import zlib
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.writer import PVFWriter, StringPool, encrypt, pack_units, pack_bst
+from pkgkits.reload import STRING_FILES
+from pkgkits import script
+
+"""
+挂载后 TinyPVF.parse_bytestream 先查 overlay，decrypt_bin2slist、load_tree、load_lst 以及 PVFApi 的加载函数
+都经由它读取，因此无需改动调用方。每次写入只让该路径的缓存失效；
+改动字符串表、n_string.lst 或 *.str 时，依赖它们的字符串表、驻留池与全部解码结果一并重置。
+
+写入方式：
+put(路径, 明文字节)          任意文件
+put_text(路径, 文本)         script.py 的文本格式，字符串经 StringPool 分配索引，新字符串追加到字符串表末尾
+put_units(路径, 单元列表)     [(类型, 值)]，字符串类单元的值可以是 str 或字符串表索引
+remove(路径)
+
+side_dir 不为空时改动写入该目录（明文，按pvf路径存放），删除记录在 OVERLAY_REMOVED，进程重启后仍然有效。
+commit(output) 沿用源pvf的文件顺序写出，未改动的文件直接复用加密数据，新增文件排在最后。
+"""
+
+OVERLAY_REMOVED = '.overlay-removed.json'
+
+
+def normalize(path: str) -> str:
+    return path.lower().replace('\\', '/').lstrip('/')
+
+
+class Overlay(object):
+
+    def __init__(self, pvf: TinyPVF, side_dir=None):
+        self.pvf = pvf
+        self.side_dir = side_dir
+        self.files = {}     # 路径 -> 明文；旁路目录模式下为 None，读取时再从目录加载
+        self.crcs = {}      # 路径 -> 明文 crc32，作为缓存键的一部分
+        self.removed = set()
+        self._pool = None
+        if side_dir is not None:
+            self.load_side_dir()
+        pvf.overlay = self
+
+    def load_side_dir(self):
+        os.makedirs(self.side_dir, exist_ok=True)
+        for root, _, names in os.walk(self.side_dir):
+            for name in names:
+                path = normalize(os.path.relpath(os.path.join(root, name), self.side_dir).replace(os.sep, '/'))
+                if path != OVERLAY_REMOVED:
+                    self.files[path] = None
+                    with open(os.path.join(root, name), 'rb') as f:
+                        self.crcs[path] = zlib.crc32(f.read())
+        removed = os.path.join(self.side_dir, OVERLAY_REMOVED)
+        if os.path.exists(removed):
+            with open(removed, 'r', encoding='utf8') as f:
+                self.removed = set(json.load(f))
+
+    def side_path(self, path) -> str:
+        return os.path.join(self.side_dir, *path.split('/'))
+
+    def __contains__(self, path):
+        path = normalize(path)
+        return path in self.files or path in self.removed
+
+    def paths(self) -> list:
+        """改动与新增的路径"""
+        return sorted(self.files)
+
+    def get(self, path):
+        """返回覆盖后的明文，已删除的文件返回 b''，不在 overlay 中返回 None"""
+        path = normalize(path)
+        if path in self.removed:
+            return b''
+        if path not in self.files:
+            return None
+        data = self.files[path]
+        if data is None:
+            with open(self.side_path(path), 'rb') as f:
+                data = f.read()
+        return data
+
+    def crc(self, path):
+        """overlay 中文件的 crc32，用于缓存键；已删除返回 -1，不在 overlay 中返回 None"""
+        path = normalize(path)
+        return -1 if path in self.removed else self.crcs.get(path)
+
+    def put(self, path, data: bytes):
+        path = normalize(path)
+        self.removed.discard(path)
+        self.crcs[path] = zlib.crc32(data)
+        if path == 'stringtable.bin':
+            self._pool = None
+        if self.side_dir is not None:
+            target = self.side_path(path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            self.files[path] = None
+            self.save_removed()
+        else:
+            self.files[path] = data
+        self.invalidate(path)
+
+    def remove(self, path):
+        path = normalize(path)
+        if path in self.files:
+            if self.side_dir is not None and os.path.exists(self.side_path(path)):
+                os.remove(self.side_path(path))
+            del self.files[path]
+            del self.crcs[path]
+        if path in self.pvf.headers:
+            self.removed.add(path)
+        self.save_removed()
+        self.invalidate(path)
+
+    def save_removed(self):
+        if self.side_dir is not None:
+            with open(os.path.join(self.side_dir, OVERLAY_REMOVED), 'w', encoding='utf8') as f:
+                json.dump(sorted(self.removed), f)
+
+    @property
+    def pool(self) -> StringPool:
+        """以（可能已被覆盖的）原始字符串表为底的字符串池"""
+        if self._pool is None:
+            self._pool = StringPool(self.pvf.raw_bst, self.pvf.encoding)
+        return self._pool
+
+    def put_units(self, path, units):
+        """
+        先在池的副本上分配索引并编码脚本与字符串表，全部成功后才写入；
+        字符串无法按pvf编码写出时（如简体字写入 big5）抛出 ValueError，overlay 与字符串表保持不变。
+        """
+        pool = self.pool.copy()
+        size = len(pool)
+        try:
+            content = pack_units(script.to_raw(units, pool))
+            table = pack_bst(pool.strings, self.pvf.encoding, 'surrogateescape') if len(pool) > size else None
+        except ValueError as e:
+            raise ValueError(f"{normalize(path)}: {e}") from e
+        if table is not None:
+            # 新字符串追加在末尾，已有索引不变
+            self.put('stringtable.bin', table)
+        self.put(path, content)
+        self._pool = pool
+
+    def put_text(self, path, text: str):
+        self.put_units(path, script.parse(text))
+
+    def invalidate(self, path):
+        """只丢弃该路径的解码结果；字符串相关文件改动时重置字符串表、驻留池与全部解码结果"""
+        pvf = self.pvf
+        if path in STRING_FILES or path.endswith('.str'):
+            for name in ('bst', 'raw_bst', 'lst', 'interned'):
+                pvf.__dict__.pop(name, None)
+            pvf._stt_cache.clear()
+            pvf.cache.invalidate()
+        else:
+            pvf.cache.invalidate(lambda key: key[1] == path)
+
+    def clear(self):
+        """丢弃全部改动"""
+        for path in list(self.files) + list(self.removed):
+            if self.side_dir is not None and os.path.exists(self.side_path(path)):
+                os.remove(self.side_path(path))
+        paths = set(self.files) | self.removed
+        self.files, self.crcs, self.removed = {}, {}, set()
+        self.save_removed()
+        self._pool = None
+        for path in paths:
+            self.invalidate(path)
+
+    def commit(self, output) -> dict:
+        """
+        写出源pvf与 overlay 合并后的新pvf，output 可以与源pvf相同（先写临时文件再替换）。
+        写出后源 TinyPVF 不再对应磁盘上的文件，需要重新打开。
+        """
+        pvf = self.pvf
+        headers = pvf.headers
+        order = sorted((path for path in headers if path not in self.removed), key=lambda x: headers[x]['offset'])
+        order += sorted(path for path in self.files if path not in headers)
+        temp = f"{output}.tmp"
+        changed = 0
+        with PVFWriter(temp, pvf.uuid, pvf.version) as writer:
+            for path in order:
+                data = self.get(path)
+                if data is None:
+                    leaf = headers[path]
+                    writer.add_encrypted(path, pvf.read_bytes(pvf.pack_offset + leaf['offset'], leaf['file_len']),
+                                         leaf['real_len'], leaf['crc32'])
+                    continue
+                crc = zlib.crc32(data)
+                writer.add_encrypted(path, encrypt(data, crc), len(data), crc)
+                changed += 1
+        os.replace(temp, output)
+        return {"files": len(order), "changed": changed, "removed": len(self.removed), "bytes": os.path.getsize(output)}
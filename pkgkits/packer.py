@@ -0,0 +1,176 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: packer.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   20:15
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 将 extract 导出的目录重新打包为pvf，只重新编码有改动的文件。
+"""
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.writer import PVFWriter, StringPool, encrypt, pack_units, pack_lst, pack_bst
+from pkgkits.extract import MANIFEST, load_manifest, make_shards, safe_target
+from pkgkits import script
+
+"""
+流程：
+1. 遍历目录，对照清单：输出内容 crc32 未变、且源pvf中对应文件与导出时一致的，直接复用源pvf中的加密数据；
+2. 其余文件（修改过的、新增的）分片提交到进程池，完成编码与加密；
+3. 按源pvf原有的文件顺序写出，新增文件排在最后；
+4. 源pvf中不在目录里的文件：清单中有记录的视为已删除，不再写出；没有记录的（部分导出时未导出的文件）
+   原样复制源pvf中的加密数据。没有源pvf时无法补齐，部分导出的目录需要显式传入 partial=True 才会打包。
+先写入同目录的临时文件，完成后再替换目标，输出路径可以与源pvf相同。
+
+text 格式的导出目录中，脚本与 lst 引用的字符串需要统一分配字符串表索引：子进程只负责把文本解析为单元，
+主进程以源pvf（或目录中改过的 stringtable.bin）的原始字符串表为池，依次编码，新字符串追加到末尾，
+最后按需重新写出 stringtable.bin。
+"""
+
+
+def encode_file(path, data: bytes, fmt, encoding='big5'):
+    """
+    将导出目录中的文件内容还原为pvf内的明文；text 格式中需要字符串表索引的文件
+    返回 (种类, 解析结果)，种类为 'bst'/'lst'/'script'，由主进程完成编码。
+    """
+    if fmt == 'raw':
+        return data
+    if fmt != 'text':
+        raise ValueError(f"changed files in a {fmt} extraction cannot be re-encoded: {path}")
+    if path.endswith('.str'):
+        return data.decode('utf8', 'surrogateescape').encode(encoding, 'surrogateescape')
+    if path == 'stringtable.bin':
+        return 'bst', script.parse_bst(data.decode('utf8', 'surrogateescape'))
+    if path.endswith('.lst'):
+        return 'lst', script.parse_lst(data.decode('utf8', 'surrogateescape'))
+    if data.startswith(script.HEADER.encode()):
+        return 'script', script.parse(data.decode('utf8', 'surrogateescape'))
+    return data
+
+
+def _pack_shard(shard):
+    """
+    shard 为 [(路径, 文件名, 导出时的crc32或None, 格式, 编码)]，未改动的返回 (路径, None, 0, 0)，
+    需要主进程编码的返回 (路径, (种类, 解析结果), 0, 0)
+    """
+    result = []
+    for path, filename, out_crc, fmt, encoding in shard:
+        with open(filename, 'rb') as f:
+            data = f.read()
+        if out_crc is not None and zlib.crc32(data) == out_crc:
+            result.append((path, None, 0, 0))
+            continue
+        content = encode_file(path, data, fmt, encoding)
+        if isinstance(content, tuple):
+            result.append((path, content, 0, 0))
+            continue
+        crc = zlib.crc32(content)
+        result.append((path, encrypt(content, crc), len(content), crc))
+    return result
+
+
+def _encode_parsed(results, pvf, encoding):
+    """在主进程中为 text 格式解析出的脚本与 lst 分配字符串索引并加密，必要时重写 stringtable.bin"""
+    parsed = {path: item[1] for path, item in results.items() if isinstance(item[1], tuple)}
+    if not parsed:
+        return
+    bst = parsed.pop('stringtable.bin', None)
+    if bst is None and pvf is None:
+        raise ValueError("the source pvf is required to re-encode scripts in a text extraction")
+    # 新字符串在分配索引时就检查能否按目标编码写出，出错时指明文件与字符串
+    pool = StringPool(bst[1] if bst is not None else pvf.raw_bst, encoding)
+    size = len(pool)
+    for path, (kind, value) in parsed.items():
+        try:
+            if kind == 'script':
+                content = pack_units(script.to_raw(value, pool))
+            else:
+                content = pack_lst([(_id, pool(index) if isinstance(index, str) else index) for _id, index in value])
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from e
+        crc = zlib.crc32(content)
+        results[path] = (path, encrypt(content, crc), len(content), crc)
+    if bst is not None or len(pool) > size:
+        try:
+            content = pack_bst(pool.strings, encoding, 'surrogateescape')
+        except ValueError as e:
+            raise ValueError(f"stringtable.bin: {e}") from e
+        crc = zlib.crc32(content)
+        results['stringtable.bin'] = ('stringtable.bin', encrypt(content, crc), len(content), crc)
+
+
+def pack(source_dir, output, source_pvf=None, workers=None, encoding=None, partial=False) -> dict:
+    """
+    打包 source_dir 为 output，source_pvf 缺省使用清单中记录的导出来源，返回统计信息。
+    源pvf不存在时所有文件都重新编码，此时部分导出的目录只有 partial 为真才打包（输出只含目录中的文件）。
+    """
+    manifest = load_manifest(source_dir)
+    fmt = manifest["source"].get("format", 'raw')
+    encoding = encoding or manifest["source"].get("encoding", 'big5')
+    source_pvf = source_pvf or manifest["source"].get("path")
+    pvf = TinyPVF(source_pvf, encoding, cache_bytes=0) if source_pvf and os.path.exists(source_pvf) else None
+    headers = pvf.headers if pvf is not None else {}
+    if pvf is None and manifest["source"].get("patterns") and not partial:
+        raise ValueError(f"{source_dir} is a partial extraction ({', '.join(manifest['source']['patterns'])}) "
+                         f"and the source pvf is missing, use partial=True (--partial) to pack only the extracted files")
+
+    tasks = []
+    for root, _, names in os.walk(source_dir):
+        for name in names:
+            filename = os.path.join(root, name)
+            path = os.path.relpath(filename, source_dir).replace(os.sep, '/').lower()
+            if path == MANIFEST:
+                continue
+            # 指向目录之外的符号链接不打包
+            if safe_target(source_dir, os.path.relpath(filename, source_dir).replace(os.sep, '/')) is None:
+                print(f"Error :path escapes the source directory, {filename}")
+                continue
+            entry = manifest["files"].get(path)
+            leaf = headers.get(path)
+            reusable = entry is not None and leaf is not None and (leaf['crc32'], leaf['real_len']) == tuple(entry[:2])
+            tasks.append((path, filename, entry[2] if reusable else None, fmt, encoding))
+
+    workers = workers or os.cpu_count() or 1
+    shards = make_shards(tasks, workers * 4, lambda x: os.path.getsize(x[1]))
+    results = {}
+    if workers == 1:
+        for shard in shards:
+            results.update((item[0], item) for item in _pack_shard(shard))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for chunk in pool.map(_pack_shard, shards):
+                results.update((item[0], item) for item in chunk)
+    _encode_parsed(results, pvf, encoding)
+
+    # 未导出的文件沿用源pvf，清单中有记录、目录中已不存在的才是删除
+    removed = 0
+    for path in headers.keys() - results.keys():
+        if path in manifest["files"]:
+            removed += 1
+        else:
+            results[path] = (path, None, 0, 0)
+
+    # 沿用源pvf的文件顺序，新增文件按路径排在最后
+    order = sorted((path for path in results if path in headers), key=lambda x: headers[x]['offset'])
+    order += sorted(path for path in results if path not in headers)
+    temp = f"{output}.tmp"
+    uuid, version = (pvf.uuid, pvf.version) if pvf is not None else (b'\x00' * 36, 1)
+    reused = 0
+    with PVFWriter(temp, uuid, version) as writer:
+        for path in order:
+            _, data, length, crc = results[path]
+            if data is None:
+                leaf = headers[path]
+                data, length, crc = pvf.read_bytes(pvf.pack_offset + leaf['offset'], leaf['file_len']), leaf['real_len'], leaf['crc32']
+                reused += 1
+            writer.add_encrypted(path, data, length, crc)
+    if pvf is not None:
+        pvf.fp.close()
+    os.replace(temp, output)
+    return {"files": len(order), "reused": reused, "encoded": len(order) - reused,
+            "removed": removed, "bytes": os.path.getsize(output)}
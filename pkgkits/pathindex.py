@@ -0,0 +1,95 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: pathindex.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   12:05
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 基于有序路径的pvf目录索引，支持前缀区间查询、通配匹配与目录统计。
+"""
+import re
+import fnmatch
+from bisect import bisect_left
+from itertools import accumulate
+
+"""
+所有路径排序后，同一目录下的文件在有序数组中是连续的一段，
+目录 "a/b/" 对应区间 [bisect_left("a/b/"), bisect_left("a/b0"))（'0' 是 '/' 的下一个字符），
+配合文件大小的前缀和，目录内文件数与总大小都是 O(log n) 查询，不需要构建嵌套字典。
+"""
+
+_WILDCARDS = re.compile(r'[*?\[]')
+
+
+def normalize_dir(directory: str) -> str:
+    directory = directory.lower().replace('\\', '/').strip('/')
+    return f"{directory}/" if directory else ''
+
+
+class PathIndex(object):
+    """pvf文件路径的有序索引"""
+
+    def __init__(self, headers: dict):
+        self.paths = sorted(headers)
+        self.sizes = [headers[path]['file_len'] for path in self.paths]
+        self.cumsize = [0] + list(accumulate(self.sizes))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def span(self, prefix: str):
+        """返回以 prefix 开头的路径在有序数组中的区间 [lo, hi)"""
+        lo = bisect_left(self.paths, prefix)
+        if not prefix:
+            return lo, len(self.paths)
+        # 前缀最后一个字符加一，得到区间上界
+        hi = bisect_left(self.paths, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+        return lo, hi
+
+    def files(self, directory: str = '') -> list:
+        """目录下（含子目录）的全部文件路径"""
+        lo, hi = self.span(normalize_dir(directory))
+        return self.paths[lo:hi]
+
+    def stat(self, directory: str = '') -> dict:
+        """目录下（含子目录）的文件数与总大小"""
+        lo, hi = self.span(normalize_dir(directory))
+        return {"count": hi - lo, "size": self.cumsize[hi] - self.cumsize[lo]}
+
+    def listdir(self, directory: str = '') -> dict:
+        """
+        列出目录的直接子项，返回 {"dirs": {name: {"count", "size"}}, "files": {name: size}}。
+        遇到子目录时直接跳过其整个区间，复杂度与子项数量相关，与文件总数无关。
+        """
+        prefix = normalize_dir(directory)
+        lo, hi = self.span(prefix)
+        dirs, files = {}, {}
+        i = lo
+        while i < hi:
+            rest = self.paths[i][len(prefix):]
+            if '/' in rest:
+                name = rest.split('/', 1)[0]
+                end = bisect_left(self.paths, f"{prefix}{name}0", i, hi)
+                dirs[name] = {"count": end - i, "size": self.cumsize[end] - self.cumsize[i]}
+                i = end
+            else:
+                files[rest] = self.sizes[i]
+                i += 1
+        return {"dirs": dirs, "files": files}
+
+    def glob(self, pattern: str) -> list:
+        """
+        通配匹配（fnmatch 语义，* 可跨目录），例如 "equipment/character/mage/*.equ"、"*.stk"。
+        只在通配符之前的字面前缀区间内匹配。
+        """
+        pattern = pattern.lower().replace('\\', '/').lstrip('/')
+        match = _WILDCARDS.search(pattern)
+        if match is None:
+            lo, hi = self.span(pattern)
+            return [path for path in self.paths[lo:hi] if path == pattern]
+        lo, hi = self.span(pattern[:match.start()])
+        regex = re.compile(fnmatch.translate(pattern))
+        return [path for path in self.paths[lo:hi] if regex.match(path)]
@@ -0,0 +1,159 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: profiler.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   13:02
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: pvf解析流程的分阶段计时与计数，默认关闭。
+"""
+import json
+import threading
+from time import perf_counter
+from functools import wraps
+from contextlib import contextmanager
+
+"""
+阶段（stage）名称约定：
+header_decrypt 头部文件树解密 | load_bst 字符串表加载 | read 单文件读取 | decrypt 单文件解密
+unit_decode 单元解析（包含 convert） | convert 繁简转换 | build_tree 构建树 | parse 物品字段解析
+计数（counter）以 "<缓存名>.hit" / "<缓存名>.miss" 命名时，会在 snapshot 中汇总命中率。
+
+用法：
+    with pvf_stats.measure() as stats:
+        api.get_equipments()
+    print(stats.snapshot())
+"""
+
+
+class _NullStage(object):
+    """关闭时复用的空上下文，避免每次调用创建对象"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+
+    def __init__(self, stats, name, nbytes):
+        self.stats = stats
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.record(self.name, perf_counter() - self.start, self.nbytes)
+        return False
+
+
+class PVFStats(object):
+    """分阶段计时器与计数器"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.seconds = {}
+            self.calls = {}
+            self.bytes = {}
+            self.counters = {}
+
+    def stage(self, name, nbytes=0):
+        """计时上下文，关闭时返回共享的空上下文"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, nbytes)
+
+    def timed(self, name):
+        """计时装饰器，关闭时只多一次属性判断"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds, nbytes=0):
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.bytes[name] = self.bytes.get(name, 0) + nbytes
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """返回当前统计的字典形式"""
+        with self._lock:
+            stages = {}
+            for name, seconds in self.seconds.items():
+                nbytes = self.bytes[name]
+                stages[name] = {
+                    "calls": self.calls[name],
+                    "seconds": round(seconds, 6),
+                    "bytes": nbytes,
+                    "mb_per_s": round(nbytes / seconds / 2 ** 20, 3) if nbytes and seconds else None,
+                }
+            caches = {}
+            for name, value in self.counters.items():
+                if name.endswith('.hit'):
+                    cache = name[:-4]
+                    miss = self.counters.get(f"{cache}.miss", 0)
+                    caches[cache] = {"hit": value, "miss": miss, "hit_rate": round(value / (value + miss), 4)}
+            return {"stages": stages, "counters": dict(self.counters), "caches": caches}
+
+    def to_json(self, path=None) -> str:
+        """导出为 json 文本，给定 path 时同时写入文件"""
+        text = json.dumps(self.snapshot(), indent=4, ensure_ascii=False)
+        if path is not None:
+            with open(path, 'w', encoding='utf8') as f:
+                f.write(text)
+        return text
+
+    @contextmanager
+    def measure(self, reset=True):
+        """在上下文内开启统计，退出后恢复原状态"""
+        previous = self.enabled
+        if reset:
+            self.reset()
+        self.enabled = True
+        try:
+            yield self
+        finally:
+            self.enabled = previous
+
+    def __repr__(self):
+        lines = []
+        for name, item in sorted(self.snapshot()["stages"].items(), key=lambda x: -x[1]["seconds"]):
+            lines.append(f"{name:<16}{item['calls']:>10}{item['seconds']:>12.4f}s{item['bytes']:>14}B")
+        return '\n'.join(lines) if lines else 'PVFStats <empty>'
+
+    __str__ = __repr__
+
+
+# 进程内共享的统计对象，TinyPVF 与 PVFApi 均写入此处
+pvf_stats = PVFStats()
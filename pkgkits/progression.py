@@ -0,0 +1,126 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: progression.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   02:50
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 经验表与职业、成长类型的预计算数组，按角色批量计算等级与升级进度。
+"""
+import io
+import numpy as np
+
+"""
+PVFApi.get_exp 返回 exptable.tbl 中的整数列表，get_jobs 逐个解析 .chr 得到职业名与成长类型名，
+统计与奖励计算每个角色都要调用一遍。这里一次性转换为数组：
+cumulative      cumulative[L-1] 为完成第 L 级（升到 L+1 级）所需的累计经验，与 export exp 的 level 编号一致；
+                exptable.tbl 的值本身就是累计值，若是每级增量则以 cumulative=False 构建，由 cumsum 得到
+level           1 + searchsorted(cumulative, 经验, 'right')，不超过 max_level，一次调用处理任意多行
+job_names       job_names[职业编号]，缺失的编号为 ''
+growtype_names  growtype_names[职业编号, 成长类型编号]，缺失为 ''
+有 DiskCache 时以 progression.npz 缓存，随 pvf 版本失效。
+"""
+
+
+class Progression(object):
+
+    def __init__(self, cumulative, job_names, growtype_names, max_level=None):
+        self.cumulative = np.asarray(cumulative, dtype=np.int64)
+        self.job_names = np.asarray(job_names, dtype=str)
+        self.growtype_names = np.asarray(growtype_names, dtype=str)
+        self.max_level = len(self.cumulative) if max_level is None else max_level
+        # starts[L-1] 为到达第 L 级时的累计经验
+        self.starts = np.append(0, self.cumulative)
+
+    @classmethod
+    def build(cls, exps, job_map: dict, job_type_map: dict, cumulative=True):
+        """exps、job_map、job_type_map 为 PVFApi.get_exp 与 get_jobs 的返回值"""
+        exps = np.asarray(exps, dtype=np.int64)
+        table = exps if cumulative else np.cumsum(exps)
+        if len(table) > 1 and (np.diff(table) < 0).any():
+            raise ValueError("the exp table is not cumulative, build with cumulative=False")
+        jobs = max(list(job_map) + list(job_type_map) + [-1]) + 1
+        width = max([max(types, default=-1) for types in job_type_map.values()] + [-1]) + 1
+        job_names = np.full(jobs, '', dtype=object)
+        growtype_names = np.full((jobs, width), '', dtype=object)
+        for job, name in job_map.items():
+            job_names[job] = str(name)
+        for job, types in job_type_map.items():
+            for grow, name in types.items():
+                growtype_names[job, grow] = str(name)
+        return cls(table, job_names.astype(str), growtype_names.astype(str))
+
+    @classmethod
+    def open(cls, api, cache=None):
+        """从 PVFApi 构建，有 DiskCache 时优先读取 progression.npz"""
+        pvf = api.pvf
+        if cache is not None and cache.exists(pvf, 'progression.npz'):
+            try:
+                return cls.load(cache.path(pvf, 'progression.npz'))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error :{e}, {cache.path(pvf, 'progression.npz')}")
+        progression = cls.build(api.get_exp(), *api.get_jobs())
+        if cache is not None:
+            cache.write_bytes(pvf, 'progression.npz', progression.save_bytes())
+        return progression
+
+    def save_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(buffer, cumulative=self.cumulative, job_names=self.job_names, growtype_names=self.growtype_names,
+                 max_level=np.int64(self.max_level))
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls, source):
+        """source 为 npz 文件路径或字节"""
+        with np.load(io.BytesIO(source) if isinstance(source, bytes) else source) as data:
+            return cls(data['cumulative'], data['job_names'], data['growtype_names'], int(data['max_level']))
+
+    def level(self, exp) -> np.ndarray:
+        """累计经验 -> 等级（从1开始），exp 可以是标量或任意形状的数组"""
+        levels = np.searchsorted(self.cumulative, np.asarray(exp, dtype=np.int64), side='right') + 1
+        return np.minimum(levels, self.max_level)
+
+    def exp_at(self, level) -> np.ndarray:
+        """到达该等级时的累计经验"""
+        return self.starts[np.clip(np.asarray(level, dtype=np.int64), 1, len(self.starts)) - 1]
+
+    def progress(self, exp):
+        """返回 (等级, 当前等级内已获得经验, 升级还需经验, 进度 0~1)，满级时还需经验为 0、进度为 1"""
+        exp = np.asarray(exp, dtype=np.int64)
+        levels = self.level(exp)
+        start = self.starts[levels - 1]
+        end = self.starts[np.minimum(levels, len(self.starts) - 1)]
+        capped = (levels >= self.max_level) | (end <= start)
+        span = np.where(capped, 1, end - start)
+        gained = exp - start
+        remaining = np.where(capped, 0, np.maximum(end - exp, 0))
+        ratio = np.where(capped, 1.0, np.clip(gained / span, 0.0, 1.0))
+        return levels, gained, remaining, ratio
+
+    def job_name(self, job) -> np.ndarray:
+        """职业编号 -> 名称，越界为 ''"""
+        job = np.asarray(job, dtype=np.int64)
+        if not len(self.job_names):
+            return np.full(job.shape, '')
+        valid = (job >= 0) & (job < len(self.job_names))
+        return np.where(valid, self.job_names[np.where(valid, job, 0)], '')
+
+    def growtype_name(self, job, grow) -> np.ndarray:
+        """(职业编号, 成长类型编号) -> 成长类型名称，越界为 ''"""
+        job, grow = np.broadcast_arrays(np.asarray(job, dtype=np.int64), np.asarray(grow, dtype=np.int64))
+        rows, width = self.growtype_names.shape
+        if not rows or not width:
+            return np.full(job.shape, '')
+        valid = (job >= 0) & (job < rows) & (grow >= 0) & (grow < width)
+        return np.where(valid, self.growtype_names[np.where(valid, job, 0), np.where(valid, grow, 0)], '')
+
+    def codes(self) -> dict:
+        """名称 -> 编号：{"jobs": {职业名: 编号}, "growtypes": {(职业编号, 成长类型名): 成长类型编号}}"""
+        jobs = {name: job for job, name in enumerate(self.job_names.tolist()) if name}
+        growtypes = {(job, name): grow for job, names in enumerate(self.growtype_names.tolist())
+                     for grow, name in enumerate(names) if name}
+        return {"jobs": jobs, "growtypes": growtypes}
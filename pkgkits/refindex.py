@@ -0,0 +1,242 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: refindex.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   22:10
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 反向引用索引：某个物品id、.str 键、字符串表索引或文件路径被哪些脚本引用。
+"""
+import io
+import os
+import re
+import mmap
+import posixpath
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.writer import SCRIPT_HEAD
+from pkgkits.script import STRING_TYPES
+from pkgkits.extract import make_shards
+
+"""
+一次多进程扫描全部脚本文件（含 lst），每个子进程 mmap pvf，直接在原始单元数组上用 numpy 提取出站引用：
+item    ITEM_SECTIONS 中段落下的整数（按步长取物品id，如 [reward item] 为 id 数量 交替）
+key     类型9+10：n_string.lst 中的 .str 编号与键
+string  字符串类单元（类型5~8、10）引用的字符串表索引
+file    形如路径的字符串（相对当前文件目录或根目录解析）
+主进程把 (键, 文件编号) 按键排序成 CSR 形式的倒排表：keys[i] 对应 files[postings[offsets[i]:offsets[i+1]]]，
+以 npz 保存；加载后为每类键建一次 {键: 行号} 字典，查询为 O(1)。
+"""
+
+# 段落标签: 步长，段落内类型2的整数每隔“步长”个取一个作为物品id，按需补充
+ITEM_SECTIONS = {
+    '[reward item]': 2,
+    '[reward selection item]': 2,
+    '[item]': 1,
+    '[need item]': 2,
+    '[booster]': 2,
+}
+KINDS = ('item', 'key', 'string', 'file')
+PATH_LIKE = re.compile(r'^[^\s`<>|*?"\[\]]+\.[a-z0-9]{2,4}$')
+UNIT_DTYPE = np.dtype([('t', 'u1'), ('v', '<i4')])
+
+# 子进程内的状态，由 _init_worker 设置
+_worker = {}
+
+
+def _init_worker(pvf_path, pack_offset, item_steps, path_like):
+    f = open(pvf_path, 'rb')
+    _worker.update(file=f, mm=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), pack_offset=pack_offset,
+                   item_steps=item_steps, path_like=path_like)
+
+
+def _dedupe(keys, owners):
+    """去掉同一文件内重复的 (键, 文件编号)"""
+    order = np.lexsort((keys, owners))
+    keys, owners = keys[order], owners[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+    return keys[keep], owners[keep]
+
+
+def scan_units(types, values, owner, item_steps, path_like) -> dict:
+    """
+    从多个文件拼接而成的原始单元中提取出站引用，owner 为每个单元所属文件的编号，
+    item_steps[字符串索引] 为该段落标签的物品id步长（0 表示不是物品段落），path_like[字符串索引] 标记形如路径的字符串。
+    返回 {类别: (键数组, 文件编号数组)}，file 类的键为字符串索引，由调用方解析为路径。
+    整个分片一次完成，避免逐文件调用 numpy 的固定开销。
+    """
+    values = values.astype(np.int64)
+    refs = {}
+    strings = np.isin(types, STRING_TYPES) & (values >= 0) & (values < len(path_like))
+    refs['string'] = (values[strings], owner[strings])
+    paths = strings.copy()
+    paths[strings] = path_like[values[strings]]
+    refs['file'] = (values[paths], owner[paths])
+
+    # 类型9后紧跟同一文件内的类型10时组成 (编号, 键索引)，打包为一个 int64
+    nine = np.flatnonzero((types[:-1] == 9) & (types[1:] == 10) & (owner[:-1] == owner[1:]))
+    refs['key'] = ((values[nine] << 32) | (values[nine + 1] & 0xFFFFFFFF), owner[nine])
+
+    # 每个单元所属段落为它之前最近的类型5标签，段落内类型2的整数按步长取物品id
+    tags = np.flatnonzero(types == 5)
+    if len(tags):
+        tag_values = values[tags]
+        valid = (tag_values >= 0) & (tag_values < len(item_steps))
+        steps = np.where(valid, item_steps[np.where(valid, tag_values, 0)], 0)
+        section = np.searchsorted(tags, np.arange(len(types)), side='right') - 1
+        in_section = section >= 0
+        section = np.maximum(section, 0)
+        step = np.where(in_section & (owner == owner[tags[section]]), steps[section], 0)
+        candidates = np.flatnonzero((types == 2) & (step > 0))
+        sections = section[candidates]
+        first = np.flatnonzero(np.r_[True, sections[1:] != sections[:-1]])
+        rank = np.arange(len(candidates)) - np.repeat(first, np.diff(np.r_[first, len(candidates)]))
+        items = candidates[rank % step[candidates] == 0]
+    else:
+        items = np.empty(0, np.int64)
+    refs['item'] = (values[items], owner[items])
+    return {kind: _dedupe(*pair) for kind, pair in refs.items()}
+
+
+def _index_shard(shard):
+    """shard 为 [(路径, 偏移, 补齐长度, 实际长度, crc32)]，返回 (脚本路径列表, scan_units 结果)，非脚本文件跳过"""
+    mm, base = _worker['mm'], _worker['pack_offset']
+    paths, chunks = [], []
+    for path, offset, file_len, real_len, crc in shard:
+        start = base + offset
+        body = TinyPVF.decrypt(mm[start:start + file_len], crc)[:real_len]
+        if body[:2] != SCRIPT_HEAD:
+            continue
+        paths.append(path)
+        chunks.append(np.frombuffer(body, dtype=UNIT_DTYPE, count=(len(body) - 2) // 5, offset=2))
+    if not chunks:
+        return paths, {kind: (np.empty(0, np.int64), np.empty(0, np.int64)) for kind in KINDS}
+    units = np.concatenate(chunks)
+    owner = np.repeat(np.arange(len(chunks)), [len(chunk) for chunk in chunks])
+    return paths, scan_units(units['t'], units['v'], owner, _worker['item_steps'], _worker['path_like'])
+
+
+def _csr(keys, files):
+    """(键, 文件编号) -> (有序唯一键, 偏移, 文件编号)"""
+    order = np.argsort(keys, kind='stable')
+    keys, files = keys[order], files[order].astype(np.int32)
+    unique, starts = np.unique(keys, return_index=True)
+    return unique, np.append(starts, len(keys)).astype(np.int64), files
+
+
+class RefIndex(object):
+    """反向引用索引，由 build 构建或从 npz 加载"""
+
+    def __init__(self, files, tables):
+        self.files = list(files)
+        self.tables = tables  # kind -> (keys, offsets, postings)，另有 file_names、key_names 与键一一对应
+        self._rows = {}
+
+    @classmethod
+    def build(cls, pvf: TinyPVF, workers=None):
+        strings = pvf.raw_bst
+        item_steps = np.array([ITEM_SECTIONS.get(s, 0) for s in strings], dtype=np.int64)
+        path_like = np.array([PATH_LIKE.match(s.lower()) is not None for s in strings], dtype=bool)
+        leaves = [leaf for path, leaf in pvf.headers.items() if path != 'stringtable.bin' and not path.endswith('.str')]
+        items = [(leaf['fp'], leaf['offset'], leaf['file_len'], leaf['real_len'], leaf['crc32']) for leaf in leaves]
+
+        workers = workers or os.cpu_count() or 1
+        shards = make_shards(items, workers * 4, lambda x: x[2])
+        init_args = (pvf.pvf_path, pvf.pack_offset, item_steps, path_like)
+        files, pairs = [], {kind: [(np.empty(0, np.int64), np.empty(0, np.int64))] for kind in KINDS}
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            for paths, refs in pool.map(_index_shard, shards):
+                for kind, (keys, owners) in refs.items():
+                    pairs[kind].append((keys, owners + len(files)))
+                files.extend(paths)
+        pairs = {kind: tuple(np.concatenate(arrays) for arrays in zip(*pairs[kind])) for kind in KINDS}
+
+        # 路径解析为目标路径的编号，不存在的目标也记录，便于发现缺失文件
+        names = {}
+        string_ids, owners = pairs['file']
+        targets = [names.setdefault(cls.resolve(pvf.headers, files[owner], strings[index]), len(names))
+                   for index, owner in zip(string_ids.tolist(), owners.tolist())]
+        pairs['file'] = _dedupe(np.array(targets, dtype=np.int64), owners)
+
+        tables = {kind: _csr(*pairs[kind]) for kind in KINDS}
+        names = list(names)
+        tables['file_names'] = np.array([names[key] for key in tables['file'][0].tolist()], dtype=str)
+        tables['key_names'] = np.array([strings[key & 0xFFFFFFFF] if (key & 0xFFFFFFFF) < len(strings) else ''
+                                        for key in tables['key'][0].tolist()], dtype=str)
+        return cls(files, tables)
+
+    @staticmethod
+    def resolve(headers, path, target) -> str:
+        """脚本中的路径先按当前文件所在目录解析，找不到时按根目录解析"""
+        target = target.lower().replace('\\', '/')
+        relative = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+        return relative if relative in headers else target.lstrip('/')
+
+    def save_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        arrays = {f"{kind}_{name}": array for kind in KINDS
+                  for name, array in zip(('keys', 'offsets', 'postings'), self.tables[kind])}
+        np.savez_compressed(buffer, files=np.array(self.files, dtype=str), file_names=self.tables['file_names'],
+                            key_names=self.tables['key_names'], **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls, source):
+        """source 为 npz 文件路径或字节"""
+        with np.load(io.BytesIO(source) if isinstance(source, bytes) else source) as data:
+            tables = {kind: tuple(data[f"{kind}_{name}"] for name in ('keys', 'offsets', 'postings')) for kind in KINDS}
+            tables.update(file_names=data['file_names'], key_names=data['key_names'])
+            return cls(data['files'].tolist(), tables)
+
+    @classmethod
+    def open(cls, pvf: TinyPVF, cache=None, workers=None):
+        """有 DiskCache 时优先读取 refindex.npz，缺失或损坏时重新扫描并写入"""
+        if cache is not None and cache.exists(pvf, 'refindex.npz'):
+            try:
+                return cls.load(cache.path(pvf, 'refindex.npz'))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error :{e}, {cache.path(pvf, 'refindex.npz')}")
+        index = cls.build(pvf, workers)
+        if cache is not None:
+            cache.write_bytes(pvf, 'refindex.npz', index.save_bytes())
+        return index
+
+    def rows(self, kind) -> dict:
+        """{键: 倒排表行号}，file 的键为路径，key 的键为 (编号, 键文本)"""
+        if kind not in self._rows:
+            keys = self.tables[kind][0].tolist()
+            if kind == 'file':
+                keys = self.tables['file_names'].tolist()
+            elif kind == 'key':
+                keys = [(key >> 32, name) for key, name in zip(keys, self.tables['key_names'].tolist())]
+            self._rows[kind] = {key: row for row, key in enumerate(keys)}
+        return self._rows[kind]
+
+    def lookup(self, kind, key) -> list:
+        """kind 为 KINDS 之一，返回引用该键的文件路径"""
+        row = self.rows(kind).get(key)
+        if row is None:
+            return []
+        keys, offsets, postings = self.tables[kind]
+        return sorted(self.files[i] for i in postings[offsets[row]:offsets[row + 1]].tolist())
+
+    def item(self, item_id) -> list:
+        return self.lookup('item', int(item_id))
+
+    def string(self, index) -> list:
+        return self.lookup('string', int(index))
+
+    def key(self, lst_id, key) -> list:
+        """类型9+10 引用，lst_id 为 n_string.lst 中的编号，key 为 .str 中的键（原始字符串）"""
+        return self.lookup('key', (int(lst_id), key))
+
+    def file(self, path) -> list:
+        return self.lookup('file', path.lower().replace('\\', '/').lstrip('/'))
+
+    def stats(self) -> dict:
+        return {"files": len(self.files), **{kind: len(self.tables[kind][0]) for kind in KINDS}}
@@ -0,0 +1,142 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: reload.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   17:02
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: pvf热更新：轮询文件变化，后台构建新索引后原子替换。
+"""
+import os
+import struct
+import threading
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.cache import DEFAULT_CACHE_BYTES
+
+"""
+变化检测分两级：先比较 (大小, mtime)，变化后再读取头部的文件树 CRC 确认；
+同时要求连续两次轮询签名一致，避免在运维拷贝文件的过程中读到半个文件。
+新旧文件树按每个文件的 crc32 与长度比较，得到真正变化的路径集合，
+回调据此只失效这些路径对应的缓存。
+"""
+
+# 变化后所有文件的解码结果都会受影响
+STRING_FILES = ('stringtable.bin', 'n_string.lst')
+
+
+def pvf_signature(pvf_path):
+    """返回 (大小, mtime_ns, 文件树CRC)，文件不可读时返回 None"""
+    try:
+        stat = os.stat(pvf_path)
+        with open(pvf_path, 'rb') as f:
+            uuid_len = struct.unpack('i', f.read(4))[0]
+            f.seek(4 + uuid_len + 8)
+            crc = struct.unpack('I', f.read(4))[0]
+    except (OSError, struct.error):
+        return None
+    return stat.st_size, stat.st_mtime_ns, crc
+
+
+def diff_headers(old: dict, new: dict) -> set:
+    """比较两份 headers，返回新增、删除或内容变化的路径"""
+    changed = set(old.keys() ^ new.keys())
+    for path, leaf in new.items():
+        before = old.get(path)
+        if before is not None and (before['crc32'], before['file_len']) != (leaf['crc32'], leaf['file_len']):
+            changed.add(path)
+    return changed
+
+
+class PVFWatcher(object):
+    """
+    持有当前的 TinyPVF，并在文件变化时后台重建、原子替换。
+    未定义的属性转发给当前实例，因此可以直接替代 TinyPVF 使用，
+    每次属性访问都拿到最新的实例，调用方无需重启。
+    """
+
+    def __init__(self, pvf_path, encoding='big5', interval=5.0, on_reload=None, pvf=None, cache_bytes=None):
+        self.pvf_path = pvf_path
+        self.encoding = encoding
+        self.interval = interval
+        self.callbacks = [on_reload] if on_reload else []
+        # 解码缓存上限，重载时新实例沿用；缺省取传入实例的设置
+        if cache_bytes is None:
+            cache_bytes = pvf.cache.max_bytes if pvf is not None else DEFAULT_CACHE_BYTES
+        self.cache_bytes = cache_bytes
+        # 可传入已构建好的实例，避免重复解析
+        self.current = pvf if pvf is not None else TinyPVF(pvf_path, encoding, cache_bytes)
+        self.signature = pvf_signature(pvf_path)
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __getattr__(self, item):
+        current = self.__dict__.get('current')
+        if current is None:
+            raise AttributeError(item)
+        return getattr(current, item)
+
+    def subscribe(self, callback):
+        """注册回调 callback(old, new, changed_paths)"""
+        self.callbacks.append(callback)
+
+    def poll(self) -> bool:
+        """检查一次文件变化，签名稳定后执行重载，返回是否发生了重载"""
+        signature = pvf_signature(self.pvf_path)
+        if signature is None or signature == self.signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # 第一次发现变化，等下一次轮询确认文件已写完
+            self._pending = signature
+            return False
+        return self.reload(signature)
+
+    def reload(self, signature=None) -> bool:
+        """构建新实例并替换，新实例构建失败时保留旧实例"""
+        with self._lock:
+            signature = pvf_signature(self.pvf_path) if signature is None else signature
+            try:
+                new = TinyPVF(self.pvf_path, self.encoding, self.cache_bytes)
+                new.preload()
+            except Exception as e:
+                print(f"Reload Error :{e}, {self.pvf_path}")
+                return False
+            old = self.current
+            changed = diff_headers(old.headers, new.headers)
+            if not any(path in STRING_FILES or path.endswith('.str') for path in changed):
+                # 解码缓存的键带有文件 crc，字符串未变化时可以直接沿用，变化文件的旧条目主动释放
+                old.cache.invalidate(lambda key: key[1] in changed)
+                new.cache = old.cache
+            self.current = new
+            self.signature = signature
+            self._pending = None
+            for callback in self.callbacks:
+                try:
+                    callback(old, new, changed)
+                except Exception as e:
+                    # 回调失败不能中断轮询线程，订阅方继续使用自己持有的旧数据
+                    print(f"Reload Error :{e}, callback {callback}")
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        """启动后台轮询线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='pvf-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
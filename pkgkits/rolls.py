@@ -0,0 +1,195 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: rolls.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   02:20
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 魔法封印与时装潜力的抽取模拟：选项表编译为 numpy 数组，按批抽取，给出分布与期望。
+"""
+import numpy as np
+
+"""
+选项表（OptionTable）编译后的形式：
+probs       每个选项被抽中的概率，cdf 为其累积和，抽选项为一次 searchsorted；
+values      全部选项的候选值首尾相接，offsets[i]:offsets[i+1] 为第 i 个选项的候选值；
+flat_cdf    候选值在选项内的累积概率再加上所属选项的编号，严格递增，
+            抽值时以 选项编号 + 均匀随机数 在 flat_cdf 中 searchsorted，一次完成所有选项的抽取。
+魔法封印（PVFApi.get_magic_steal）：选项为 [postfix] 下的各个标签，候选值为标签下的整数，缺省等概率；
+时装潜力（PVFApi.get_avatar_roulette）：upper 与 rare 两个池，rare_rate 为抽中 rare 池的概率（pvf 中没有该值，需要按版本设定），
+池内等概率，同名选项在两个池中分别计数。
+模拟按 batch_size 分批，只累计计数与和，内存与抽取次数无关；同一 seed 结果可复现。
+slots 为每次封印的词条数，各词条独立抽取（允许重复）。
+"""
+
+DEFAULT_BATCH = 1 << 20
+DEFAULT_RARE_RATE = 0.1
+SEAL_FILE = 'etc/randomoption/randomizedoptionoverall2.etc'
+
+
+def normalize(weights) -> np.ndarray:
+    weights = np.asarray(weights, dtype=np.float64)
+    total = weights.sum()
+    if total <= 0 or (weights < 0).any():
+        raise ValueError(f"weights must be non-negative and not all zero: {weights}")
+    return weights / total
+
+
+class OptionTable(object):
+    """
+    names 为选项名，values 为每个选项的候选值列表，weights 为选项权重（缺省等概率），
+    value_weights 为每个选项内候选值的权重列表（缺省等概率）。
+    """
+
+    def __init__(self, names, values, weights=None, value_weights=None):
+        if not names:
+            raise ValueError("an option table needs at least one option")
+        if any(len(candidates) == 0 for candidates in values):
+            raise ValueError("every option needs at least one candidate value")
+        self.names = list(names)
+        self.probs = normalize(np.ones(len(names)) if weights is None else weights)
+        self.cdf = np.cumsum(self.probs)
+        self.cdf[-1] = 1.0
+        lengths = np.array([len(candidates) for candidates in values], dtype=np.int64)
+        self.offsets = np.append(0, np.cumsum(lengths))
+        self.values = np.concatenate([np.asarray(candidates, dtype=np.float64) for candidates in values])
+        self.owner = np.repeat(np.arange(len(names)), lengths)
+        if value_weights is None:
+            within = np.ones(len(self.values))
+        else:
+            within = np.concatenate([np.asarray(w, dtype=np.float64) for w in value_weights])
+        # 选项内归一化
+        within = within / np.add.reduceat(within, self.offsets[:-1])[self.owner]
+        self.value_probs = within
+        running = np.cumsum(within)
+        cumulative = running - np.append(0, running)[self.offsets[:-1]][self.owner]
+        cumulative[self.offsets[1:] - 1] = 1.0
+        self.flat_cdf = self.owner + cumulative
+
+    def __len__(self):
+        return len(self.names)
+
+    def means(self) -> np.ndarray:
+        """每个选项候选值的期望"""
+        return np.add.reduceat(self.values * self.value_probs, self.offsets[:-1])
+
+    def prices(self, prices=None) -> np.ndarray:
+        """{选项名: 单位价值} -> 按选项排列的数组，缺省为 1"""
+        if prices is None:
+            return np.ones(len(self.names))
+        return np.array([prices.get(name, 0.0) for name in self.names], dtype=np.float64)
+
+    def expected(self, prices=None, slots=1) -> float:
+        """一次抽取（slots 个词条）的期望价值：Σ 概率 × 候选值期望 × 单位价值"""
+        return float((self.probs * self.means() * self.prices(prices)).sum() * slots)
+
+    def draw_options(self, rng, size) -> np.ndarray:
+        return np.minimum(np.searchsorted(self.cdf, rng.random(size), side='right'), len(self.names) - 1)
+
+    def draw_values(self, rng, options) -> np.ndarray:
+        """返回候选值在 values 中的下标"""
+        index = np.searchsorted(self.flat_cdf, options + rng.random(options.shape), side='right')
+        return np.minimum(index, self.offsets[options + 1] - 1)
+
+
+def seal_table(magic_seal_map: dict, weights=None) -> OptionTable:
+    """由 get_magic_steal 的结果编译，weights 为 {选项标签: 权重}；没有整数候选值的选项跳过"""
+    names, values = [], []
+    for name, candidates in magic_seal_map.items():
+        numbers = [value for value in candidates if isinstance(value, (int, float))]
+        if numbers:
+            names.append(str(name))
+            values.append(numbers)
+    return OptionTable(names, values, None if weights is None else [weights.get(name, 0.0) for name in names])
+
+
+def roulette_table(uppers, rares, rare_rate=DEFAULT_RARE_RATE) -> OptionTable:
+    """由 get_avatar_roulette 的结果编译，选项名为 upper:名称 或 rare:名称，候选值为 1"""
+    if not uppers or not rares:
+        rare_rate = 0.0 if not rares else 1.0
+    names = [f"upper:{name}" for name in uppers] + [f"rare:{name}" for name in rares]
+    weights = [(1 - rare_rate) / max(len(uppers), 1)] * len(uppers) + [rare_rate / max(len(rares), 1)] * len(rares)
+    return OptionTable(names, [[1]] * len(names), weights)
+
+
+class RollSimulator(object):
+    """按批模拟抽取，seed 相同则结果相同"""
+
+    def __init__(self, seed=None, batch_size=DEFAULT_BATCH):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+
+    def roll(self, table: OptionTable, n, slots=1):
+        """抽取 n 次，返回 (选项编号, 候选值)，形状均为 (n, slots)"""
+        options = table.draw_options(self.rng, (n, slots))
+        return options, table.values[table.draw_values(self.rng, options)]
+
+    def simulate(self, table: OptionTable, n, slots=1, prices=None) -> dict:
+        """模拟 n 次抽取，返回各选项与各候选值的出现频率、每次抽取的价值统计及理论期望"""
+        price = table.prices(prices)
+        option_counts = np.zeros(len(table), dtype=np.int64)
+        value_counts = np.zeros(len(table.values), dtype=np.int64)
+        total = square = 0.0
+        low, high = np.inf, -np.inf
+        done = 0
+        while done < n:
+            size = min(self.batch_size, n - done)
+            options = table.draw_options(self.rng, (size, slots))
+            index = table.draw_values(self.rng, options)
+            option_counts += np.bincount(options.ravel(), minlength=len(table))
+            value_counts += np.bincount(index.ravel(), minlength=len(table.values))
+            worth = (table.values[index] * price[options]).sum(axis=1)
+            total += float(worth.sum())
+            square += float(np.square(worth).sum())
+            low, high = min(low, float(worth.min())), max(high, float(worth.max()))
+            done += size
+
+        draws = max(n * slots, 1)
+        sums = np.bincount(table.owner, weights=table.values * value_counts, minlength=len(table))
+        means = table.means()
+        options = {}
+        for i, name in enumerate(table.names):
+            start, end = table.offsets[i], table.offsets[i + 1]
+            hits = int(option_counts[i])
+            values = {}
+            for value, count in zip(table.values[start:end].tolist(), value_counts[start:end].tolist()):
+                value = int(value) if value.is_integer() else value
+                values[value] = values.get(value, 0) + count / max(hits, 1)
+            options[name] = {
+                "probability": hits / draws,
+                "expected_probability": float(table.probs[i]),
+                "mean": float(sums[i]) / hits if hits else None,
+                "expected_mean": float(means[i]),
+                "values": values,
+            }
+        mean = total / n if n else 0.0
+        return {
+            "rolls": n,
+            "slots": slots,
+            "seed": self.seed,
+            "options": options,
+            "value": {
+                "mean": mean,
+                "std": float(np.sqrt(max(square / n - mean * mean, 0.0))) if n else 0.0,
+                "min": low if n else None,
+                "max": high if n else None,
+                "expected": table.expected(prices, slots),
+            },
+        }
+
+
+def simulate_pvf(api, seals=0, avatars=0, slots=1, rare_rate=DEFAULT_RARE_RATE, seed=None, prices=None) -> dict:
+    """读取 PVFApi 的魔法封印与时装潜力表并模拟，次数为 0 的项跳过"""
+    simulator = RollSimulator(seed)
+    result = {}
+    if seals:
+        table = seal_table(api.get_magic_steal(SEAL_FILE))
+        result['seal'] = simulator.simulate(table, seals, slots, prices)
+    if avatars:
+        table = roulette_table(*api.get_avatar_roulette(), rare_rate=rare_rate)
+        result['avatar'] = simulator.simulate(table, avatars, 1, prices)
+    return result
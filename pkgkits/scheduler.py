@@ -0,0 +1,140 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: scheduler.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   11:26
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 副本、任务、技能等批量加载的并行调度。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+"""
+调度流程：
+1. 并行读取所有一级 lst；
+2. 对需要二级展开的加载项（如技能：职业 lst -> 技能 lst），并行读取全部二级 lst；
+3. 汇总全部叶子文件，去重后按文件大小从大到小提交到线程池，避免大文件最后才开始拖慢整体；
+4. 按原有接口的嵌套结构组装结果。
+
+叶子文件的读取（load_trees）：lst 中的顺序与文件在 pvf 中的偏移无关，逐个读取时磁头在整个数据区来回跳动。
+load_trees 先跳过已缓存的文件，其余文件经 TinyPVF.read_many 按偏移排序、合并为不超过 READAHEAD_BYTES 的顺序读取，
+主线程负责读取与解密，解析与建树提交到线程池，与后续读取重叠；在途的任务数有上限，内存中的明文不会无限堆积。
+"""
+
+# 合并读取的单次上限与可以一并读过的最大空隙
+READAHEAD_BYTES = 4 << 20
+READ_GAP_BYTES = 64 << 10
+
+# 加载项: (lst路径, 展开层数)
+LOADERS = {
+    'tasks': ('n_quest/quest.lst', 1),
+    'instances': ('dungeon/dungeon.lst', 1),
+    'skills': ('n_quest/skills.lst', 2),
+}
+
+
+class BulkScheduler(object):
+    """按文件大小排序，在线程池上批量加载 lst 及其引用的脚本文件"""
+
+    def __init__(self, pvf, workers=None):
+        self.pvf = pvf
+        self.workers = workers if workers else min(32, (os.cpu_count() or 1) + 4)
+
+    def size_of(self, path):
+        leaf = self.pvf.headers.get(path.lower().replace('\\', '/').lstrip('/'))
+        return 0 if leaf is None else leaf['file_len']
+
+    def map(self, func, paths) -> dict:
+        """对去重后的路径按大小降序并行执行 func，返回 {path: result}"""
+        ordered = sorted(set(paths), key=self.size_of, reverse=True)
+        if self.workers <= 1 or len(ordered) <= 1:
+            return {path: func(path) for path in ordered}
+        with ThreadPoolExecutor(self.workers) as pool:
+            return dict(zip(ordered, pool.map(func, ordered)))
+
+    def load_trees(self, paths, window=READAHEAD_BYTES) -> dict:
+        """
+        与 map(pvf.load_tree, paths) 结果相同，未缓存的文件按偏移顺序合并读取。
+        返回的是缓存中的共享树，交给调用方前需要 pvf.copy_tree 复制；不存在的文件为不经缓存的空树
+        """
+        pvf = self.pvf
+        result, pending = {}, []
+        for path in set(paths):
+            key = pvf.cache_key('tree', path, False)
+            tree = pvf.cache.get(key) if key in pvf.cache else None
+            if tree is None:
+                pending.append(path)
+            else:
+                result[path] = tree
+        reads = pvf.read_many(pending, window)
+        if self.workers <= 1 or len(pending) <= 1:
+            result.update((path, pvf.load_tree_bytes(path, data)) for path, data in reads)
+            return self.fill_missing(result, pending)
+        limit = self.workers * 4
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {}
+            for path, data in reads:
+                futures[pool.submit(pvf.load_tree_bytes, path, data)] = path
+                if len(futures) >= limit:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result[futures.pop(future)] = future.result()
+            for future, path in futures.items():
+                result[path] = future.result()
+        return self.fill_missing(result, pending)
+
+    @staticmethod
+    def fill_missing(result, paths) -> dict:
+        """read_many 跳过的不存在的文件，与 load_tree 一致返回空树"""
+        for path in paths:
+            if path not in result:
+                result[path] = {}
+        return result
+
+    def load_tree(self, path):
+        return self.pvf.load_tree(path, shared=True)
+
+    def plan(self, specs: dict):
+        """
+        构建完整的工作列表，返回 (一级lst, 二级lst, 叶子路径列表)。
+        lst 本身也按大小调度，二级 lst 依赖一级 lst 的结果。
+        """
+        firsts = self.map(self.pvf.load_lst, [lst_path for lst_path, _ in specs.values()])
+        second_paths = [path for lst_path, depth in specs.values() if depth == 2 for path in firsts[lst_path].values()]
+        seconds = self.map(self.pvf.load_lst, second_paths)
+        leaves = []
+        for lst_path, depth in specs.values():
+            if depth == 1:
+                leaves.extend(firsts[lst_path].values())
+            else:
+                for path in firsts[lst_path].values():
+                    leaves.extend(seconds[path].values())
+        return firsts, seconds, leaves
+
+    def run(self, specs: dict = None) -> dict:
+        """
+        执行加载，specs 为 {名称: (lst路径, 展开层数)}，缺省加载 LOADERS 全部。
+        一层结果为 {id: tree}；两层结果与 PVFApi.get_skills 相同：
+        {id: {"job_name", "path", "skills": {skid: {"detail", "path"}}}}
+        每棵树都是独立的副本，调用方可以修改。
+        """
+        specs = LOADERS if specs is None else specs
+        firsts, seconds, leaves = self.plan(specs)
+        shared = self.load_trees(leaves)
+        trees = lambda path: self.pvf.copy_tree(shared[path])
+        result = {}
+        for name, (lst_path, depth) in specs.items():
+            if depth == 1:
+                result[name] = {_id: trees(path) for _id, path in firsts[lst_path].items()}
+                continue
+            nested = {}
+            for _id, lsp_path in firsts[lst_path].items():
+                job_name = lsp_path.replace('skill', '').strip('/').split('.')[0]
+                skills = {skid: {"detail": trees(skpath), "path": skpath} for skid, skpath in seconds[lsp_path].items()}
+                nested[_id] = {"job_name": job_name, "path": lsp_path, "skills": skills}
+            result[name] = nested
+        return result
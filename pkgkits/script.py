@@ -0,0 +1,221 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: script.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   20:58
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 脚本文件（.equ/.stk 等）与文本格式之间的无损互转。
+"""
+import re
+import math
+import struct
+
+"""
+文本格式（与社区常用的脚本文本一致，首行为 #PVF_File）：
+[name]                      类型5 段落标签，闭合标签 [/xxx] 同样单独成行
+    `王者传说`               类型7 字符串（反引号）
+    13  -2                  类型2 整数
+    1.5                     类型4 浮点数，总是带小数点或指数
+    <3::growtype_name_0`格斗家`>   类型9+10 引用 n_string.lst 中第3个 .str 的键，反引号内为解析结果，仅供阅读
+    {6=`文本`} {3=12}        其余类型写作 {类型=值}
+    {7=#123}                字符串中含反引号等无法直接书写时，改为引用字符串表索引
+段落之后的值缩进一个制表符，同一段落的值以制表符分隔，每行至多 VALUES_PER_LINE 个。
+字符串使用未经繁简转换的原始字符串表，渲染与解析互为逆运算；重新编码时字符串通过 StringPool 取索引，
+原字符串表中重复的字符串可能被换成等价的另一个索引。
+"""
+
+HEADER = '#PVF_File'
+VALUES_PER_LINE = 8
+# 值为字符串表索引的单元类型
+STRING_TYPES = (5, 6, 7, 8, 10)
+
+TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<tag>\[[^\]\n`]*\])
+    | `(?P<str>[^`]*)`
+    | <(?P<lst>\d+)::(?P<key>[^`]*)`[^`]*`>
+    | \{(?P<ctype>\d+)=(?:`(?P<cstr>[^`]*)`|\#(?P<cidx>\d+)|(?P<cnum>[-+0-9a-fA-Fx.e]+))\}
+    | (?P<num>[-+]?(?:\d+\.\d*(?:[eE][-+]?\d+)?|\d+(?:[eE][-+]?\d+)?))
+    | (?P<comment>\#[^\n]*)
+    )""", re.X)
+
+
+def read_units(body: bytes) -> list:
+    """脚本字节流解析为原始单元 [(类型, 值)]，字符串类单元的值为字符串表索引"""
+    import numpy as np
+    count = max((len(body) - 2) // 5, 0)
+    ints = np.frombuffer(body, dtype=[('t', 'u1'), ('v', '<i4')], count=count, offset=2)
+    floats = np.frombuffer(body, dtype=[('t', 'u1'), ('v', '<f4')], count=count, offset=2)['v'].tolist()
+    units = []
+    for i, (unit_type, value) in enumerate(zip(ints['t'].tolist(), ints['v'].tolist())):
+        if unit_type == 4:
+            units.append((4, floats[i]))
+        elif unit_type in (2, 3):
+            units.append((unit_type, value))
+        else:
+            units.append((unit_type, value & 0xFFFFFFFF))
+    return units
+
+
+def float_text(value: float) -> str:
+    """能还原为同一个 float32 的最短写法"""
+    if not math.isfinite(value):
+        return f"{{4=0x{struct.unpack('<I', struct.pack('<f', value))[0]:08x}}}"
+    for precision in (6, 7, 8, 9):
+        text = f"{value:.{precision}g}"
+        if struct.unpack('<f', struct.pack('<f', float(text)))[0] == value:
+            break
+    return text if ('.' in text or 'e' in text) else f"{text}.0"
+
+
+def _string_token(unit_type, index, strings):
+    text = strings[index] if index < len(strings) else None
+    if text is None or '`' in text:
+        return f"{{{unit_type}=#{index}}}"
+    if unit_type == 7:
+        return f"`{text}`"
+    return f"{{{unit_type}=`{text}`}}"
+
+
+def _is_tag(text):
+    return len(text) >= 2 and text[0] == '[' and text[-1] == ']' and not any(c in text[1:-1] for c in '[]\n`')
+
+
+def iter_lines(units, strings, resolve=None):
+    """
+    逐行渲染原始单元，strings 为原始字符串表，
+    resolve(lst_id, key) 返回类型9引用的文本（可选，只影响阅读）。
+    """
+    yield HEADER
+    row = []
+    i, total = 0, len(units)
+    while i < total:
+        unit_type, value = units[i]
+        i += 1
+        if unit_type == 5 and value < len(strings) and _is_tag(strings[value]):
+            if row:
+                yield '\t' + '\t'.join(row)
+                row = []
+            yield strings[value]
+            continue
+        if unit_type == 2:
+            token = str(value)
+        elif unit_type == 4:
+            token = float_text(value)
+        elif unit_type == 9 and i < total and units[i][0] == 10 and units[i][1] < len(strings) \
+                and not any(c in strings[units[i][1]] for c in '`>'):
+            key = strings[units[i][1]]
+            i += 1
+            text = resolve(value, key) if resolve is not None else None
+            token = f"<{value}::{key}`{'' if text is None else str(text).replace('`', chr(39))}`>"
+        elif unit_type in STRING_TYPES:
+            token = _string_token(unit_type, value, strings)
+        else:
+            token = f"{{{unit_type}={value}}}"
+        row.append(token)
+        if len(row) >= VALUES_PER_LINE:
+            yield '\t' + '\t'.join(row)
+            row = []
+    if row:
+        yield '\t' + '\t'.join(row)
+
+
+def render(units, strings, resolve=None) -> str:
+    return '\n'.join(iter_lines(units, strings, resolve)) + '\n'
+
+
+def iter_units(text: str):
+    """逐个解析文本中的单元，字符串类单元的值为 str（或写作 #索引 时为 int）"""
+    pos, end = 0, len(text)
+    match = TOKEN.match
+    while pos < end:
+        m = match(text, pos)
+        if m is None or m.end() == pos:
+            if text[pos:].strip():
+                line = text.count('\n', 0, pos) + 1
+                raise ValueError(f"cannot parse script text at line {line}: {text[pos:pos + 30]!r}")
+            return
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'tag':
+            yield 5, m.group('tag')
+        elif kind == 'str':
+            yield 7, m.group('str')
+        elif kind == 'num':
+            number = m.group('num')
+            yield (4, float(number)) if ('.' in number or 'e' in number or 'E' in number) else (2, int(number))
+        elif kind == 'key':
+            yield 9, int(m.group('lst'))
+            yield 10, m.group('key')
+        elif kind in ('cstr', 'cidx', 'cnum'):
+            unit_type = int(m.group('ctype'))
+            if kind == 'cstr':
+                yield unit_type, m.group('cstr')
+            elif kind == 'cidx':
+                yield unit_type, int(m.group('cidx'))
+            elif unit_type == 4:
+                number = m.group('cnum')
+                yield 4, struct.unpack('<f', struct.pack('<I', int(number, 16)))[0] if number.startswith('0x') \
+                    else float(number)
+            else:
+                yield unit_type, int(m.group('cnum'), 0)
+
+
+def parse(text: str) -> list:
+    return list(iter_units(text))
+
+
+def to_raw(units, pool) -> list:
+    """将 parse 的结果转为原始单元，字符串经 pool(str) 取得字符串表索引"""
+    return [(unit_type, pool(value) if isinstance(value, str) else value) for unit_type, value in units]
+
+
+def render_lst(body: bytes, strings) -> str:
+    """lst 渲染为每行 `id<TAB>`路径``"""
+    lines = []
+    for i in range(2, len(body) - 9, 10):
+        a, ia, b, ib = struct.unpack('<bIbI', body[i:i + 10])
+        _id, index = (ia, ib) if a == 2 else (ib, ia)
+        lines.append(f"{_id}\t{_string_token(7, index, strings)}")
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def parse_lst(text: str) -> list:
+    """render_lst 的逆运算，返回 [(id, 路径或字符串表索引)]"""
+    pairs = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        _id, token = line.split('\t', 1)
+        (unit_type, value), = iter_units(token)
+        pairs.append((int(_id), value))
+    return pairs
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _unescape(text):
+    return re.sub(r'\\(.)', lambda m: {'n': '\n', 'r': '\r'}.get(m.group(1), m.group(1)), text)
+
+
+def render_bst(strings) -> str:
+    """字符串表渲染为每行 `索引<TAB>字符串`，换行与反斜杠转义"""
+    return ''.join(f"{i}\t{_escape(string)}\n" for i, string in enumerate(strings))
+
+
+def parse_bst(text: str) -> list:
+    strings = []
+    for line in text.split('\n'):
+        if line:
+            index, string = line.split('\t', 1)
+            if int(index) != len(strings):
+                raise ValueError(f"stringtable text must list indices in order, got {index} at {len(strings)}")
+            strings.append(_unescape(string))
+    return strings
@@ -0,0 +1,246 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: server.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   16:10
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 常驻的本地 http 查询服务，pvf只解析一次，目录常驻内存。
+
+用法：
+    python -m pkgkits.server ./Script.pvf --port 8765
+
+接口（均为 GET，返回 json）：
+    /info                       pvf基本信息
+    /item/<id>[?detail=1]       物品摘要（装备或道具），detail=1 时附带完整树
+    /search?q=<名称>&limit=50    按名称子串搜索物品
+    /lst?path=<lst路径>          lst 列表
+    /tree?path=<文件路径>         任意脚本文件的树结构
+    /ls?dir=<目录>  /glob?pattern=<通配符>
+    /jobs  /exp                 职业表与经验表
+响应携带以 pvf 文件树 CRC 为值的 ETag，客户端带 If-None-Match 命中时返回 304。
+指定 --watch 秒数后后台轮询pvf，文件被替换时只重新解析变化的部分，无需重启服务。
+"""
+import json
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pkgkits.PvfParser import PVFApi
+from pkgkits.cache import DEFAULT_CACHE_BYTES
+from pkgkits.reload import PVFWatcher, STRING_FILES
+
+
+class Catalog(object):
+    """某一版本pvf的全部预解析数据，重载时整体替换，请求处理器持有同一份引用即可读到一致的数据"""
+
+    def __init__(self, api: PVFApi):
+        self.api = api
+        self.pvf = api.pvf
+        self.etag = f'"{self.pvf.dir_nodes_crc32:08x}"'
+        self.paths = dict(self.pvf.load_lst('equipment/equipment.lst'))
+        self.paths.update(self.pvf.load_lst('stackable/stackable.lst'))
+        self.items = {}
+        self.names = []
+        self.jobs = None
+        self.exp = None
+
+    def parse_items(self, ids=None):
+        """解析指定 id（缺省为全部）的装备与道具，返回 {id: 摘要}"""
+        pvf = self.pvf
+        equipments, supplies = {}, {}
+        for kind, lst_path, target in (('equipment', 'equipment/equipment.lst', equipments),
+                                       ('stackable', 'stackable/stackable.lst', supplies)):
+            for _id, path in pvf.load_lst(lst_path).items():
+                if ids is None or _id in ids:
+                    target[_id] = pvf.load_tree(path, shared=True)
+        items = {item['eid']: dict(item, kind='equipment') for item in self.api.parse_equipments(equipments)}
+        items.update({item['sid']: dict(item, kind='stackable') for item in self.api.parse_supplies(supplies)})
+        return items
+
+    def finish(self):
+        self.names = [(str(item['name']).lower(), _id) for _id, item in self.items.items()]
+
+
+class PVFService(object):
+    """持有 PVFApi 与预解析的物品目录，供请求处理器查询；watch 不为空时按该间隔（秒）检测pvf变化并热更新"""
+
+    def __init__(self, pvf_path, encoding='big5', cache_bytes=DEFAULT_CACHE_BYTES, workers=None, watch=None):
+        self.api = PVFApi(pvf_path, encoding, workers, cache_bytes)
+        self.watcher = None
+        self.load()
+        if watch:
+            self.watcher = PVFWatcher(pvf_path, encoding, watch, self.on_reload, pvf=self.state.pvf,
+                                      cache_bytes=cache_bytes).start()
+
+    def load(self):
+        """加载pvf并预热物品目录、职业与经验表"""
+        self.api.load_pvf()
+        state = Catalog(self.api)
+        state.items = state.parse_items()
+        state.jobs = self.api.get_jobs()
+        state.exp = self.api.get_exp()
+        state.finish()
+        self.state = state
+
+    def on_reload(self, old, new, changed):
+        """
+        PVFWatcher 回调：只重新解析路径发生变化的物品，字符串表或 .str 变化时全部重建，
+        最后一次性替换 state；请求处理中的旧 state 不受影响。
+        """
+        api = PVFApi(new.pvf_path, new.encoding, self.api.workers, self.api.cache_bytes)
+        api.pvf, api.headers = new, new.headers
+        previous = self.state
+        state = Catalog(api)
+        strings = any(path in STRING_FILES or path.endswith('.str') for path in changed)
+        if strings:
+            state.items = state.parse_items()
+        else:
+            dirty = {_id for _id, path in state.paths.items()
+                     if path in changed or previous.paths.get(_id) != path}
+            state.items = {_id: item for _id, item in previous.items.items()
+                           if _id in state.paths and _id not in dirty}
+            state.items.update(state.parse_items(dirty))
+        if strings or any(path.startswith('character/') for path in changed):
+            state.jobs, state.exp = api.get_jobs(), api.get_exp()
+        else:
+            state.jobs, state.exp = previous.jobs, previous.exp
+        state.finish()
+        self.api = api
+        self.state = state
+        print(f"reloaded {new.pvf_path}: {len(changed)} files changed")
+
+    def tree(self, path, state=None):
+        state = state or self.state
+        path = path.lower().replace('\\', '/').lstrip('/')
+        if path not in state.pvf.headers:
+            return None
+        return state.pvf.load_tree(path, shared=True)
+
+    def item(self, item_id, detail=False, state=None):
+        state = state or self.state
+        item = state.items.get(item_id)
+        if item is None:
+            return None
+        if detail:
+            path = state.paths.get(item_id)
+            item = dict(item, path=path, tree=self.tree(path or '', state))
+        return item
+
+    def search(self, keyword, limit=50, state=None):
+        state = state or self.state
+        keyword = keyword.lower()
+        found = []
+        for name, _id in state.names:
+            if keyword in name:
+                found.append(state.items[_id])
+                if len(found) >= limit:
+                    break
+        return found
+
+    def info(self, state=None):
+        state = state or self.state
+        pvf = state.pvf
+        return {
+            "path": pvf.pvf_path, "uuid": pvf.uuid.decode(errors='replace'), "version": pvf.version,
+            "files": pvf.file_nodes_len, "crc32": pvf.dir_nodes_crc32, "items": len(state.items),
+            "cache": pvf.cache.snapshot(),
+            "watching": self.watcher is not None,
+        }
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+
+
+class PVFRequestHandler(BaseHTTPRequestHandler):
+    service: PVFService = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        service = self.service
+        # 整个请求只读取一次 state，重载发生在请求中途也不会混用新旧数据
+        state = service.state
+        if self.headers.get('If-None-Match') == state.etag:
+            self.send_response(304)
+            self.send_header('ETag', state.etag)
+            self.end_headers()
+            return
+        try:
+            status, body = self.route(service, state, url.path.rstrip('/') or '/', query)
+        except (KeyError, ValueError) as e:
+            status, body = 400, {"error": f"bad request: {e}"}
+        self.reply(status, body, state.etag)
+
+    @staticmethod
+    def route(service, state, path, query):
+        """返回 (状态码, 响应体)"""
+        if path == '/info':
+            return 200, service.info(state)
+        if path.startswith('/item/'):
+            item = service.item(int(path[6:]), query.get('detail') == '1', state)
+            return (200, item) if item is not None else (404, {"error": "item not found"})
+        if path == '/search':
+            return 200, service.search(query['q'], int(query.get('limit', 50)), state)
+        if path == '/lst':
+            return 200, state.pvf.load_lst(query['path'])
+        if path == '/tree':
+            tree = service.tree(query['path'], state)
+            return (200, tree) if tree is not None else (404, {"error": "file not found"})
+        if path == '/ls':
+            return 200, state.pvf.listdir(query.get('dir', ''))
+        if path == '/glob':
+            return 200, state.pvf.glob(query['pattern'])
+        if path == '/jobs':
+            job_map, job_type_map = state.jobs
+            return 200, {"jobs": job_map, "growtypes": job_type_map}
+        if path == '/exp':
+            return 200, state.exp
+        return 404, {"error": "unknown endpoint"}
+
+    def reply(self, status, body, etag):
+        data = json.dumps(body, ensure_ascii=False).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service: PVFService, host='127.0.0.1', port=8765) -> ThreadingHTTPServer:
+    handler = type('BoundPVFRequestHandler', (PVFRequestHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='pvf 本地查询服务')
+    parser.add_argument('pvf')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--encoding', default='big5')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_BYTES >> 20, help='解码缓存的内存上限（MB）')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS', help='轮询间隔，pvf变化时热更新')
+    args = parser.parse_args(argv)
+    service = PVFService(args.pvf, args.encoding, args.cache_mb << 20, args.workers, args.watch)
+    server = make_server(service, args.host, args.port)
+    print(f"serving {args.pvf} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
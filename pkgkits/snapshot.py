@@ -0,0 +1,174 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: snapshot.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   23:20
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 已解码单元列表的紧凑二进制快照，按物品id随机读取单条记录。
+"""
+import mmap
+import struct
+import numpy as np
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.scheduler import BulkScheduler
+
+"""
+save_tojson 以 indent=4 写出整棵装备树，体积大、读取时必须解析整个文件。快照只保存 decrypt_bin2slist 的结果
+（已繁简转换的单元列表），树结构由 build_tree 按需还原。文件布局（小端）：
+
+header  <4sIIIQQQ  魔数 PVFS、版本、记录数、字符串数、单元区偏移、字符串池偏移、索引表偏移
+units   全部记录的单元首尾相接，每个单元5字节 (类型 u1, 值 i4)，与pvf脚本的单元布局相同；
+        类型2/3为整数，类型4为 float32 的位模式，其余类型的值为字符串池中的编号
+pool    u32 偏移[字符串数+1]，随后是全部字符串的 utf-8 字节（surrogateescape）
+table   i8 物品id[记录数]（升序）、u8 起始单元[记录数]、u4 单元数[记录数]
+
+读取时 mmap 整个文件，索引表与字符串偏移以 numpy 视图直接映射，单条记录只解码自己的单元和引用到的字符串。
+"""
+
+MAGIC = b'PVFS'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQQ')
+UNIT_DTYPE = np.dtype([('t', 'u1'), ('v', '<i4')])
+NUMBER_TYPES = (2, 3)
+
+
+def write_snapshot(path, records: dict):
+    """records 为 {物品id: 单元列表}，单元列表与 decrypt_bin2slist 的返回值相同"""
+    pool, strings = {}, []
+    keys = sorted(records)
+    starts = np.zeros(len(keys), dtype='<u8')
+    counts = np.zeros(len(keys), dtype='<u4')
+    types, values = [], []
+    for i, key in enumerate(keys):
+        units = records[key]
+        starts[i], counts[i] = len(types), len(units)
+        for unit_type, value in units:
+            types.append(unit_type)
+            if unit_type in NUMBER_TYPES:
+                values.append(int(value))
+            elif unit_type == 4:
+                values.append(struct.unpack('<i', struct.pack('<f', value))[0])
+            else:
+                index = pool.get(value)
+                if index is None:
+                    index = pool[value] = len(strings)
+                    strings.append(value)
+                values.append(index)
+    units = np.empty(len(types), dtype=UNIT_DTYPE)
+    units['t'], units['v'] = types, values
+    blobs = [str(string).encode('utf8', 'surrogateescape') for string in strings]
+    offsets = np.zeros(len(blobs) + 1, dtype='<u4')
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+
+    units_offset = HEADER.size
+    pool_offset = units_offset + units.nbytes
+    table_offset = pool_offset + offsets.nbytes + int(offsets[-1])
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys), len(strings), units_offset, pool_offset, table_offset))
+        f.write(units.tobytes())
+        f.write(offsets.tobytes())
+        f.write(b''.join(blobs))
+        f.write(np.asarray(keys, dtype='<i8').tobytes())
+        f.write(starts.tobytes())
+        f.write(counts.tobytes())
+    return {"records": len(keys), "units": len(types), "strings": len(strings)}
+
+
+def snapshot_lst(pvf: TinyPVF, lst_paths, output, workers=None) -> dict:
+    """将若干 lst（如 equipment.lst、stackable.lst）引用的全部脚本解码后写成快照，重复的id保留先出现的"""
+    table = {}
+    for lst_path in lst_paths:
+        for _id, path in pvf.load_lst(lst_path).items():
+            table.setdefault(_id, path)
+    units = BulkScheduler(pvf, workers).map(pvf.decrypt_bin2slist, table.values())
+    return write_snapshot(output, {_id: units[path] for _id, path in table.items()})
+
+
+class Snapshot(object):
+    """只读快照，mmap 打开，按id随机读取"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, records, strings, units_offset, pool_offset, table_offset = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a pvf snapshot (version {VERSION}): {path}")
+        self.units_offset = units_offset
+        self.string_offsets = np.frombuffer(self.mm, dtype='<u4', count=strings + 1, offset=pool_offset)
+        self.blob_offset = pool_offset + self.string_offsets.nbytes
+        self.keys = np.frombuffer(self.mm, dtype='<i8', count=records, offset=table_offset)
+        self.starts = np.frombuffer(self.mm, dtype='<u8', count=records, offset=table_offset + 8 * records)
+        self.counts = np.frombuffer(self.mm, dtype='<u4', count=records, offset=table_offset + 16 * records)
+        self._strings = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return self.row(key) is not None
+
+    def __iter__(self):
+        return iter(self.keys.tolist())
+
+    def row(self, key):
+        row = int(np.searchsorted(self.keys, key))
+        return row if row < len(self.keys) and self.keys[row] == key else None
+
+    def string(self, index) -> str:
+        text = self._strings.get(index)
+        if text is None:
+            start, end = self.string_offsets[index:index + 2].tolist()
+            text = self._strings[index] = \
+                self.mm[self.blob_offset + start:self.blob_offset + end].decode('utf8', 'surrogateescape')
+        return text
+
+    def units(self, key) -> list:
+        """单条记录的单元列表，与 decrypt_bin2slist 的结果相同；不存在时返回 None"""
+        row = self.row(key)
+        if row is None:
+            return None
+        count = int(self.counts[row])
+        raw = np.frombuffer(self.mm, dtype=UNIT_DTYPE, count=count,
+                            offset=self.units_offset + int(self.starts[row]) * UNIT_DTYPE.itemsize)
+        values = raw['v'].tolist()
+        floats = raw['v'].view('<f4').tolist()
+        units = []
+        for i, unit_type in enumerate(raw['t'].tolist()):
+            if unit_type in NUMBER_TYPES:
+                units.append((unit_type, values[i]))
+            elif unit_type == 4:
+                units.append((4, floats[i]))
+            else:
+                units.append((unit_type, self.string(values[i])))
+        return units
+
+    def tree(self, key) -> dict:
+        units = self.units(key)
+        return None if units is None else TinyPVF.build_tree(units)
+
+    def __getitem__(self, key) -> dict:
+        tree = self.tree(key)
+        if tree is None:
+            raise KeyError(key)
+        return tree
+
+    def items(self):
+        for key in self:
+            yield key, self.tree(key)
+
+    def close(self):
+        # numpy 视图引用着 mmap，先释放视图再关闭
+        self.string_offsets = self.keys = self.starts = self.counts = None
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
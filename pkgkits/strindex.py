@@ -0,0 +1,134 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: strindex.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   22:45
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 字符串表的反向索引：文本查索引、子串搜索与索引的引用文件。
+"""
+import io
+import numpy as np
+from pkgkits.PvfParser import TinyPVF, convert
+
+"""
+load_bst 只有 索引 -> 字符串 一个方向，这里补充：
+exact   {文本: [索引]}，原始字符串与繁简转换后的字符串都可以查，重复的字符串对应多个索引；
+gram    简体字符串的 N-gram 倒排表（缺省 N=2）：全部字符串拼成一个码点数组，相邻两个码点打包为一个 int64，
+        去重后排序为 CSR 形式，整个构建过程在 numpy 中完成。子串查询取查询词各个 gram 的倒排表求交集，
+        再逐个确认包含关系；短于 N 的查询退化为线性扫描；
+files   索引 -> 引用它的文件，来自 refindex.RefIndex（可选）。
+exact 由字符串表直接构建，gram 随字符串表缓存在 DiskCache 的同一目录（strindex.npz）。
+"""
+
+NGRAM = 2
+# 码点不超过 0x10FFFF，每个码点占 21 位
+CODE_BITS = 21
+
+
+def gram_keys(codes: np.ndarray, n=NGRAM) -> np.ndarray:
+    """码点数组 -> 相邻 n 个码点打包后的键"""
+    keys = codes[:len(codes) - n + 1].astype(np.int64)
+    for k in range(1, n):
+        keys = (keys << CODE_BITS) | codes[k:len(codes) - n + 1 + k]
+    return keys
+
+
+def build_grams(strings, n=NGRAM):
+    """返回 (有序唯一 gram 键, 偏移, 字符串索引)"""
+    codes = np.frombuffer(''.join(strings).encode('utf-32-le', 'surrogatepass'), dtype='<u4').astype(np.int64)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    owner = np.repeat(np.arange(len(strings), dtype=np.int64), lengths)
+    keys = gram_keys(codes, n)
+    # 跨越两个字符串边界的 gram 丢弃
+    owners = owner[:len(keys)]
+    valid = owners == owner[n - 1:]
+    keys, owners = keys[valid], owners[valid]
+    order = np.lexsort((owners, keys))
+    keys, owners = keys[order], owners[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+    keys, owners = keys[keep], owners[keep].astype(np.int32)
+    unique, starts = np.unique(keys, return_index=True)
+    return unique, np.append(starts, len(keys)).astype(np.int64), owners
+
+
+class StringIndex(object):
+    """字符串表的反向索引，raw 为原始字符串表，strings 为繁简转换后的字符串表"""
+
+    def __init__(self, raw, strings, grams=None, refs=None, n=NGRAM):
+        self.raw = raw
+        self.strings = strings
+        self.n = n
+        self.refs = refs
+        self.exact = {}
+        for table in (raw, strings):
+            for i, text in enumerate(table):
+                indices = self.exact.setdefault(text, [])
+                if not indices or indices[-1] != i:
+                    indices.append(i)
+        self.grams = build_grams(strings, n) if grams is None else grams
+
+    @classmethod
+    def open(cls, pvf: TinyPVF, cache=None, refs=None):
+        """有 DiskCache 时读取或写入 strindex.npz"""
+        grams = None
+        if cache is not None and cache.exists(pvf, 'strindex.npz'):
+            try:
+                with np.load(cache.path(pvf, 'strindex.npz')) as data:
+                    grams = (data['keys'], data['offsets'], data['postings'])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error :{e}, {cache.path(pvf, 'strindex.npz')}")
+        index = cls(pvf.raw_bst, pvf.bst, grams, refs)
+        if cache is not None and grams is None:
+            cache.write_bytes(pvf, 'strindex.npz', index.save_bytes())
+        return index
+
+    def save_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        keys, offsets, postings = self.grams
+        np.savez(buffer, keys=keys, offsets=offsets, postings=postings)
+        return buffer.getvalue()
+
+    def find(self, text) -> list:
+        """完全相同的字符串（原始或简体）所在的全部索引"""
+        return sorted(set(self.exact.get(text, [])))
+
+    def postings(self, key) -> np.ndarray:
+        keys, offsets, postings = self.grams
+        row = int(np.searchsorted(keys, key))
+        if row >= len(keys) or keys[row] != key:
+            return postings[:0]
+        return postings[offsets[row]:offsets[row + 1]]
+
+    def search(self, text, limit=None) -> list:
+        """包含子串 text 的简体字符串索引，查询词先做繁简转换"""
+        text = convert(text, 'zh-cn')
+        if len(text) < self.n:
+            hits = (i for i, string in enumerate(self.strings) if text in string)
+        else:
+            codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4').astype(np.int64)
+            lists = sorted((self.postings(key) for key in np.unique(gram_keys(codes, self.n)).tolist()), key=len)
+            candidates = lists[0]
+            for other in lists[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, other, assume_unique=True)
+            # 查询词恰好是一个 gram 时倒排表就是结果，不必逐个确认
+            hits = candidates.tolist() if len(text) == self.n else \
+                (i for i in candidates.tolist() if text in self.strings[i])
+        result = []
+        for i in hits:
+            result.append(i)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def files(self, index) -> list:
+        """引用该索引的文件，需要构建时传入 RefIndex"""
+        if self.refs is None:
+            raise ValueError("a RefIndex is required to map string indices to files")
+        return self.refs.string(index)
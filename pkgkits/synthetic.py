@@ -0,0 +1,239 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: synthetic.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   14:20
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 生成结构完整的合成pvf，用于离线测试与性能基准，不依赖真实的 Script.pvf。
+"""
+import random
+from pkgkits.writer import PVFWriter, StringPool, pack_units, pack_lst, pack_bst, pack_stt
+from pkgkits.scheduler import LOADERS
+
+"""
+生成内容：
+stringtable.bin、n_string.lst 及其引用的 *.str；
+equipment/equipment.lst、stackable/stackable.lst 及对应的 .equ/.stk，段落组合参照真实文件；
+n_quest/quest.lst、dungeon/dungeon.lst、n_quest/skills.lst（两级，路径取自 scheduler.LOADERS）；
+character/*.chr、character/exptable.tbl、魔法封印与时装潜能表。
+同一 seed 生成的文件逐字节一致。
+"""
+
+JOBS = ['swordman', 'fighter', 'gunner', 'mage', 'priest', 'thief', 'demonic swordman']
+JOB_FILES = {
+    0: ('swordman', 'swordman'), 1: ('fighter', 'fighter'), 2: ('gunner', 'gunner'), 3: ('mage', 'mage'),
+    4: ('priest', 'priest'), 5: ('gunner', 'atgunner'), 6: ('thief', 'thief'), 7: ('fighter', 'atfighter'),
+    8: ('mage', 'atmage'), 9: ('swordman', 'demonicswordman'), 10: ('swordman', 'atswordman'),
+}
+WEAPON_JOBS = ['swordman', 'fighter', 'gunner', 'mage', 'priest', 'thief']
+ARMORS = ['coat', 'pants', 'shoulder', 'waist', 'shoes']
+ACCESSORIES = ['amulet', 'wrist', 'ring', 'support', 'magic stone']
+AVATARS = ['hat avatar', 'hair avatar', 'face avatar', 'coat avatar', 'pants avatar', 'shoes avatar']
+TRADES = ['[trade]', '[free]', '[sealing]', '[account]']
+STACKABLE_TYPES = ['waste', 'material', 'recipe', 'quest', 'booster', 'enchant waste', 'throw', 'legacy']
+STAT_SECTIONS = [
+    '[physical attack]', '[magical attack]', '[physical defense]', '[magical defense]', '[HP MAX]', '[MP MAX]',
+    '[stuck]', '[attack speed]', '[move speed]', '[cast speed]', '[hp regen speed]', '[mp regen speed]',
+    '[fire resistance]', '[water resistance]', '[dark resistance]', '[light resistance]', '[equipment physical attack]',
+    '[equipment magical attack]', '[separate attack]', '[jump power]', '[hit recovery]', '[weight]',
+]
+WORDS = ['劍', '刀', '槍', '鎧', '甲', '靴', '戒指', '手鐲', '項鍊', '藥水', '寶珠', '魔法', '傳說', '史詩', '神器', '龍',
+         '鳳凰', '闇', '光', '火焰', '寒冰', '雷霆', '守護', '審判', '騎士', '王者', '星辰', '幻影', '深淵', '天空']
+OPTIONS = ['[str]', '[int]', '[vit]', '[spr]', '[physical attack]', '[magical attack]', '[critical hit]', '[hp max]',
+           '[attack speed]', '[fire attack]', '[water attack]', '[light attack]', '[dark attack]']
+
+
+class SyntheticPVF(object):
+    """合成pvf生成器"""
+
+    def __init__(self, equipments=2000, stackables=2000, quests=200, dungeons=50, skills_per_job=30,
+                 sections=(4, 12), seed=0, encoding='big5'):
+        self.counts = dict(equipments=equipments, stackables=stackables, quests=quests, dungeons=dungeons,
+                           skills_per_job=skills_per_job)
+        self.sections = sections
+        self.random = random.Random(seed)
+        self.encoding = encoding
+        self.pool = StringPool(['stringtable.bin'])
+        self.files = {}
+
+    def name(self, n=2):
+        return ''.join(self.random.choice(WORDS) for _ in range(n))
+
+    def text(self, lines=2):
+        return '\n'.join(f"{self.name(3)}，{self.name(4)} %%{self.random.randint(1, 30)}" for _ in range(lines))
+
+    def tag(self, value):
+        return (5, self.pool(value))
+
+    def string(self, value):
+        return (7, self.pool(value))
+
+    def stats(self, units):
+        """随机的属性段落组合"""
+        for section in self.random.sample(STAT_SECTIONS, self.random.randint(*self.sections)):
+            units.append(self.tag(section))
+            if self.random.random() < 0.2:
+                units.append((4, round(self.random.uniform(0, 20), 1)))
+            else:
+                units.extend((2, self.random.randint(-50, 500)) for _ in range(self.random.randint(1, 3)))
+        if self.random.random() < 0.3:
+            units.append(self.tag('[skill levelup]'))
+            for _ in range(self.random.randint(1, 3)):
+                units.extend([(2, self.random.randint(0, 10)), (2, self.random.randint(1, 200)), (2, self.random.randint(1, 3))])
+            units.append(self.tag('[/skill levelup]'))
+        if self.random.random() < 0.1:
+            # 0x09/0x0a: 引用 n_string.lst 中 *.str 的文本
+            units.extend([self.tag('[flavor text]'), (9, 1), (10, self.pool(f"flavor_{self.random.randint(0, 19)}"))])
+        return units
+
+    def common(self, units, name, rarity, trade, jobs):
+        units.extend([
+            self.tag('[name]'), self.string(name), self.tag('[name2]'), self.string(name),
+            self.tag('[grade]'), (2, self.random.randint(1, 100)),
+            self.tag('[rarity]'), (2, rarity),
+            self.tag('[usable job]'), *[self.string(f"[{job}]") for job in jobs], self.tag('[/usable job]'),
+            self.tag('[attach type]'), self.string(trade),
+            self.tag('[minimum level]'), (2, self.random.randint(1, 85)),
+            self.tag('[price]'), (2, self.random.randint(10, 1000000)),
+            self.tag('[explain]'), self.string(self.text(self.random.randint(1, 3))),
+        ])
+        return units
+
+    def equipment(self, i):
+        kind = self.random.random()
+        if kind < 0.4:
+            job = self.random.choice(WEAPON_JOBS)
+            sub = self.random.randint(0, 4)
+            equip_type, jobs, folder = 'weapon', [job], f"character/{job}/weapon"
+        elif kind < 0.7:
+            equip_type, jobs, sub = self.random.choice(ARMORS), ['all'], self.random.randint(0, 4)
+            folder = f"character/common/{equip_type.replace(' ', '')}"
+        elif kind < 0.9:
+            equip_type, jobs, sub = self.random.choice(ACCESSORIES), ['all'], -1
+            folder = f"character/common/{equip_type.replace(' ', '')}"
+        else:
+            job = self.random.choice(JOBS)
+            equip_type, jobs, sub = self.random.choice(AVATARS), [job], -1
+            folder = f"character/{job.replace(' ', '')}/avatar"
+        units = self.common([], self.name(), self.random.randint(0, 5), self.random.choice(TRADES), jobs)
+        units.extend([self.tag('[equipment type]'), self.string(f"[{equip_type}]"),
+                      self.tag('[durability]'), (2, self.random.randint(10, 60))])
+        if sub >= 0:
+            units.extend([self.tag('[sub type]'), (2, sub)])
+        return f"{folder}/{equip_type.replace(' ', '')}_{i}.equ", self.stats(units)
+
+    def stackable(self, i):
+        stackable_type = self.random.choice(STACKABLE_TYPES)
+        units = self.common([], self.name(), self.random.randint(0, 4), self.random.choice(TRADES), ['all'])
+        units.extend([self.tag('[stackable type]'), self.string(f"[{stackable_type}]"), (2, 0),
+                      self.tag('[stack limit]'), (2, self.random.choice([1, 100, 999, 1000]))])
+        if self.random.random() < 0.3:
+            self.stats(units)
+        return f"{stackable_type.replace(' ', '')}/{stackable_type.replace(' ', '')}_{i}.stk", units
+
+    def script(self, path, units):
+        self.files[path] = pack_units(units)
+
+    def lst(self, path, pairs):
+        self.files[path] = pack_lst([(_id, self.pool(entry)) for _id, entry in pairs])
+
+    def build(self):
+        """生成全部文件，返回 {路径: 明文字节}"""
+        rand = self.random
+        self.lst('n_string.lst', [(1, 'etc/flavor.str'), (2, 'character/growtype.str')])
+        self.files['etc/flavor.str'] = pack_stt({f"flavor_{i}": self.text(1) for i in range(20)}, self.encoding)
+        self.files['character/growtype.str'] = pack_stt({f"growtype_name_{i}": self.name() for i in range(5)},
+                                                        self.encoding)
+
+        equipments = []
+        for i in range(self.counts['equipments']):
+            path, units = self.equipment(i)
+            self.script(f"equipment/{path}", units)
+            equipments.append((10000 + i, path))
+        self.lst('equipment/equipment.lst', equipments)
+
+        stackables = []
+        for i in range(self.counts['stackables']):
+            path, units = self.stackable(i)
+            self.script(f"stackable/{path}", units)
+            stackables.append((1000 + i, path))
+        self.lst('stackable/stackable.lst', stackables)
+
+        quests = []
+        for i in range(self.counts['quests']):
+            units = [self.tag('[name]'), self.string(self.name()), self.tag('[level]'), (2, rand.randint(1, 85)),
+                     self.tag('[reward item]')]
+            for _ in range(rand.randint(1, 4)):
+                units.extend([(2, 1000 + rand.randrange(max(self.counts['stackables'], 1))), (2, rand.randint(1, 10))])
+            units.extend([self.tag('[explain]'), self.string(self.text(2))])
+            self.script(f"n_quest/quest_{i}.qst", units)
+            quests.append((i, f"quest_{i}.qst"))
+        self.lst('n_quest/quest.lst', quests)
+
+        dungeons = []
+        for i in range(self.counts['dungeons']):
+            units = [self.tag('[name]'), self.string(self.name()), self.tag('[minimum level]'), (2, rand.randint(1, 85)),
+                     self.tag('[map]'), *[self.string(f"map/dungeon_{i}/room_{k}.map") for k in range(rand.randint(3, 9))],
+                     self.tag('[/map]'), self.tag('[explain]'), self.string(self.text(1))]
+            self.script(f"dungeon/dungeon_{i}.dgn", units)
+            dungeons.append((i, f"dungeon_{i}.dgn"))
+        self.lst('dungeon/dungeon.lst', dungeons)
+
+        # 与 PVFApi.get_skills 使用同一个 lst；lst 中的路径相对 lst 所在目录解析，职业 lst 与技能文件放在同一目录下
+        skills_lst = LOADERS['skills'][0]
+        skill_dir = skills_lst.rsplit('/', 1)[0]
+        job_lsts = []
+        for j, job in enumerate(WEAPON_JOBS):
+            skills = []
+            for k in range(self.counts['skills_per_job']):
+                units = [self.tag('[name]'), self.string(self.name()), self.tag('[maximum level]'), (2, rand.randint(1, 70)),
+                         self.tag('[level info]'), *[(2, rand.randint(0, 9999)) for _ in range(rand.randint(10, 60))],
+                         self.tag('[/level info]')]
+                self.script(f"{skill_dir}/{job}/skill_{k}.skl", units)
+                skills.append((k, f"{job}/skill_{k}.skl"))
+            self.lst(f"{skill_dir}/{job}skill.lst", skills)
+            job_lsts.append((j, f"{job}skill.lst"))
+        self.lst(skills_lst, job_lsts)
+
+        for _, (folder, name) in JOB_FILES.items():
+            units = [self.tag('[job]'), self.string(f"[{name}]"), self.tag('[growtype name]'),
+                     *[self.string(self.name()) for _ in range(5)], self.tag('[/growtype name]')]
+            self.script(f"character/{folder}/{name}.chr", units)
+        exp, exps = 0, []
+        for level in range(1, 86):
+            exp += 100 * level * level
+            exps.append((2, exp))
+        self.script('character/exptable.tbl', [self.tag('[exp]')] + exps)
+
+        units = [self.tag('[postfix]')]
+        for option in OPTIONS:
+            units.append(self.string(option))
+            units.extend((2, rand.randint(1, 100)) for _ in range(rand.randint(3, 8)))
+        self.script('etc/randomoption/randomizedoptionoverall2.etc', units)
+        units = [self.tag('[upper]'), *[self.string(option) for option in OPTIONS[:8]], self.tag('[/upper]'),
+                 self.tag('[rare]'), *[self.string(option) for option in OPTIONS[4:]], self.tag('[/rare]')]
+        self.script('etc/avatar_roulette/avatarfixedhiddenoptionlist.etc', units)
+
+        self.files['stringtable.bin'] = pack_bst(self.pool.strings, self.encoding)
+        return self.files
+
+    def write(self, path) -> dict:
+        """写出pvf，返回文件数与明文总大小"""
+        files = self.build()
+        with PVFWriter(path) as writer:
+            # 字符串表放在数据区最前，与真实pvf一致
+            writer.add('stringtable.bin', files['stringtable.bin'])
+            for filepath, content in files.items():
+                if filepath != 'stringtable.bin':
+                    writer.add(filepath, content)
+        return {"files": len(files), "bytes": sum(len(content) for content in files.values()),
+                "strings": len(self.pool)}
+
+
+def generate(path, **kwargs) -> dict:
+    """按给定规模生成合成pvf，参数见 SyntheticPVF"""
+    return SyntheticPVF(**kwargs).write(path)
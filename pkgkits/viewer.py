@@ -0,0 +1,264 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: viewer.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   21:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 懒加载的 Treeview 浏览器，用于浏览整个pvf或 PVFApi 导出的大字典。
+"""
+import queue
+import tkinter as tk
+from tkinter import ttk
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.writer import SCRIPT_HEAD
+
+"""
+参考项目 JsonViewer.json_tree 一次性递归插入全部节点，几万件装备的字典要插入上百万个节点。这里：
+1. 可展开的节点插入时只带一个占位子节点，展开（<<TreeviewOpen>>）时才调用 loader 生成真正的子节点，
+   折叠时删除子节点、恢复占位，界面中同时存在的节点数只与展开的部分有关；
+2. 子节点按 PAGE_SIZE 分页插入，末尾放一个"更多"节点，双击或回车时插入下一页；
+3. 需要读取与解码文件的 loader 放到后台线程执行，结果经队列交回主线程插入（Tk 只能在主线程中调用）。
+
+loader() 返回子节点序列，每个子节点为 Node(文本, 值, 子loader或None, 是否后台加载)。
+"""
+
+PAGE_SIZE = 500
+PLACEHOLDER = '…'
+POLL_MS = 30
+
+
+class Node(tuple):
+    """子节点描述：(文本, 值, loader, 是否在后台线程中执行 loader)"""
+
+    def __new__(cls, text, value='', loader=None, background=False):
+        return tuple.__new__(cls, (text, value, loader, background))
+
+
+class LazyTree(object):
+    """为 ttk.Treeview 提供占位、分页与后台加载"""
+
+    def __init__(self, tree: ttk.Treeview, page_size=PAGE_SIZE, workers=2):
+        self.tree = tree
+        self.page_size = page_size
+        self.executor = ThreadPoolExecutor(workers)
+        self.results = queue.Queue()
+        self.loaders = {}   # 可展开节点 -> (loader, background)
+        self.pages = {}     # "更多"节点 -> (父节点, 剩余子节点迭代器, 剩余数量)
+        tree.bind('<<TreeviewOpen>>', self.on_open)
+        tree.bind('<<TreeviewClose>>', self.on_close)
+        tree.bind('<Double-1>', self.on_activate)
+        tree.bind('<Return>', self.on_activate)
+        tree.after(POLL_MS, self.poll)
+
+    def insert(self, parent, node: Node) -> str:
+        text, value, loader, background = node
+        iid = self.tree.insert(parent, 'end', text=text, values=[value], tags=('dir',) if loader else ())
+        if loader is not None:
+            self.loaders[iid] = (loader, background)
+            self.tree.insert(iid, 'end', text=PLACEHOLDER)
+        return iid
+
+    def insert_page(self, parent, children, remaining=None):
+        """插入一页子节点，还有剩余时追加"更多"节点"""
+        children = iter(children)
+        for node in islice(children, self.page_size):
+            self.insert(parent, node)
+        if remaining is not None:
+            remaining -= self.page_size
+            if remaining <= 0:
+                return
+        head = next(children, None)
+        if head is None:
+            return
+        more = self.tree.insert(parent, 'end', text=f"{PLACEHOLDER} 更多" + (f"（剩余 {remaining} 项）" if remaining else ''),
+                                tags=('more',))
+        self.pages[more] = (parent, _chain(head, children), remaining)
+
+    def fill(self, iid, children):
+        self.forget(self.tree.get_children(iid))
+        self.tree.delete(*self.tree.get_children(iid))
+        self.insert_page(iid, children, len(children) if hasattr(children, '__len__') else None)
+
+    def forget(self, iids):
+        """丢弃被删除节点（含子孙）登记的 loader 与分页状态"""
+        stack = list(iids)
+        while stack:
+            iid = stack.pop()
+            self.pages.pop(iid, None)
+            self.loaders.pop(iid, None)
+            stack.extend(self.tree.get_children(iid))
+
+    def on_open(self, event=None):
+        iid = self.tree.focus()
+        entry = self.loaders.get(iid)
+        children = self.tree.get_children(iid)
+        if entry is None or len(children) != 1 or self.tree.item(children[0], 'text') != PLACEHOLDER:
+            return
+        loader, background = entry
+        if not background:
+            self.fill(iid, self.call(loader))
+            return
+        self.tree.item(children[0], text=f"{PLACEHOLDER} 加载中")
+        future = self.executor.submit(self.call, loader)
+        future.add_done_callback(lambda f: self.results.put((iid, f.result())))
+
+    def on_close(self, event=None):
+        """折叠时释放子节点，只保留占位，再次展开重新调用 loader（文件树由 TinyPVF 缓存）"""
+        iid = self.tree.focus()
+        if iid not in self.loaders:
+            return
+        children = self.tree.get_children(iid)
+        self.forget(children)
+        self.tree.delete(*children)
+        self.tree.insert(iid, 'end', text=PLACEHOLDER)
+
+    def on_activate(self, event=None):
+        iid = self.tree.focus()
+        if iid not in self.pages:
+            return
+        parent, children, remaining = self.pages.pop(iid)
+        self.tree.delete(iid)
+        self.insert_page(parent, children, remaining)
+
+    def poll(self):
+        """主线程定时取回后台加载的结果；节点已被折叠或删除时丢弃"""
+        try:
+            while True:
+                iid, children = self.results.get_nowait()
+                if self.tree.exists(iid) and self.tree.item(iid, 'open'):
+                    self.fill(iid, children)
+        except queue.Empty:
+            pass
+        self.tree.after(POLL_MS, self.poll)
+
+    @staticmethod
+    def call(loader):
+        try:
+            children = loader()
+            return children if isinstance(children, (list, tuple)) else list(children)
+        except Exception as e:
+            print(f"Error :{e}, {loader}")
+            return [Node(f"Error :{e}")]
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _chain(head, rest):
+    yield head
+    yield from rest
+
+
+def data_node(key, value) -> Node:
+    """将字典/列表中的一项转为节点，容器的子节点在展开时才生成"""
+    if isinstance(value, dict):
+        summary = value.get('[name]', f"{len(value)} 项")
+        return Node(str(key), summary if isinstance(summary, str) else f"{len(value)} 项",
+                    lambda: [data_node(k, v) for k, v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return Node(f"{key}[]", f"{len(value)} 项", lambda: [data_node(i, v) for i, v in enumerate(value)])
+    return Node(str(key), 'None' if value is None else value)
+
+
+def script_node(key, node) -> Node:
+    """build_tree 结果中的节点：段落显示为可展开节点，值为子节点的简要拼接"""
+    children = node["children"]
+    if not children:
+        return Node(str(node["value"]), key)
+    summary = ' '.join(str(child["value"]) for child in children[:8])
+    return Node(str(key), summary, lambda: [script_node(child["key"], child) for child in children])
+
+
+class PVFBrowser(object):
+    """pvf 浏览：目录 -> 文件 -> 段落，目录列表来自 PathIndex，文件内容在后台线程中解码"""
+
+    def __init__(self, pvf: TinyPVF):
+        self.pvf = pvf
+
+    def root(self) -> list:
+        return self.dir_children('')
+
+    def dir_children(self, directory) -> list:
+        listing = self.pvf.listdir(directory)
+        prefix = f"{directory}/" if directory else ''
+        nodes = [Node(f"{name}/", f"{stat['count']} 个文件", lambda d=f"{prefix}{name}": self.dir_children(d))
+                 for name, stat in sorted(listing["dirs"].items())]
+        nodes += [self.file_node(f"{prefix}{name}", name, f"{size} 字节")
+                  for name, size in sorted(listing["files"].items())]
+        return nodes
+
+    def file_node(self, path, text, value='') -> Node:
+        return Node(text, value, lambda: self.file_children(path), True)
+
+    def file_children(self, path) -> list:
+        pvf = self.pvf
+        if path.endswith('.lst'):
+            return [self.file_node(target, _id, target) for _id, target in pvf.load_lst(path).items()]
+        if path.endswith('.str'):
+            return [Node(key, value) for key, value in pvf.load_stt_cached(path).items()]
+        if path == 'stringtable.bin':
+            return [Node(i, string) for i, string in enumerate(pvf.bst)]
+        if path not in pvf.headers:
+            return [Node(path, '文件不存在')]
+        # 加密按32位字独立进行，只解密第一个字即可判断是否为脚本
+        leaf = pvf.headers[path]
+        head = TinyPVF.decrypt(pvf.read_bytes(pvf.pack_offset + leaf['offset'], 4), leaf['crc32'])[:2]
+        if leaf['real_len'] < 2 or head != SCRIPT_HEAD:
+            return [Node('大小', f"{pvf.headers[path]['real_len']} 字节")]
+        return [script_node(key, node) for key, node in pvf.load_tree(path, shared=True).items()]
+
+
+def build_window(title, width=900, height=700):
+    """创建窗口与带滚动条的 Treeview，返回 (root, tree)"""
+    root = tk.Tk()
+    root.title(title)
+    root.columnconfigure(0, weight=1)
+    root.rowconfigure(0, weight=1)
+    frame = ttk.Frame(root, padding="3")
+    frame.grid(row=0, column=0, sticky=tk.NSEW)
+    frame.columnconfigure(0, weight=1)
+    frame.rowconfigure(0, weight=1)
+    tree = ttk.Treeview(frame, columns='Values')
+    tree.column('#0', width=width // 3)
+    tree.column('Values', width=width * 2 // 3, anchor='w')
+    tree.heading('Values', text='Values')
+    tree.tag_configure('dir', background='lightblue')
+    tree.tag_configure('more', foreground='gray')
+    scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+    tree.configure(yscrollcommand=scroll.set)
+    tree.grid(row=0, column=0, sticky=tk.NSEW)
+    scroll.grid(row=0, column=1, sticky=tk.NS)
+    root.geometry(f"{width}x{height}")
+    return root, tree
+
+
+def show(title, nodes, page_size=PAGE_SIZE):
+    root, tree = build_window(title)
+    lazy = LazyTree(tree, page_size)
+    lazy.insert_page('', nodes, len(nodes))
+    try:
+        root.mainloop()
+    finally:
+        lazy.close()
+
+
+def show_data(data, title='JSON viewer', page_size=PAGE_SIZE):
+    """懒加载浏览任意字典/列表，例如 PVFApi.get_equipments() 的结果"""
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    show(title, [data_node(key, value) for key, value in items], page_size)
+
+
+def show_pvf(pvf: TinyPVF, page_size=PAGE_SIZE):
+    """浏览整个pvf：启动时只读取头部与根目录"""
+    show(f"PVF viewer - {pvf.pvf_path}", PVFBrowser(pvf).root(), page_size)
+
+
+if __name__ == '__main__':
+    import sys
+    show_pvf(TinyPVF(sys.argv[1], *sys.argv[2:3]))
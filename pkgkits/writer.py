@@ -0,0 +1,166 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: writer.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/19   13:48
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: pvf的编码与写出，是 TinyPVF 读取流程的逆过程。
+"""
+import os
+import shutil
+import struct
+import zlib
+import tempfile
+
+"""
+各部分的编码格式与 TinyPVF 的读取方式一一对应：
+脚本文件（.equ/.stk 等）：2字节文件头 + 若干 5 字节单元（1字节类型 + 4字节值，类型4为float，其余为int）
+*.lst：2字节文件头 + 若干 10 字节记录 '<bIbI'，(2, id) 与 (7, 字符串表索引)
+stringtable.bin：4字节数量N（字符串数/2）+ 2N+1 个偏移（相对数量字段之后）+ 字符串数据
+*.str：纯文本，每行 key>value
+pvf：头部 + 加密的文件树 + 各文件加密后的数据区
+"""
+
+SCRIPT_HEAD = b'\xb0\xd0'
+
+
+def encrypt(stream: bytes, crc) -> bytes:
+    """TinyPVF.decrypt 的逆运算：每个32位字循环左移6位后与密钥异或，不足4字节的尾部补零"""
+    import numpy as np
+    stream = stream + b'\x00' * (-len(stream) % 4)
+    words = np.frombuffer(stream, dtype='<u4')
+    return (((words << np.uint32(6)) | (words >> np.uint32(26))) ^ np.uint32(crc ^ 0x81A79011)).tobytes()
+
+
+def pack_units(units) -> bytes:
+    """将原始单元 [(类型, 值)] 编码为脚本文件字节流，字符串类单元的值为字符串表索引"""
+    chunks = [SCRIPT_HEAD]
+    for unit_type, value in units:
+        if unit_type == 4:
+            chunks.append(struct.pack('<Bf', 4, value))
+        elif unit_type in (2, 3):
+            chunks.append(struct.pack('<Bi', unit_type, value))
+        else:
+            chunks.append(struct.pack('<BI', unit_type, value))
+    return b''.join(chunks)
+
+
+def pack_lst(pairs) -> bytes:
+    """将 [(id, 字符串表索引)] 编码为 lst 文件"""
+    return SCRIPT_HEAD + b''.join(struct.pack('<bIbI', 2, _id, 7, index) for _id, index in pairs)
+
+
+def pack_bst(strings, encoding='big5', errors='ignore') -> bytes:
+    """将字符串列表编码为 stringtable.bin，数量字段记为字符串数/2，奇数时末尾补一个空串"""
+    chunks = []
+    for i, string in enumerate(strings):
+        try:
+            chunks.append(string.encode(encoding, errors))
+        except UnicodeEncodeError as e:
+            raise ValueError(f"string {i} {string!r} cannot be encoded as {encoding}: {e.reason}") from e
+    if len(chunks) % 2:
+        chunks.append(b'')
+    offsets = [(len(chunks) + 1) * 4]
+    for chunk in chunks:
+        offsets.append(offsets[-1] + len(chunk))
+    return struct.pack(f'<I{len(offsets)}I', len(chunks) // 2, *offsets) + b''.join(chunks)
+
+
+def pack_stt(tmap: dict, encoding='big5') -> bytes:
+    """将 {key: value} 编码为 *.str 文本"""
+    return ''.join(f"{key}>{value}\r\n" for key, value in tmap.items()).encode(encoding, 'ignore')
+
+
+class StringPool(object):
+    """
+    构造字符串表时的去重池，返回字符串对应的索引。传入已有的字符串表时保持原有位置，重复的字符串取第一个索引。
+    给定 encoding 时新加入的字符串先检查能否按该编码写出，不能时抛出 ValueError，池保持不变。
+    """
+
+    def __init__(self, strings=None, encoding=None):
+        self.strings = list(strings or [])
+        self.encoding = encoding
+        self.index = {}
+        for i, string in enumerate(self.strings):
+            self.index.setdefault(string, i)
+
+    def add(self, string: str) -> int:
+        index = self.index.get(string)
+        if index is None:
+            if self.encoding is not None:
+                try:
+                    string.encode(self.encoding, 'surrogateescape')
+                except UnicodeEncodeError as e:
+                    raise ValueError(f"string {string!r} cannot be encoded as {self.encoding}: {e.reason}") from e
+            index = self.index[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def copy(self):
+        pool = StringPool(encoding=self.encoding)
+        pool.strings, pool.index = list(self.strings), dict(self.index)
+        return pool
+
+    __call__ = add
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class PVFWriter(object):
+    """
+    流式写出pvf：数据区先写入同目录下的临时文件，close 时再依次写出头部、加密文件树和数据区，
+    任何时刻内存中只保留文件树条目。
+    """
+
+    def __init__(self, path, uuid=b'\x00' * 36, version=1):
+        self.path = path
+        self.uuid = uuid
+        self.version = version
+        self.entries = []
+        self.offset = 0
+        self._pack = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+
+    def add(self, filepath: str, content: bytes):
+        """写入明文文件，自动加密"""
+        crc = zlib.crc32(content)
+        self.add_encrypted(filepath, encrypt(content, crc), len(content), crc)
+
+    def add_encrypted(self, filepath: str, data: bytes, length: int, crc: int):
+        """直接写入已加密的数据（如从原pvf复用），length 为明文长度"""
+        self.entries.append((filepath.lower().replace('\\', '/').lstrip('/'), length, crc, self.offset))
+        self._pack.write(data)
+        self.offset += len(data)
+
+    def build_tree(self) -> bytes:
+        chunks = []
+        for fn, (filepath, length, crc, offset) in enumerate(self.entries):
+            fp_bytes = filepath.encode()
+            chunks.append(struct.pack('<II', fn, len(fp_bytes)) + fp_bytes + struct.pack('<III', length, crc, offset))
+        tree = b''.join(chunks)
+        return tree + b'\x00' * (-len(tree) % 4)
+
+    def close(self):
+        tree = self.build_tree()
+        crc = zlib.crc32(tree)
+        with open(self.path, 'wb') as f:
+            f.write(struct.pack('<i', len(self.uuid)) + self.uuid)
+            f.write(struct.pack('<iiII', self.version, len(tree), crc, len(self.entries)))
+            f.write(encrypt(tree, crc))
+            self._pack.seek(0)
+            shutil.copyfileobj(self._pack, f, 1 << 20)
+        self._pack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pack.close()
+        return False
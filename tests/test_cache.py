@@ -0,0 +1,72 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_cache.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   12:10
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 解码缓存中的树不能泄露给调用方，修改 get_* 的结果不影响下一次调用。
+"""
+import pytest
+from pkgkits.PvfParser import PVFApi
+from pkgkits.synthetic import generate
+
+
+@pytest.fixture
+def api(tmp_path):
+    path = str(tmp_path / 'small.pvf')
+    generate(path, equipments=20, stackables=20, quests=5, dungeons=5, skills_per_job=2)
+    api = PVFApi(path, workers=2)
+    api.load_pvf()
+    return api
+
+
+def mutate(tree):
+    node = next(iter(tree.values()))
+    node['value'] = 'MUTATED'
+    node['children'].clear()
+
+
+def test_get_equipments_returns_private_trees(api):
+    first, second = api.get_equipments(), api.get_equipments()
+    key = next(iter(first))
+    assert first[key] is not second[key] and first[key] == second[key]
+    expected = api.pvf.copy_tree(second[key])
+    mutate(first[key])
+    assert api.get_equipments()[key] == expected
+
+
+def test_get_supplies_returns_private_trees(api):
+    _, first = api.get_supplies()
+    key = next(iter(first))
+    expected = api.pvf.copy_tree(first[key])
+    mutate(first[key])
+    assert api.get_supplies()[1][key] == expected
+
+
+@pytest.mark.parametrize('name', ['get_tasks', 'get_instances'])
+def test_scheduled_loaders_return_private_trees(api, name):
+    first = getattr(api, name)()
+    key = next(iter(first))
+    expected = api.pvf.copy_tree(first[key])
+    mutate(first[key])
+    assert getattr(api, name)()[key] == expected
+
+
+def test_get_skills_returns_private_trees(api):
+    job = next(iter(api.get_skills().values()))
+    skid = next(iter(job['skills']))
+    expected = api.pvf.copy_tree(job['skills'][skid]['detail'])
+    mutate(job['skills'][skid]['detail'])
+    job_id = next(iter(api.get_skills()))
+    assert api.get_skills()[job_id]['skills'][skid]['detail'] == expected
+
+
+def test_load_tree_shared(api):
+    path = next(iter(api.pvf.load_lst('equipment/equipment.lst').values()))
+    assert api.pvf.load_tree(path, shared=True) is api.pvf.load_tree(path, shared=True)
+    assert api.pvf.load_tree(path) is not api.pvf.load_tree(path, shared=True)
+    assert api.pvf.load_tree(path) == api.pvf.load_tree(path, shared=True)
@@ -0,0 +1,52 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_extract.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   13:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 文件树中的路径不可信，导出与打包都不能写出或读入目录之外的文件。
+"""
+import os
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.writer import PVFWriter
+from pkgkits.extract import extract, load_manifest, safe_target
+from pkgkits.packer import pack
+
+
+def test_safe_target(tmp_path):
+    root = str(tmp_path / 'out')
+    assert safe_target(root, 'a/b.equ') == os.path.join(os.path.realpath(root), 'a', 'b.equ')
+    assert safe_target(root, 'a/../b.equ') == os.path.join(os.path.realpath(root), 'b.equ')
+    for path in ('../evil.txt', 'a/../../evil.txt', '..', '', 'a/..'):
+        assert safe_target(root, path) is None, path
+
+
+def test_extract_skips_escaping_paths(tmp_path):
+    source, output = str(tmp_path / 'crafted.pvf'), tmp_path / 'sub' / 'out'
+    with PVFWriter(source) as writer:
+        writer.add('ok/file.txt', b'fine')
+        writer.add('../evil.txt', b'evil')
+        writer.add('ok/../../../evil2.txt', b'evil')
+    stats = extract(source, str(output), workers=1)
+    assert stats['files'] == 3
+    assert (output / 'ok' / 'file.txt').read_bytes() == b'fine'
+    assert not (tmp_path / 'sub' / 'evil.txt').exists() and not (tmp_path / 'evil2.txt').exists()
+    assert set(load_manifest(str(output))['files']) == {'ok/file.txt'}
+
+
+def test_pack_skips_links_outside_the_directory(tmp_path):
+    source, folder, packed = str(tmp_path / 'src.pvf'), tmp_path / 'out', str(tmp_path / 'packed.pvf')
+    with PVFWriter(source) as writer:
+        writer.add('ok/file.txt', b'fine')
+    extract(source, str(folder), workers=1)
+    secret = tmp_path / 'secret.txt'
+    secret.write_bytes(b'secret')
+    os.symlink(secret, folder / 'ok' / 'link.txt')
+    pack(str(folder), packed, workers=1)
+    pvf = TinyPVF(packed, cache_bytes=0)
+    assert set(pvf.headers) == {'ok/file.txt'}
+    pvf.fp.close()
@@ -0,0 +1,32 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_import_time.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   13:10
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 导入 PvfParser 不应加载重量级模块，耗时不超过预算。
+"""
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# 导入 PvfParser 时不应被加载的重量级模块
+HEAVY_MODULES = ('zhconv', 'numpy', 'pandas')
+# 导入耗时预算（秒），不含解释器自身的启动时间
+IMPORT_BUDGET = 0.3
+
+
+def test_import_pvfparser_is_light():
+    code = ("import sys, json, time; start = time.perf_counter(); import pkgkits.PvfParser; "
+            "elapsed = time.perf_counter() - start; "
+            f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    assert result['loaded'] == []
+    assert result['elapsed'] < IMPORT_BUDGET, f"importing pkgkits.PvfParser took {result['elapsed']:.3f}s"
@@ -0,0 +1,91 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_inventory.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   12:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 用 pack_blob 构造的背包字段验证解码，无需数据库。
+"""
+import struct
+import numpy as np
+from pkgkits.inventory import (SLOT_SIZE, SLOT_DTYPE, pack_blob, unpack_blob, decode_slots, decode_rows,
+                               holders_of, count_by_owner, join_catalog)
+
+
+def make_slots(*items) -> bytes:
+    """items 为 {字段: 值}，装备（type 1）的 grade 按大端写入数量位"""
+    slots = np.zeros(len(items), dtype=SLOT_DTYPE)
+    for slot, item in zip(slots, items):
+        item = dict(item)
+        grade = item.pop('grade', None)
+        for name, value in item.items():
+            slot[name] = value
+        if grade is not None:
+            slot['count'] = struct.unpack('<I', struct.pack('>I', grade))[0]
+    return slots.tobytes()
+
+
+SWORD = {'type': 1, 'item_id': 100, 'upgrade': 12, 'grade': 7, 'amplify_type': 2, 'amplify_value': 30,
+         'forge': 3, 'seal': 1, 'durability': 40}
+POTION = {'type': 2, 'item_id': 2000, 'count': 25}
+EMPTY = {}
+
+
+def test_blob_round_trip():
+    raw = make_slots(SWORD, EMPTY, POTION)
+    blob = pack_blob(raw)
+    assert struct.unpack('<I', blob[:4])[0] == len(raw) == 3 * SLOT_SIZE
+    assert unpack_blob(blob) == raw
+    slots = decode_slots(unpack_blob(blob))
+    assert slots['item_id'].tolist() == [100, 0, 2000]
+    assert slots['upgrade'][0] == 12 and slots['durability'][0] == 40
+
+
+def test_decode_rows():
+    rows = [(1, pack_blob(make_slots(SWORD, EMPTY, POTION))), (2, pack_blob(make_slots(POTION)))]
+    items = decode_rows(rows, 'cargo')
+    assert items['owner'].tolist() == [1, 1, 2]
+    assert items['slot'].tolist() == [0, 2, 0]
+    assert (items['source'] == 3).all()
+    sword, potion = items[0], items[1]
+    # 装备的数量位是大端品级，数量恒为1
+    assert (sword['count'], sword['grade']) == (1, 7)
+    assert (sword['upgrade'], sword['amplify_type'], sword['amplify_value'], sword['forge'], sword['seal']) == \
+           (12, 2, 30, 3, 1)
+    assert (potion['count'], potion['grade']) == (25, 0)
+    assert len(decode_rows(rows, skip_empty=False)) == 4
+
+
+def test_corrupt_and_empty_blobs(capsys):
+    good = pack_blob(make_slots(POTION))
+    corrupt = good[:4] + b'\x00' * (len(good) - 4)
+    # 末尾不足一个槽位的字节被忽略
+    truncated = pack_blob(make_slots(SWORD) + b'\x01' * (SLOT_SIZE - 1))
+    assert unpack_blob(corrupt) == b''
+    assert 'Blob Error' in capsys.readouterr().out
+    assert unpack_blob(None) == b'' and unpack_blob(b'\x00\x00') == b''
+    items = decode_rows([(1, corrupt), (2, None), (3, b''), (4, good), (5, truncated)])
+    assert items['owner'].tolist() == [4, 5]
+    assert items['slot'].tolist() == [0, 0]
+    assert len(decode_rows([(1, corrupt)])) == 0
+
+
+def test_holders_and_catalog():
+    rows = [(1, pack_blob(make_slots(SWORD, POTION))), (2, pack_blob(make_slots(POTION, POTION))),
+            (3, pack_blob(make_slots(SWORD)))]
+    items = decode_rows(rows)
+    assert holders_of(items, 100)['owner'].tolist() == [1, 3]
+    assert holders_of(items, {100, 2000}).shape == items.shape
+    assert len(holders_of(items, 999)) == 0
+    owners, totals = count_by_owner(items, 2000)
+    assert owners.tolist() == [1, 2] and totals.tolist() == [25, 50]
+
+    catalog = {100: {"path": "equipment/sword.equ", "name": "剑"}, 2000: {"path": "stackable/potion.stk", "name": None}}
+    names = join_catalog(items, catalog)
+    assert names.tolist() == ['剑', None, None, None, '剑']
+    paths = join_catalog(items, {100: catalog[100]}, 'path', default='?')
+    assert paths.tolist() == ['equipment/sword.equ', '?', '?', '?', 'equipment/sword.equ']
@@ -0,0 +1,39 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_overlay.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   10:30
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: overlay 写入无法编码的字符串时应整体失败，不留下半写的状态。
+"""
+import pytest
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.overlay import Overlay
+from pkgkits.synthetic import generate
+
+
+@pytest.fixture
+def pvf(tmp_path):
+    path = str(tmp_path / 'small.pvf')
+    generate(path, equipments=20, stackables=20, quests=5, dungeons=5, skills_per_job=2)
+    return TinyPVF(path, 'big5')
+
+
+def test_put_text_rejects_unencodable_string(pvf):
+    overlay = Overlay(pvf)
+    strings = len(pvf.raw_bst)
+    with pytest.raises(ValueError, match=r"equipment/new\.equ.*'个'"):
+        overlay.put_text('equipment/new.equ', '#PVF_File\n[name]\n\t`个`\n')
+    assert 'equipment/new.equ' not in overlay
+    assert 'stringtable.bin' not in overlay
+    assert len(overlay.pool) == strings
+    assert '个' not in overlay.pool.index
+
+    # 失败后仍可写入能编码的新字符串
+    overlay.put_text('equipment/new.equ', '#PVF_File\n[name]\n\t`全`\n')
+    assert pvf.load_tree('equipment/new.equ')['[name]']['children'][0]['value'] == '全'
+    assert '全' in pvf.raw_bst and '个' not in pvf.raw_bst
@@ -0,0 +1,70 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_packer.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   11:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 部分导出的目录重新打包后，未导出的文件应原样保留。
+"""
+import os
+import pytest
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.extract import extract
+from pkgkits.packer import pack
+from pkgkits.synthetic import generate
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / 'small.pvf')
+    generate(path, equipments=20, stackables=20, quests=5, dungeons=5, skills_per_job=2)
+    return path
+
+
+def contents(path):
+    pvf = TinyPVF(path, 'big5', cache_bytes=0)
+    result = {name: pvf.parse_bytestream(name)[:leaf['real_len']] for name, leaf in pvf.headers.items()}
+    pvf.fp.close()
+    return result
+
+
+@pytest.mark.parametrize('fmt', ['raw', 'text'])
+def test_partial_extraction_round_trip(source, tmp_path, fmt):
+    folder, output = str(tmp_path / 'out'), str(tmp_path / 'packed.pvf')
+    stats = extract(source, folder, ['equipment/*'], fmt, workers=1)
+    original = contents(source)
+    assert 0 < stats['files'] < len(original)
+
+    stats = pack(folder, output, workers=1)
+    assert stats['removed'] == 0
+    assert contents(output) == original
+
+
+def test_partial_pack_removes_only_deleted_files(source, tmp_path):
+    folder, output = str(tmp_path / 'out'), str(tmp_path / 'packed.pvf')
+    extract(source, folder, ['equipment/*'], workers=1)
+    deleted = sorted(name for name in contents(source) if name.endswith('.equ'))[0]
+    os.remove(os.path.join(folder, *deleted.split('/')))
+
+    stats = pack(folder, output, workers=1)
+    original, packed = contents(source), contents(output)
+    assert stats['removed'] == 1
+    assert packed.keys() == original.keys() - {deleted}
+    assert all(packed[name] == original[name] for name in packed)
+
+
+def test_partial_pack_without_source(source, tmp_path):
+    folder, output = str(tmp_path / 'out'), str(tmp_path / 'packed.pvf')
+    extract(source, folder, ['equipment/*'], workers=1)
+    os.remove(source)
+    with pytest.raises(ValueError, match='partial extraction'):
+        pack(folder, output, workers=1)
+    assert not os.path.exists(output)
+
+    stats = pack(folder, output, workers=1, partial=True)
+    assert all(name.startswith('equipment/') for name in contents(output))
+    assert stats['files'] == len(contents(output))
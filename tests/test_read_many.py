@@ -0,0 +1,105 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_read_many.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   14:40
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 合并读取的区间规划与 read_many / load_trees 的边界情况。
+"""
+import pytest
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.overlay import Overlay
+from pkgkits.scheduler import BulkScheduler
+from pkgkits.synthetic import generate
+
+
+def leaf(offset, size):
+    return {'offset': offset, 'file_len': size}
+
+
+def plan(leaves, window=100, gap=10):
+    """返回 [(起始偏移, 长度, [键])]，便于比较"""
+    return [(start, length, [key for key, _ in members])
+            for start, length, members in TinyPVF.plan_reads(leaves, window, gap)]
+
+
+def test_plan_reads_merges_adjacent_and_sorts():
+    leaves = [('c', leaf(40, 20)), ('a', leaf(0, 20)), ('b', leaf(20, 20))]
+    assert plan(leaves) == [(0, 60, ['a', 'b', 'c'])]
+    assert plan([]) == []
+
+
+def test_plan_reads_bridges_small_gaps_only():
+    leaves = [('a', leaf(0, 20)), ('b', leaf(30, 10)), ('c', leaf(51, 10))]
+    # a 与 b 相隔 10 字节，连同空隙一起读；b 与 c 相隔 11 字节，另起一次读取
+    assert plan(leaves) == [(0, 40, ['a', 'b']), (51, 10, ['c'])]
+    assert plan(leaves, gap=0) == [(0, 20, ['a']), (30, 10, ['b']), (51, 10, ['c'])]
+
+
+def test_plan_reads_caps_window():
+    leaves = [(i, leaf(i * 30, 30)) for i in range(7)]
+    ranges = plan(leaves, window=100)
+    assert ranges == [(0, 90, [0, 1, 2]), (90, 90, [3, 4, 5]), (180, 30, [6])]
+    assert all(length <= 100 for _, length, _ in ranges)
+
+
+def test_plan_reads_large_files_read_alone():
+    leaves = [('a', leaf(0, 10)), ('big', leaf(10, 500)), ('b', leaf(510, 10))]
+    assert plan(leaves) == [(0, 10, ['a']), (10, 500, ['big']), (510, 10, ['b'])]
+
+
+@pytest.fixture
+def pvf(tmp_path):
+    path = str(tmp_path / 'small.pvf')
+    generate(path, equipments=20, stackables=20, quests=5, dungeons=5, skills_per_job=2)
+    return TinyPVF(path, 'big5')
+
+
+def scripts(pvf, count=6):
+    return sorted(path for path in pvf.headers if path.endswith('.equ'))[:count]
+
+
+def test_read_many_matches_single_reads(pvf):
+    paths = scripts(pvf)
+    # 窗口很小时每个文件单独读取，结果不变
+    for window in (1, 1 << 20):
+        assert dict(pvf.read_many(paths, window=window)) == {path: pvf.parse_bytestream(path) for path in paths}
+
+
+def test_read_many_ids_share_one_read(pvf):
+    first, second = scripts(pvf, 2)
+    result = list(pvf.read_many({1: first, 2: first.upper(), 3: second}))
+    assert sorted(key for key, _ in result) == [1, 2, 3]
+    data = dict(result)
+    assert data[1] == data[2] == pvf.parse_bytestream(first)
+    assert data[3] == pvf.parse_bytestream(second)
+
+
+def test_read_many_overlay_and_missing(pvf, capsys):
+    changed, removed, kept = scripts(pvf, 3)
+    overlay = Overlay(pvf)
+    overlay.put(changed, b'changed')
+    overlay.put('equipment/new.equ', b'new')
+    overlay.remove(removed)
+    result = list(pvf.read_many([kept, 'equipment/missing.equ', changed, removed, 'equipment/new.equ']))
+    # overlay 中的文件最先产出，不存在与已删除的文件跳过
+    assert result[:2] == [(changed, b'changed'), ('equipment/new.equ', b'new')]
+    assert result[2:] == [(kept, pvf.parse_bytestream(kept))]
+    out = capsys.readouterr().out
+    assert 'equipment/missing.equ' in out and removed in out
+
+
+def test_missing_files_are_not_cached(pvf):
+    path = 'equipment/missing.equ'
+    present = scripts(pvf, 1)[0]
+    trees = BulkScheduler(pvf, workers=1).load_trees([path, present])
+    assert trees[path] == {} and trees[present]
+    assert pvf.load_tree(path) == {}
+    assert pvf.decrypt_bin2slist(path) == []
+    assert pvf.cache_key('tree', path, False) not in pvf.cache
+    assert pvf.cache_key('units', path, '', False) not in pvf.cache
+    assert pvf.cache_key('tree', present, False) in pvf.cache
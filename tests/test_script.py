@@ -0,0 +1,79 @@
+# -*- encoding: utf-8 -*-
+"""
+--------------------------------------------------------
+@File: test_script.py
+@Project: dnf-pfv-manager
+@Time: 2026/10/20   14:05
+@Author: shelhen
+@Email: shelhen@163.com
+@Software: PyCharm
+--------------------------------------------------------
+# @Brief: 脚本文本格式的无损往返：render -> parse -> pack_units 与原始字节一致。
+"""
+import math
+import pytest
+from pkgkits.PvfParser import TinyPVF
+from pkgkits.synthetic import generate
+from pkgkits.writer import SCRIPT_HEAD, StringPool, pack_units, pack_lst
+from pkgkits import script
+
+
+@pytest.fixture(scope='module')
+def pvf(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('script') / 'small.pvf')
+    generate(path, equipments=30, stackables=30, quests=10, dungeons=5, skills_per_job=3)
+    return TinyPVF(path, 'big5', cache_bytes=0)
+
+
+def body_of(pvf, path):
+    return pvf.parse_bytestream(path)[:pvf.headers[path]['real_len']]
+
+
+def test_scripts_round_trip(pvf):
+    strings = pvf.raw_bst
+    pool = StringPool(strings)
+    resolve = lambda lst_id, key: pvf.load_stt_cached(pvf.lst.get(lst_id)).get(key)
+    scripts = 0
+    for path in pvf.headers:
+        body = body_of(pvf, path)
+        if body[:2] != SCRIPT_HEAD or path.endswith('.lst'):
+            continue
+        text = script.render(script.read_units(body), strings, resolve)
+        assert pack_units(script.to_raw(script.parse(text), pool)) == body, path
+        scripts += 1
+    assert scripts > 50
+    # 没有引入新的字符串
+    assert len(pool) == len(strings)
+
+
+def test_lst_and_stringtable_round_trip(pvf):
+    strings = pvf.raw_bst
+    pool = StringPool(strings)
+    for path in pvf.glob('*.lst'):
+        body = body_of(pvf, path)
+        pairs = script.parse_lst(script.render_lst(body, strings))
+        assert pack_lst([(_id, pool(index) if isinstance(index, str) else index) for _id, index in pairs]) == body
+    assert script.parse_bst(script.render_bst(strings)) == strings
+
+
+def test_edge_units_round_trip():
+    strings = ['[tag]', 'has `backtick`', 'plain', 'line\nbreak', '[not a tag', 'key']
+    units = [(5, 0), (2, -7), (2, 2 ** 31 - 1), (3, 12), (4, 1.5), (4, 0.1), (4, -3e-5), (4, float('inf')),
+             (7, 1), (7, 2), (6, 2), (8, 4), (5, 4), (9, 3), (10, 5), (10, 2), (7, 999), (1, 42)]
+    body = pack_units(units)
+    text = script.render(script.read_units(body), strings)
+    assert text.startswith(script.HEADER + '\n[tag]\n')
+    assert pack_units(script.to_raw(script.parse(text), StringPool(strings))) == body
+
+
+def test_float_text_is_shortest_exact():
+    for value in (0.1, 1.0, -2.5, 1e-7, 3.4028234663852886e38):
+        text = script.float_text(script.read_units(pack_units([(4, value)]))[0][1])
+        assert '.' in text or 'e' in text
+    assert script.float_text(float('nan')).startswith('{4=0x')
+    assert math.isinf(script.parse(script.float_text(float('-inf')))[0][1])
+
+
+def test_parse_reports_bad_text():
+    with pytest.raises(ValueError, match='line 2'):
+        script.parse('#PVF_File\n[name]\t@@@\n')